@@ -0,0 +1,9 @@
+"""Reproducible throughput benchmarks for notes tagger.
+
+The runner lives in ``benchmarks.run`` and is not re-exported here, so
+``python -m benchmarks.run`` does not import it twice.
+"""
+
+from benchmarks.vault import VaultSpec, generate_vault
+
+__all__ = ["VaultSpec", "generate_vault"]
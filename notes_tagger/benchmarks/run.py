@@ -0,0 +1,196 @@
+"""Stage-by-stage throughput benchmark.
+
+Usage:
+
+    python -m benchmarks.run --notes 2000 --output results.json
+
+    python -m benchmarks.run --vault ~/vault --real-model all-MiniLM-L6-v2
+"""
+
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import click
+import numpy as np
+
+from notes_tagger.config import DEFAULT_CONFIG
+from notes_tagger.embeddings import EmbeddingModel, HashingEmbeddingModel
+from notes_tagger.linker.similarity import compute_similarity_scores, find_top_k_neighbors
+from notes_tagger.models import NoteLink
+from notes_tagger.storage import apply_backlinks_to_note, apply_tags_to_note, parse_markdown_note
+from notes_tagger.tagger.scoring import cosine_similarity_matrix, rank_topics
+from notes_tagger_cli.utils import find_markdown_files
+
+from benchmarks.vault import VaultSpec, generate_vault
+
+
+@contextmanager
+def _stage(results: dict, name: str) -> Iterator[dict]:
+    """Time a stage; the body fills in ``items`` on the yielded dict."""
+    stage = {"items": 0}
+    start = time.perf_counter()
+    yield stage
+    seconds = time.perf_counter() - start
+    stage["seconds"] = round(seconds, 6)
+    stage["items_per_sec"] = round(stage["items"] / seconds, 2) if seconds > 0 else None
+    results[name] = stage
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=Path(__file__).parent,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(
+    vault: Path,
+    model: EmbeddingModel | HashingEmbeddingModel,
+    threshold: float = DEFAULT_CONFIG.threshold,
+    max_tags: int = DEFAULT_CONFIG.max_tags,
+    link_threshold: float = 0.45,
+    max_links: int = 5,
+    write_back: bool = True,
+) -> dict:
+    """Run every pipeline stage once over vault and return per-stage timings."""
+    stages: dict[str, dict] = {}
+    topic_names = list(DEFAULT_CONFIG.topics)
+    topic_embeddings = model.embed_batch([DEFAULT_CONFIG.topics[t] for t in topic_names])
+
+    with _stage(stages, "walk") as stage:
+        files = list(find_markdown_files(vault, recursive=True))
+        stage["items"] = len(files)
+
+    with _stage(stages, "parse") as stage:
+        notes = [parse_markdown_note(f) for f in files]
+        stage["items"] = len(notes)
+        stage["bytes"] = sum(f.stat().st_size for f in files)
+
+    with _stage(stages, "embed") as stage:
+        texts = [f"{n.title}\n\n{n.body}" for n in notes]
+        embeddings = model.embed_batch(texts)
+        stage["items"] = len(texts)
+        stage["words"] = sum(len(t.split()) for t in texts)
+
+    with _stage(stages, "score") as stage:
+        tag_results = []
+        for embedding in embeddings:
+            similarities = cosine_similarity_matrix(embedding, topic_embeddings)
+            tag_results.append(rank_topics(similarities, topic_names, threshold, max_tags))
+        stage["items"] = len(tag_results)
+
+    with _stage(stages, "link") as stage:
+        links: list[list[NoteLink]] = []
+        for i, note in enumerate(notes):
+            neighbors = find_top_k_neighbors(
+                compute_similarity_scores(embeddings, i),
+                exclude_idx=i,
+                threshold=link_threshold,
+                max_results=max_links,
+            )
+            links.append([
+                NoteLink(
+                    from_id=note.id,
+                    to_id=notes[idx].id,
+                    to_title=notes[idx].title,
+                    similarity=score,
+                )
+                for idx, score in neighbors
+            ])
+        stage["items"] = len(links)
+        stage["links"] = sum(len(l) for l in links)
+
+    with _stage(stages, "write_back") as stage:
+        if write_back:
+            for path, tags, note_links in zip(files, tag_results, links):
+                if tags:
+                    apply_tags_to_note(path, [t.topic for t in tags], replace=True)
+                if note_links:
+                    apply_backlinks_to_note(path, note_links)
+                stage["items"] += 1
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "model": model.model_name,
+        "embedding_dim": int(model.embedding_dim),
+        "num_notes": len(files),
+        "stages": stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 6),
+    }
+
+
+@click.command()
+@click.option("--vault", type=click.Path(exists=True, file_okay=False, path_type=Path),
+              help="Benchmark a copy of an existing vault (the vault itself is never modified)")
+@click.option("--notes", "num_notes", type=int, default=500, help="Synthetic vault size")
+@click.option("--mean-words", type=int, default=300, help="Mean note length in words")
+@click.option("--length-sigma", type=float, default=0.8, help="Log-normal sigma of note length")
+@click.option("--frontmatter-ratio", type=float, default=0.7, help="Share of notes with frontmatter")
+@click.option("--max-tags", "spec_max_tags", type=int, default=5, help="Max existing tags per note")
+@click.option("--seed", type=int, default=0, help="Random seed for the synthetic vault")
+@click.option("--real-model", type=str, help="Use a real sentence-transformers model instead of the stub")
+@click.option("--device", type=str, help="Device for the real model (cpu, cuda, mps)")
+@click.option("--no-write-back", is_flag=True, help="Skip the write-back stage")
+@click.option("-o", "--output", type=click.Path(path_type=Path), help="Write JSON results to this file")
+def main(
+    vault: Optional[Path],
+    num_notes: int,
+    mean_words: int,
+    length_sigma: float,
+    frontmatter_ratio: float,
+    spec_max_tags: int,
+    seed: int,
+    real_model: Optional[str],
+    device: Optional[str],
+    no_write_back: bool,
+    output: Optional[Path],
+) -> None:
+    """Benchmark walk, parse, embed, score, link and write-back stages."""
+    model = EmbeddingModel(real_model, device) if real_model else HashingEmbeddingModel()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        spec = None
+        if vault is None:
+            spec = VaultSpec(
+                num_notes=num_notes,
+                mean_words=mean_words,
+                length_sigma=length_sigma,
+                frontmatter_ratio=frontmatter_ratio,
+                max_tags=spec_max_tags,
+                seed=seed,
+            )
+            work_dir = Path(tmpdir)
+            generate_vault(work_dir, spec)
+        else:
+            # Write-back edits every note, so it runs on a throwaway copy.
+            work_dir = Path(tmpdir) / "vault"
+            shutil.copytree(vault, work_dir)
+
+        results = run_benchmark(work_dir, model, write_back=not no_write_back)
+        results["vault"] = spec.model_dump() if spec else str(vault)
+
+    text = json.dumps(results, indent=2)
+    if output:
+        output.write_text(text, encoding="utf-8")
+    click.echo(text)
+
+
+if __name__ == "__main__":
+    main()
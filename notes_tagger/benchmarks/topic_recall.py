@@ -0,0 +1,131 @@
+"""Recall and latency of the two-level topic index versus exact scoring.
+
+Usage:
+
+    python -m benchmarks.topic_recall --topics 10000 --probe 4 --probe 8 --probe 16
+
+    python -m benchmarks.topic_recall --config taxonomy.json --queries 500
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import click
+import numpy as np
+from numpy import ndarray
+
+from notes_tagger.config import load_config
+from notes_tagger.embeddings import EmbeddingModel, HashingEmbeddingModel
+from notes_tagger.embeddings.utils import normalize_embeddings
+from notes_tagger.tagger.index import TopicIndex
+
+
+def synthetic_taxonomy(
+    num_topics: int,
+    num_parents: int,
+    dim: int = 384,
+    spread: float = 0.6,
+    seed: int = 0,
+) -> tuple[ndarray, list[str], dict[str, str]]:
+    """Random hierarchical topics: children scattered around parent directions."""
+    rng = np.random.default_rng(seed)
+    centers = normalize_embeddings(rng.standard_normal((num_parents, dim)))
+    parent_of = rng.integers(0, num_parents, num_topics)
+    noise = normalize_embeddings(rng.standard_normal((num_topics, dim)))
+    embeddings = normalize_embeddings(centers[parent_of] + spread * noise)
+    names = [f"topic_{i}" for i in range(num_topics)]
+    parents = {name: f"parent_{p}" for name, p in zip(names, parent_of)}
+    return embeddings.astype(np.float32), names, parents
+
+
+def synthetic_queries(topic_embeddings: ndarray, count: int, spread: float = 0.6, seed: int = 1) -> ndarray:
+    """Noisy copies of random topics, standing in for note embeddings."""
+    rng = np.random.default_rng(seed)
+    picks = topic_embeddings[rng.integers(0, len(topic_embeddings), count)]
+    noise = normalize_embeddings(rng.standard_normal(picks.shape))
+    return normalize_embeddings(picks + spread * noise).astype(np.float32)
+
+
+def measure(index: TopicIndex, queries: ndarray, k: int, probes: list[int]) -> dict:
+    """Recall@k and mean per-query latency for exact and each probe setting."""
+    start = time.perf_counter()
+    for query in queries:
+        index.exact_search(query)
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    results = []
+    for probe in probes:
+        candidates = 0
+        start = time.perf_counter()
+        for query in queries:
+            indices, _ = index.search(query, probe)
+            candidates += len(indices)
+        latency_ms = (time.perf_counter() - start) / len(queries) * 1000
+        results.append({
+            "probe": probe,
+            "recall_at_k": round(index.recall(queries, k, probe), 4),
+            "mean_candidates": round(candidates / len(queries), 1),
+            "latency_ms": round(latency_ms, 4),
+            "speedup": round(exact_ms / latency_ms, 2) if latency_ms else None,
+        })
+
+    return {
+        "num_topics": len(index.topic_embeddings),
+        "num_clusters": index.num_clusters,
+        "k": k,
+        "exact_latency_ms": round(exact_ms, 4),
+        "probes": results,
+    }
+
+
+@click.command()
+@click.option("--config", "config_path", type=click.Path(exists=True, path_type=Path),
+              help="Measure a real taxonomy from a config JSON instead of a synthetic one")
+@click.option("--topics", "num_topics", type=int, default=10000, help="Synthetic taxonomy size")
+@click.option("--parents", "num_parents", type=int, help="Synthetic parent count (default: sqrt(topics))")
+@click.option("--no-parents", is_flag=True, help="Ignore the hierarchy and cluster with k-means")
+@click.option("--queries", "num_queries", type=int, default=200, help="Number of queries")
+@click.option("-k", "k", type=int, default=3, help="Recall cut-off (top-k topics)")
+@click.option("--probe", "probes", type=int, multiple=True, help="Clusters to probe (repeatable)")
+@click.option("--real-model", type=str, help="Embed config topics with a real model instead of the stub")
+@click.option("-o", "--output", type=click.Path(path_type=Path), help="Write JSON results to this file")
+def main(
+    config_path: Optional[Path],
+    num_topics: int,
+    num_parents: Optional[int],
+    no_parents: bool,
+    num_queries: int,
+    k: int,
+    probes: tuple[int, ...],
+    real_model: Optional[str],
+    output: Optional[Path],
+) -> None:
+    """Report recall@k and latency of clustered topic scoring."""
+    if config_path:
+        config = load_config(str(config_path))
+        model = EmbeddingModel(real_model) if real_model else HashingEmbeddingModel()
+        names = list(config.topics)
+        embeddings = model.embed_batch([config.topics[n] for n in names])
+        parents = config.topic_parents
+        num_clusters = config.index_clusters
+    else:
+        num_parents = num_parents or max(1, round(num_topics ** 0.5))
+        embeddings, names, parents = synthetic_taxonomy(num_topics, num_parents)
+        num_clusters = None
+
+    index = TopicIndex.build(
+        embeddings, names, topic_parents=None if no_parents else parents, num_clusters=num_clusters
+    )
+    queries = synthetic_queries(embeddings, num_queries)
+    results = measure(index, queries, k, list(probes) or [1, 4, 8, 16])
+
+    text = json.dumps(results, indent=2)
+    if output:
+        output.write_text(text, encoding="utf-8")
+    click.echo(text)
+
+
+if __name__ == "__main__":
+    main()
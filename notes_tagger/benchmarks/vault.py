@@ -0,0 +1,136 @@
+"""Synthetic Obsidian vault generator."""
+
+import math
+import random
+import re
+from pathlib import Path
+
+import yaml
+from pydantic import BaseModel, Field
+
+from notes_tagger.config import DEFAULT_CONFIG
+
+FILLER_WORDS = (
+    "the a and of to in for with on this that we it is was be notes today "
+    "later check again maybe also then next because however should could"
+).split()
+
+FRONTMATTER_STYLES = (
+    "none",
+    "title",
+    "tags_list",
+    "tags_string",
+    "aliases",
+    "dates",
+    "nested",
+)
+
+
+class VaultSpec(BaseModel):
+    """Shape of a synthetic vault."""
+
+    num_notes: int = Field(default=500, ge=1)
+    mean_words: int = Field(default=300, ge=1)
+    length_sigma: float = Field(default=0.8, ge=0.0, description="Log-normal sigma of note length")
+    max_words: int = Field(default=5000, ge=1)
+    frontmatter_ratio: float = Field(default=0.7, ge=0.0, le=1.0)
+    max_tags: int = Field(default=5, ge=0)
+    num_folders: int = Field(default=8, ge=0)
+    folder_depth: int = Field(default=2, ge=1)
+    seed: int = 0
+
+
+def _topic_vocabulary() -> dict[str, list[str]]:
+    """Word lists per topic, taken from the default topic descriptions."""
+    return {
+        name: [w.lower() for w in re.findall(r"[A-Za-z][A-Za-z-]+", description)]
+        for name, description in DEFAULT_CONFIG.topics.items()
+    }
+
+
+def _note_length(rng: random.Random, spec: VaultSpec) -> int:
+    if spec.length_sigma == 0:
+        return spec.mean_words
+    mu = max(0.0, math.log(spec.mean_words) - spec.length_sigma**2 / 2)
+    return max(5, min(spec.max_words, int(rng.lognormvariate(mu, spec.length_sigma))))
+
+
+def _sentence(rng: random.Random, vocab: list[str]) -> str:
+    words = [
+        rng.choice(vocab) if rng.random() < 0.6 else rng.choice(FILLER_WORDS)
+        for _ in range(rng.randint(6, 16))
+    ]
+    return " ".join(words).capitalize() + "."
+
+
+def _body(rng: random.Random, title: str, topics: list[str], words: int, vocabs: dict) -> str:
+    vocab = [w for t in topics for w in vocabs[t]]
+    lines = [f"# {title}", ""]
+    written = 0
+    while written < words:
+        if rng.random() < 0.25:
+            lines.append(f"## {rng.choice(vocab).capitalize()} {rng.choice(vocab)}")
+            lines.append("")
+        paragraph = []
+        for _ in range(rng.randint(2, 6)):
+            sentence = _sentence(rng, vocab)
+            paragraph.append(sentence)
+            written += sentence.count(" ") + 1
+        lines.append(" ".join(paragraph))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _frontmatter(rng: random.Random, title: str, tags: list[str]) -> dict:
+    style = rng.choice(FRONTMATTER_STYLES)
+    if style == "none":
+        return {}
+    meta: dict = {}
+    if style in ("title", "nested"):
+        meta["title"] = title
+    if style == "tags_string" and tags:
+        meta["tags"] = tags[0]
+    elif style != "title" and tags:
+        meta["tags"] = tags
+    if style == "aliases":
+        meta["aliases"] = [title.lower(), title.replace(" ", "-")]
+    if style in ("dates", "nested"):
+        day = rng.randint(1, 28)
+        meta["created"] = f"2024-{rng.randint(1, 12):02d}-{day:02d}"
+        meta["modified"] = f"2025-{rng.randint(1, 12):02d}-{day:02d}"
+    if style == "nested":
+        meta["meta"] = {"status": rng.choice(["draft", "done"]), "score": rng.random()}
+    return meta
+
+
+def generate_vault(root: Path, spec: VaultSpec) -> list[Path]:
+    """Write a synthetic vault under root and return the note paths."""
+    rng = random.Random(spec.seed)
+    vocabs = _topic_vocabulary()
+    topic_names = sorted(vocabs)
+
+    folders = [root]
+    for i in range(spec.num_folders):
+        depth = rng.randint(1, spec.folder_depth)
+        folders.append(root.joinpath(*(f"folder_{i}_{d}" for d in range(depth))))
+
+    paths = []
+    for i in range(spec.num_notes):
+        topics = rng.sample(topic_names, rng.randint(1, 3))
+        title = f"Note {i} {topics[0]}"
+        tags = rng.sample(topic_names, rng.randint(0, min(spec.max_tags, len(topic_names))))
+        body = _body(rng, title, topics, _note_length(rng, spec), vocabs)
+
+        meta = _frontmatter(rng, title, tags) if rng.random() < spec.frontmatter_ratio else {}
+        if meta:
+            frontmatter = yaml.dump(meta, default_flow_style=False, sort_keys=False).strip()
+            content = f"---\n{frontmatter}\n---\n\n{body}"
+        else:
+            content = body
+
+        path = rng.choice(folders) / f"note_{i:06d}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        paths.append(path)
+
+    return paths
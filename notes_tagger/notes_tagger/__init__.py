@@ -11,6 +11,7 @@ from notes_tagger.models import (
 )
 from notes_tagger.config import DEFAULT_CONFIG, load_config
 from notes_tagger.tagger.engine import TaggingEngine
+from notes_tagger.tagger.batcher import BatchingTagger
 from notes_tagger.linker import LinkConfig, LinkingEngine
 
 __all__ = [
@@ -24,6 +25,7 @@ __all__ = [
     "DEFAULT_CONFIG",
     "load_config",
     "TaggingEngine",
+    "BatchingTagger",
     "LinkConfig",
     "LinkingEngine",
 ]
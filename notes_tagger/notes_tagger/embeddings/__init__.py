@@ -2,6 +2,7 @@
 
 from notes_tagger.embeddings.model import EmbeddingModel
 from notes_tagger.embeddings.cache import EmbeddingCache
+from notes_tagger.embeddings.hashing import HashingEmbeddingModel
 from notes_tagger.embeddings.utils import (
     normalize_embedding,
     normalize_embeddings,
@@ -13,6 +14,7 @@ from notes_tagger.embeddings.utils import (
 __all__ = [
     "EmbeddingModel",
     "EmbeddingCache",
+    "HashingEmbeddingModel",
     "normalize_embedding",
     "normalize_embeddings",
     "chunk_texts",
@@ -0,0 +1,48 @@
+"""Deterministic hashing embedding model for offline use and benchmarks."""
+
+import hashlib
+import re
+
+import numpy as np
+from numpy import ndarray
+
+from notes_tagger.embeddings.utils import normalize_embeddings
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddingModel:
+    """Drop-in stand-in for EmbeddingModel that needs no model download.
+
+    Tokens are hashed into a fixed number of signed buckets (the "hashing
+    trick"), so texts sharing words get similar vectors and the same text
+    always maps to the same embedding.
+    """
+
+    def __init__(self, embedding_dim: int = 384, model_name: str = "hashing-stub"):
+        self.model_name = model_name
+        self.device = "cpu"
+        self.embedding_dim = embedding_dim
+
+    def _hash_token(self, token: str) -> tuple[int, float]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        sign = 1.0 if value & 1 else -1.0
+        return (value >> 1) % self.embedding_dim, sign
+
+    def _embed_raw(self, text: str) -> ndarray:
+        vector = np.zeros(self.embedding_dim, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            bucket, sign = self._hash_token(token)
+            vector[bucket] += sign
+        return vector
+
+    def embed(self, text: str) -> ndarray:
+        """Single text → embedding."""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: list[str], batch_size: int = 32) -> ndarray:
+        """Batch encode with automatic normalization."""
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        return normalize_embeddings(np.vstack([self._embed_raw(t) for t in texts]))
@@ -13,15 +13,20 @@ from notes_tagger.models import Note, NoteLink, LinkResult
 class LinkingEngine:
     """Engine for finding semantically similar notes and creating links."""
 
-    def __init__(self, config: Optional[LinkConfig] = None):
+    def __init__(
+        self,
+        config: Optional[LinkConfig] = None,
+        model: Optional[EmbeddingModel] = None,
+    ):
         self.config = config or LinkConfig()
-        self._model: Optional[EmbeddingModel] = None
+        self._model: Optional[EmbeddingModel] = model
         self._note_embeddings: Optional[ndarray] = None
         self._notes: list[Note] = []
 
     def initialize(self) -> None:
         """Load embedding model."""
-        self._model = EmbeddingModel(self.config.model_name, self.config.device)
+        if self._model is None:
+            self._model = EmbeddingModel(self.config.model_name, self.config.device)
 
     def embed_notes(self, notes: list[Note]) -> None:
         """Embed all notes and store for similarity search.
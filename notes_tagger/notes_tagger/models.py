@@ -1,9 +1,9 @@
 """Pydantic data models for notes tagger."""
 
 from enum import Enum
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class ModelType(str, Enum):
@@ -57,6 +57,23 @@ class Config(BaseModel):
         default_factory=lambda: ["backup.md", "backlog.txt"],
         description="List of filenames to ignore during processing",
     )
+    topic_parents: dict[str, str] = Field(
+        default_factory=dict,
+        description="Child topic -> parent topic/group name; parents become index clusters",
+    )
+    topic_index: Literal["auto", "exact", "clustered"] = Field(
+        default="auto",
+        description="Topic scoring strategy; 'auto' clusters once index_min_topics is reached",
+    )
+    index_min_topics: int = Field(default=1000, ge=1)
+    index_clusters: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Cluster count when no topic_parents are given (default: sqrt(#topics))",
+    )
+    index_probe: int = Field(
+        default=8, ge=1, description="Number of top clusters scored exhaustively"
+    )
 
     @field_validator("topics")
     @classmethod
@@ -65,6 +82,13 @@ class Config(BaseModel):
             raise ValueError("Must define at least one topic")
         return v
 
+    @model_validator(mode="after")
+    def parents_reference_topics(self) -> "Config":
+        unknown = set(self.topic_parents) - set(self.topics)
+        if unknown:
+            raise ValueError(f"topic_parents references unknown topics: {sorted(unknown)}")
+        return self
+
 
 class EmbeddingMetadata(BaseModel):
     """Metadata for cached embeddings."""
@@ -76,6 +100,22 @@ class EmbeddingMetadata(BaseModel):
     timestamp: float
 
 
+class CacheStats(BaseModel):
+    """Counters and size information for a PickleCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    total_bytes: int = 0
+    max_bytes: Optional[int] = None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
 class NoteLink(BaseModel):
     """A link between two notes with similarity score."""
 
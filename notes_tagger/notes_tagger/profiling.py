@@ -0,0 +1,146 @@
+"""Lightweight stage timers and counters for profiling command runs."""
+
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+
+class Profiler:
+    """Collect per-stage wall time, counters and batch sizes.
+
+    Stages may be entered many times (e.g. once per file); their durations
+    are summed. Every entry is also kept as a trace event so a run can be
+    exported in Chrome trace format and inspected in ``chrome://tracing``
+    or Perfetto.
+    """
+
+    def __init__(self, enabled: bool = True, cprofile_path: Optional[str | Path] = None):
+        self.enabled = enabled
+        self.cprofile_path = Path(cprofile_path) if cprofile_path else None
+        self.counters: dict[str, float] = {}
+        self.batch_sizes: list[int] = []
+        self._stages: dict[str, dict[str, float]] = {}
+        self._events: list[dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._finished: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of work under the given stage name."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            totals = self._stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            totals["seconds"] += duration
+            totals["calls"] += 1
+            self._events.append({
+                "name": name,
+                "ts": (start - self._origin) * 1e6,
+                "dur": duration * 1e6,
+                "tid": threading.get_ident(),
+            })
+
+    @contextmanager
+    def hot_section(self) -> Iterator[None]:
+        """Run the block under cProfile if a dump path was configured."""
+        if not self.enabled or self.cprofile_path is None:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.cprofile_path.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(self.cprofile_path))
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Increment a named counter."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_batch(self, size: int) -> None:
+        """Record the size of one embedding batch."""
+        if self.enabled:
+            self.batch_sizes.append(size)
+
+    def finish(self) -> None:
+        """Mark the end of the run for wall-clock based rates."""
+        self._finished = time.perf_counter()
+
+    def _rate(self, counter: str, seconds: float) -> Optional[float]:
+        if counter not in self.counters or seconds <= 0:
+            return None
+        return round(self.counters[counter] / seconds, 2)
+
+    def summary(self) -> dict[str, Any]:
+        """Return stage totals, counters and derived throughput figures."""
+        end = self._finished or time.perf_counter()
+        wall = end - self._origin
+        embed_seconds = self._stages.get("embed", {}).get("seconds", 0.0)
+
+        return {
+            "wall_seconds": round(wall, 6),
+            "stages": {
+                name: {"seconds": round(s["seconds"], 6), "calls": int(s["calls"])}
+                for name, s in self._stages.items()
+            },
+            "counters": dict(self.counters),
+            "files_per_sec": self._rate("files", wall),
+            "tokens_per_sec": self._rate("tokens", embed_seconds),
+            "batches": {
+                "count": len(self.batch_sizes),
+                "mean_size": (
+                    round(sum(self.batch_sizes) / len(self.batch_sizes), 2)
+                    if self.batch_sizes else None
+                ),
+                "max_size": max(self.batch_sizes, default=None),
+            },
+            "bytes_read": int(self.counters.get("bytes_read", 0)),
+            "bytes_written": int(self.counters.get("bytes_written", 0)),
+        }
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Return the run as a Chrome trace event document."""
+        pid = os.getpid()
+        events: list[dict[str, Any]] = [
+            {"ph": "X", "cat": "stage", "pid": pid, **event} for event in self._events
+        ]
+        end_ts = ((self._finished or time.perf_counter()) - self._origin) * 1e6
+        events.append({
+            "name": "counters",
+            "ph": "C",
+            "ts": end_ts,
+            "pid": pid,
+            "args": dict(self.counters),
+        })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+
+    def write(self, path: str | Path, fmt: str = "json") -> None:
+        """Write the summary (``json``) or a Chrome trace (``chrome``) to path."""
+        if fmt not in ("json", "chrome"):
+            raise ValueError(f"Unknown profile format: {fmt}")
+        self.finish()
+        data = self.chrome_trace() if fmt == "chrome" else self.summary()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+NULL_PROFILER = Profiler(enabled=False)
+
+
+def count_tokens(text: str) -> int:
+    """Cheap whitespace token count used for tokens/sec estimates."""
+    return len(text.split())
@@ -1,59 +1,365 @@
 """Generic pickle serialization cache for storage."""
 
+import hashlib
+import json
+import os
 import pickle
+import shutil
+import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, BinaryIO, Callable, Optional
+
+import numpy as np
+
+from notes_tagger.models import CacheStats
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 2
+PICKLE_SUFFIX = ".pkl"
+NUMPY_SUFFIX = ".npy"
+ENTRY_SUFFIXES = (PICKLE_SUFFIX, NUMPY_SUFFIX)
+
+# The index is rewritten once this many changes (saves, deletes, LRU
+# touches) have accumulated, and on flush()/close().
+INDEX_WRITE_BATCH = 64
+
+
+def _legacy_key(key: str) -> str:
+    """The file stem older versions stored ``key`` under."""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+
+
+def _read_key(f: BinaryIO) -> Any:
+    """Read the key header an entry file starts with."""
+    return json.loads(f.readline())
 
 
 class PickleCache:
-    """Generic pickle-based cache for serializable objects."""
+    """Generic pickle-based cache for serializable objects.
+
+    Entries are stored in a two-level hashed directory layout
+    (``ab/cd/abcd....pkl``), each file starting with a one-line header
+    naming its key, and are tracked in least-recently-used order in a
+    small ``index.json``. When ``max_bytes`` is set, the oldest entries
+    are evicted until the cache fits the budget again; items larger than
+    the whole budget are not stored.
 
-    def __init__(self, cache_dir: str | Path):
+    The index is only bookkeeping: a lookup that misses it falls back to
+    the entry file (written by another instance, say), and a missing or
+    corrupt index is rebuilt from the directory. Call ``close()`` (or use
+    the cache as a context manager) to write pending index changes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        max_bytes: Optional[int] = None,
+        numpy_fast_path: bool = True,
+    ):
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative")
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.numpy_fast_path = numpy_fast_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index_path = self.cache_dir / INDEX_FILE
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._total_bytes = 0
+        self._changes = 0
+        self._removed: set[str] = set()
+        self._load_index()
+        self._migrate_legacy_files()
+        self._maybe_flush()
+
+    def __enter__(self) -> "PickleCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # ── index ──────────────────────────────────────────────────
+
+    def _read_index(self) -> list[dict]:
+        data = json.loads(self._index_path.read_text(encoding="utf-8"))
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported cache index version: {data.get('version')}")
+        return sorted(data["entries"], key=lambda e: e["atime"])
+
+    def _load_index(self) -> None:
+        try:
+            for entry in self._read_index():
+                self._put(entry)
+        except FileNotFoundError:
+            if any(self.cache_dir.glob("*/*/*")):
+                self._rebuild_index()
+        except (OSError, ValueError, KeyError, TypeError):
+            self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """Recreate the index from the entry files in the directory."""
+        self._entries.clear()
+        self._total_bytes = 0
+        found = []
+        for path in self.cache_dir.glob("*/*/*"):
+            entry = self._entry_from_file(path)
+            if entry is not None:
+                found.append(entry)
+        for entry in sorted(found, key=lambda e: e["atime"]):
+            self._put(entry)
+        self._changes += 1
+
+    def _entry_from_file(self, path: Path, key: Optional[str] = None) -> Optional[dict]:
+        """The index entry for an entry file (of ``key``), if it is one."""
+        if path.suffix not in ENTRY_SUFFIXES:
+            return None
+        try:
+            with open(path, "rb") as f:
+                stored = _read_key(f)
+            stat = path.stat()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(stored, str) or (key is not None and stored != key):
+            return None
+        if path != self._get_path(stored, path.suffix):
+            return None
+        return {
+            "key": stored,
+            "file": str(path.relative_to(self.cache_dir)),
+            "size": stat.st_size,
+            "atime": stat.st_mtime,
+        }
+
+    def _merge_index(self) -> None:
+        """Pick up entries other instances wrote to the index, drop ones they removed."""
+        try:
+            on_disk = {entry["key"]: entry for entry in self._read_index()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        for key in [k for k in self._entries if k not in on_disk]:
+            if not (self.cache_dir / self._entries[key]["file"]).exists():
+                self._drop(key)
+        adopted = [
+            entry
+            for key, entry in on_disk.items()
+            if key not in self._entries
+            and key not in self._removed
+            and (self.cache_dir / entry["file"]).exists()
+        ]
+        if adopted:
+            for entry in adopted:
+                self._put(entry)
+            self._entries = OrderedDict(
+                sorted(self._entries.items(), key=lambda item: item[1]["atime"])
+            )
+            self._evict()
+
+    def _maybe_flush(self) -> None:
+        if self._changes >= INDEX_WRITE_BATCH:
+            self.flush()
+
+    # ── entries ────────────────────────────────────────────────
+
+    def _migrate_legacy_files(self) -> None:
+        """Move flat ``<key>.pkl`` files from older versions into shards.
 
-    def _get_path(self, key: str) -> Path:
-        """Get the file path for a cache key."""
-        safe_key = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
-        return self.cache_dir / f"{safe_key}.pkl"
+        Their names were sanitized, so the original keys are unknown. Each
+        is filed under its sanitized name and, as in the old layout, served
+        read-only to any key that sanitizes to that name.
+        """
+        legacy = sorted(
+            self.cache_dir.glob(f"*{PICKLE_SUFFIX}"), key=lambda p: p.stat().st_mtime
+        )
+        for path in legacy:
+            with open(path, "rb") as src:
+                stored = self._store(path.stem, PICKLE_SUFFIX, lambda f: shutil.copyfileobj(src, f))
+            if stored:
+                self._entries[path.stem]["legacy"] = True
+            path.unlink()
+
+    def _get_path(self, key: str, suffix: str = PICKLE_SUFFIX) -> Path:
+        """Get the sharded file path for a cache key."""
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / digest[2:4] / f"{digest}{suffix}"
+
+    def _put(self, entry: dict) -> None:
+        self._drop(entry["key"])
+        self._entries[entry["key"]] = entry
+        self._total_bytes += entry["size"]
+
+    def _drop(self, key: str) -> Optional[dict]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+        return entry
+
+    def _store(self, key: str, suffix: str, write: Callable[[BinaryIO], None]) -> bool:
+        """Write and index the entry file for ``key``.
+
+        Returns False, storing nothing, if the file exceeds ``max_bytes``.
+        """
+        self._remove_entry(key)
+        path = self._get_path(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write((json.dumps(key) + "\n").encode("utf-8"))
+                write(f)
+            size = tmp_path.stat().st_size
+            if self.max_bytes is not None and size > self.max_bytes:
+                return False
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self._removed.discard(key)
+        self._put({
+            "key": key,
+            "file": str(path.relative_to(self.cache_dir)),
+            "size": size,
+            "atime": time.time(),
+        })
+        self._changes += 1
+        self._evict()
+        return True
+
+    def _remove_entry(self, key: str) -> bool:
+        removed = self._drop(key) is not None
+        for suffix in ENTRY_SUFFIXES:
+            try:
+                self._get_path(key, suffix).unlink()
+                removed = True
+            except FileNotFoundError:
+                pass
+        if removed:
+            self._removed.add(key)
+            self._changes += 1
+        return removed
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        """The entry for ``key``, from the index, its file, or a legacy file."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+        for suffix in ENTRY_SUFFIXES:
+            entry = self._entry_from_file(self._get_path(key, suffix), key)
+            if entry is not None:
+                self._put(entry)
+                self._changes += 1
+                return entry
+        alias = self._entries.get(_legacy_key(key))
+        if alias is not None and alias.get("legacy"):
+            return alias
+        return None
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the byte budget is met."""
+        if self.max_bytes is None:
+            return
+        while self._entries and self._total_bytes > self.max_bytes:
+            self._remove_entry(next(iter(self._entries)))
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of all cached files in bytes."""
+        return self._total_bytes
 
     def save(self, key: str, data: Any) -> None:
-        """Save data to cache."""
-        path = self._get_path(key)
-        with open(path, "wb") as f:
-            pickle.dump(data, f)
+        """Save data to cache, evicting old entries if over budget.
+
+        Data larger than ``max_bytes`` is skipped; an older entry for
+        ``key`` is dropped either way.
+        """
+        if self.numpy_fast_path and isinstance(data, np.ndarray) and data.dtype != object:
+            self._store(key, NUMPY_SUFFIX, lambda f: np.save(f, data, allow_pickle=False))
+        else:
+            self._store(
+                key, PICKLE_SUFFIX, lambda f: pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        self._maybe_flush()
 
     def load(self, key: str) -> Optional[Any]:
         """Load data from cache. Returns None if not found."""
-        path = self._get_path(key)
-        if not path.exists():
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
             return None
+        path = self.cache_dir / entry["file"]
         try:
             with open(path, "rb") as f:
-                return pickle.load(f)
+                if _read_key(f) != entry["key"]:
+                    raise ValueError(f"{path} does not hold {entry['key']!r}")
+                if path.suffix == NUMPY_SUFFIX:
+                    data = np.load(f, allow_pickle=False)
+                else:
+                    data = pickle.load(f)
         except Exception:
+            self._remove_entry(entry["key"])
+            self._maybe_flush()
+            self.misses += 1
             return None
+        self.hits += 1
+        self._entries.move_to_end(entry["key"])
+        entry["atime"] = time.time()
+        self._changes += 1
+        self._maybe_flush()
+        return data
 
     def exists(self, key: str) -> bool:
         """Check if a cache key exists."""
-        return self._get_path(key).exists()
+        return self._lookup(key) is not None
 
     def delete(self, key: str) -> bool:
         """Delete a cache entry. Returns True if deleted."""
-        path = self._get_path(key)
-        if path.exists():
-            path.unlink()
-            return True
-        return False
+        deleted = self._remove_entry(key)
+        self._maybe_flush()
+        return deleted
 
     def clear(self) -> int:
-        """Clear all cache files. Returns number of files deleted."""
+        """Clear all cache files. Returns number of entries deleted."""
         count = 0
-        for path in self.cache_dir.glob("*.pkl"):
-            path.unlink()
-            count += 1
+        for path in self.cache_dir.glob("*/*/*"):
+            if path.suffix in ENTRY_SUFFIXES:
+                path.unlink(missing_ok=True)
+                count += 1
+        self._entries.clear()
+        self._total_bytes = 0
+        self._changes += 1
+        self.flush()
         return count
 
     def list_keys(self) -> list[str]:
-        """List all cache keys."""
-        return [p.stem for p in self.cache_dir.glob("*.pkl")]
+        """List all cache keys, least recently used first."""
+        return list(self._entries)
+
+    def flush(self) -> None:
+        """Write pending changes to the index."""
+        if not self._changes:
+            return
+        self._merge_index()
+        data = {"version": INDEX_VERSION, "entries": list(self._entries.values())}
+        tmp_path = self._index_path.with_name(f"{INDEX_FILE}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self._index_path)
+        self._changes = 0
+        self._removed.clear()
+
+    def close(self) -> None:
+        """Write pending index changes."""
+        self.flush()
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss/eviction counters and current size."""
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            total_bytes=self._total_bytes,
+            max_bytes=self.max_bytes,
+        )
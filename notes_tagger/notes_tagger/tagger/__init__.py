@@ -1,5 +1,7 @@
 """Tagging engine and scoring logic."""
 
 from notes_tagger.tagger.engine import TaggingEngine
+from notes_tagger.tagger.batcher import BatchingTagger
+from notes_tagger.tagger.index import TopicIndex
 
-__all__ = ["TaggingEngine"]
+__all__ = ["TaggingEngine", "BatchingTagger", "TopicIndex"]
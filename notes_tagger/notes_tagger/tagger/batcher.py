@@ -0,0 +1,156 @@
+"""Micro-batching front-end for concurrent TaggingEngine callers."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from notes_tagger.models import TagResult
+from notes_tagger.tagger.engine import TaggingEngine
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ("text", "note_id", "note_title", "future")
+
+    def __init__(self, text: str, note_id: str, note_title: str):
+        self.text = text
+        self.note_id = note_id
+        self.note_title = note_title
+        self.future: Future[TagResult] = Future()
+
+
+class BatchingTagger:
+    """Coalesce concurrent tag requests into batched model calls.
+
+    Callers submit texts from any thread (or coroutine) and get futures
+    back. A single background thread waits for the first request, keeps
+    collecting for up to ``max_wait_ms`` or until ``max_batch_size``
+    requests are queued, runs one ``embed_batch`` and resolves every
+    future with its result. All model calls happen on that thread.
+
+    Usage:
+        with BatchingTagger(engine) as tagger:
+            result = tagger.tag("some text")
+    """
+
+    def __init__(
+        self,
+        engine: TaggingEngine,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.requests = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self) -> "BatchingTagger":
+        """Start the background batching thread."""
+        self.engine._ensure_initialized()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingTagger is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True, name="notes-tagger-batcher"
+                )
+                self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop accepting requests, finish queued ones and join the thread.
+
+        Requests are always queued before the stop marker, so every
+        submitted future is resolved before this returns.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self) -> "BatchingTagger":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def submit(self, text: str, note_id: str = "", note_title: str = "") -> Future:
+        """Queue a text for tagging and return a Future[TagResult]."""
+        request = _Request(text, note_id, note_title)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchingTagger is closed")
+            if self._thread is None:
+                raise RuntimeError("BatchingTagger not started. Call start() first.")
+            self._queue.put(request)
+        return request.future
+
+    def tag(
+        self,
+        text: str,
+        note_id: str = "",
+        note_title: str = "",
+        timeout: Optional[float] = None,
+    ) -> TagResult:
+        """Tag a text, blocking until its batch has been processed."""
+        return self.submit(text, note_id, note_title).result(timeout)
+
+    async def tag_async(self, text: str, note_id: str = "", note_title: str = "") -> TagResult:
+        """Tag a text from a coroutine without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(text, note_id, note_title))
+
+    def _collect(self, first: _Request) -> tuple[list[_Request], bool]:
+        """Gather requests until the batch is full or the wait window ends."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _process(self, batch: list[_Request]) -> None:
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        try:
+            embeddings = self.engine.embed_batch([r.text for r in batch])
+            for request, embedding in zip(batch, embeddings):
+                request.future.set_result(
+                    self.engine.score(embedding, request.note_id, request.note_title)
+                )
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopping = self._collect(item)
+            self._process(batch)
@@ -9,28 +9,32 @@ from notes_tagger.embeddings.cache import EmbeddingCache
 from notes_tagger.embeddings.model import EmbeddingModel
 from notes_tagger.exceptions import ModelNotInitializedError
 from notes_tagger.models import Config, Note, TagResult, TagScore
+from notes_tagger.tagger.index import TopicIndex
 from notes_tagger.tagger.scoring import cosine_similarity_matrix, rank_topics
 
 
 class TaggingEngine:
     """Main engine for tagging notes using semantic similarity."""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, model: Optional[EmbeddingModel] = None):
         self.config = config
-        self._model: Optional[EmbeddingModel] = None
+        self._model: Optional[EmbeddingModel] = model
         self._topic_embeddings: Optional[ndarray] = None
         self._topic_names: list[str] = list(config.topics.keys())
+        self._index: Optional[TopicIndex] = None
         self._cache = EmbeddingCache(config.cache_dir)
         self._initialized = False
 
     def initialize(self, force_reload: bool = False) -> None:
         """Load model and compute/cache topic embeddings."""
-        self._model = EmbeddingModel(self.config.model_name, self.config.device)
+        if self._model is None:
+            self._model = EmbeddingModel(self.config.model_name, self.config.device)
 
         if not force_reload:
             cached = self._cache.load(self._topic_names, self._model.model_name)
             if cached is not None:
                 self._topic_embeddings = cached
+                self._build_index()
                 self._initialized = True
                 return
 
@@ -42,8 +46,27 @@ class TaggingEngine:
             self._topic_names,
             self._model.model_name,
         )
+        self._build_index()
         self._initialized = True
 
+    def _use_index(self) -> bool:
+        mode = self.config.topic_index
+        if mode == "auto":
+            return len(self._topic_names) >= self.config.index_min_topics
+        return mode == "clustered"
+
+    def _build_index(self) -> None:
+        """Build the two-level topic index if the config asks for one."""
+        assert self._topic_embeddings is not None
+        self._index = None
+        if self._use_index():
+            self._index = TopicIndex.build(
+                self._topic_embeddings,
+                self._topic_names,
+                topic_parents=self.config.topic_parents,
+                num_clusters=self.config.index_clusters,
+            )
+
     def _ensure_initialized(self) -> None:
         if not self._initialized or self._model is None:
             raise ModelNotInitializedError(
@@ -56,12 +79,45 @@ class TaggingEngine:
         assert self._model is not None
         assert self._topic_embeddings is not None
 
-        embedding = self._model.embed(text)
-        similarities = cosine_similarity_matrix(embedding, self._topic_embeddings)
-        
+        return self.score(self.embed(text), note_id=note_id, note_title=note_title)
+
+    def embed(self, text: str) -> ndarray:
+        """Embed a note text with the engine's model."""
+        self._ensure_initialized()
+        assert self._model is not None
+        return self._model.embed(text)
+
+    def embed_batch(self, texts: list[str]) -> ndarray:
+        """Embed several note texts with the engine's model."""
+        self._ensure_initialized()
+        assert self._model is not None
+        return self._model.embed_batch(texts)
+
+    def score(
+        self,
+        embedding: ndarray,
+        note_id: str = "",
+        note_title: str = "",
+        exact: bool = False,
+    ) -> TagResult:
+        """Score a precomputed note embedding against the topics.
+
+        With a topic index only the topics of the closest clusters are
+        scored; pass ``exact=True`` to score every topic regardless.
+        """
+        self._ensure_initialized()
+        assert self._topic_embeddings is not None
+
+        if self._index is not None and not exact:
+            indices, similarities = self._index.search(embedding, self.config.index_probe)
+            names = [self._topic_names[i] for i in indices]
+        else:
+            similarities = cosine_similarity_matrix(embedding, self._topic_embeddings)
+            names = self._topic_names
+
         tags = rank_topics(
             similarities,
-            self._topic_names,
+            names,
             self.config.threshold,
             self.config.max_tags,
         )
@@ -86,17 +142,9 @@ class TaggingEngine:
         if titles is None:
             titles = ["" for _ in texts]
 
-        embeddings = self._model.embed_batch(texts)
+        embeddings = self.embed_batch(texts)
         
-        results = []
-        for i, embedding in enumerate(embeddings):
-            similarities = cosine_similarity_matrix(embedding, self._topic_embeddings)
-            tags = rank_topics(
-                similarities,
-                self._topic_names,
-                self.config.threshold,
-                self.config.max_tags,
-            )
-            results.append(TagResult(note_id=ids[i], note_title=titles[i], tags=tags))
-
-        return results
+        return [
+            self.score(embedding, note_id=ids[i], note_title=titles[i])
+            for i, embedding in enumerate(embeddings)
+        ]
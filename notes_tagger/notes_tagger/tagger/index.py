@@ -0,0 +1,119 @@
+"""Two-level topic index for scoring against large taxonomies."""
+
+import math
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+
+from notes_tagger.embeddings.utils import normalize_embedding, normalize_embeddings
+
+
+def spherical_kmeans(
+    vectors: ndarray,
+    num_clusters: int,
+    iterations: int = 10,
+    seed: int = 0,
+) -> ndarray:
+    """Cluster unit vectors by cosine similarity.
+
+    Returns:
+        Cluster assignment per vector (num_vectors,)
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = min(num_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), num_clusters, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+
+    for iteration in range(iterations):
+        new_assignment = np.argmax(vectors @ centroids.T, axis=1)
+        if iteration > 0 and np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = ~np.bincount(assignment, minlength=num_clusters).astype(bool)
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize_embeddings(sums)
+
+    return assignment
+
+
+class TopicIndex:
+    """Cluster centroids over topic embeddings.
+
+    A query is first compared to every centroid, then scored exhaustively
+    only against the topics of the ``probe`` closest clusters. With about
+    sqrt(N) clusters the work per query grows with sqrt(N) instead of N.
+    """
+
+    def __init__(self, topic_embeddings: ndarray, assignment: ndarray):
+        self.topic_embeddings = normalize_embeddings(np.asarray(topic_embeddings, dtype=np.float32))
+        labels = np.unique(assignment)
+        self.members: list[ndarray] = [np.flatnonzero(assignment == label) for label in labels]
+        self.centroids = normalize_embeddings(
+            np.vstack([self.topic_embeddings[m].sum(axis=0) for m in self.members])
+        )
+
+    @classmethod
+    def build(
+        cls,
+        topic_embeddings: ndarray,
+        topic_names: list[str],
+        topic_parents: Optional[dict[str, str]] = None,
+        num_clusters: Optional[int] = None,
+        seed: int = 0,
+    ) -> "TopicIndex":
+        """Group topics by parent if a hierarchy is given, else by k-means."""
+        if topic_parents:
+            groups: dict[str, int] = {}
+            assignment = np.array([
+                groups.setdefault(topic_parents.get(name, name), len(groups))
+                for name in topic_names
+            ])
+        else:
+            k = num_clusters or max(1, round(math.sqrt(len(topic_names))))
+            assignment = spherical_kmeans(
+                normalize_embeddings(np.asarray(topic_embeddings, dtype=np.float32)),
+                k,
+                seed=seed,
+            )
+        return cls(topic_embeddings, assignment)
+
+    @property
+    def num_clusters(self) -> int:
+        return len(self.members)
+
+    def search(self, query: ndarray, probe: int) -> tuple[ndarray, ndarray]:
+        """Score the query against topics of the top ``probe`` clusters.
+
+        Falls back to exact scoring over all topics when probing would
+        touch every cluster anyway.
+
+        Returns:
+            Tuple of (topic indices, cosine similarities)
+        """
+        query = normalize_embedding(np.asarray(query, dtype=np.float32))
+        if probe >= self.num_clusters:
+            return np.arange(len(self.topic_embeddings)), self.topic_embeddings @ query
+
+        centroid_scores = self.centroids @ query
+        top = np.argpartition(-centroid_scores, probe - 1)[:probe]
+        candidates = np.concatenate([self.members[c] for c in top])
+        return candidates, self.topic_embeddings[candidates] @ query
+
+    def exact_search(self, query: ndarray) -> tuple[ndarray, ndarray]:
+        """Score the query against every topic."""
+        return self.search(query, probe=self.num_clusters)
+
+    def recall(self, queries: ndarray, k: int, probe: int) -> float:
+        """Fraction of the exact top-k topics that the probed search also returns."""
+        found = 0
+        for query in queries:
+            exact_idx, exact_scores = self.exact_search(query)
+            approx_idx, approx_scores = self.search(query, probe)
+            exact_top = set(exact_idx[np.argsort(-exact_scores)[:k]].tolist())
+            approx_top = set(approx_idx[np.argsort(-approx_scores)[:k]].tolist())
+            found += len(exact_top & approx_top)
+        expected = len(queries) * min(k, len(self.topic_embeddings))
+        return found / expected if expected else 1.0
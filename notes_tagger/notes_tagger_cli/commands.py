@@ -10,7 +10,8 @@ from notes_tagger import TaggingEngine, DEFAULT_CONFIG, load_config, LinkingEngi
 from notes_tagger.embeddings import EmbeddingModel
 from notes_tagger.linker import EmbeddingStore
 from notes_tagger.linker.similarity import compute_similarity_scores, find_top_k_neighbors
-from notes_tagger.models import NoteLink
+from notes_tagger.models import Note, NoteLink
+from notes_tagger.profiling import NULL_PROFILER, Profiler, count_tokens
 from notes_tagger.storage import (
     parse_markdown_note,
     apply_tags_to_note,
@@ -23,6 +24,15 @@ from notes_tagger_cli.utils import find_markdown_files, format_tag_result
 DEFAULT_DB_PATH = ".notes_tagger/embeddings.db"
 
 
+def _count_notes(profiler: Profiler, files: list[Path], notes: list[Note]) -> None:
+    """Record bytes read, token and batch counters for an embedded note set."""
+    if not profiler.enabled:
+        return
+    profiler.count("bytes_read", sum(f.stat().st_size for f in files))
+    profiler.count("tokens", sum(count_tokens(f"{n.title}\n\n{n.body}") for n in notes))
+    profiler.record_batch(len(notes))
+
+
 def tag_directory(
     directory: Path,
     config_path: Optional[Path],
@@ -32,8 +42,10 @@ def tag_directory(
     dry_run: bool,
     verbose: bool,
     replace: bool,
+    profiler: Optional[Profiler] = None,
 ) -> None:
     """Tag all markdown files in a directory."""
+    profiler = profiler or NULL_PROFILER
     # Load config
     if config_path:
         config = load_config(str(config_path))
@@ -48,15 +60,18 @@ def tag_directory(
     
     # Initialize engine
     click.echo("Initializing tagging engine...")
-    engine = TaggingEngine(config)
-    engine.initialize()
+    with profiler.stage("model_load"):
+        engine = TaggingEngine(config)
+        engine.initialize()
     click.echo(f"Model loaded. Device: {engine._model.device}")
     click.echo(f"Topics: {list(config.topics.keys())}")
     click.echo(f"Threshold: {config.threshold}")
     click.echo("-" * 60)
     
     # Find and process files
-    files = list(find_markdown_files(directory, recursive, ignore_files=config.ignore_files))
+    with profiler.stage("walk"):
+        files = list(find_markdown_files(directory, recursive, ignore_files=config.ignore_files))
+    profiler.count("files", len(files))
     if not files:
         click.echo(f"No markdown files found in {directory}")
         return
@@ -64,26 +79,39 @@ def tag_directory(
     click.echo(f"Found {len(files)} markdown files")
     
     tagged_count = 0
-    for note_path in files:
-        try:
-            note = parse_markdown_note(note_path)
-            result = engine.tag_note(note)
-            
-            if verbose:
-                click.echo(format_tag_result(result, verbose=True))
-            
-            if result.tags and not dry_run:
-                tag_names = [tag.topic for tag in result.tags]
-                apply_tags_to_note(note_path, tag_names, replace=replace)
-                tagged_count += 1
-                if not verbose:
-                    click.echo(format_tag_result(result, verbose=False))
-            elif result.tags and dry_run:
-                tagged_count += 1
-                click.echo(f"  [dry-run] {format_tag_result(result, verbose=verbose)}")
+    with profiler.hot_section():
+        for note_path in files:
+            try:
+                with profiler.stage("parse"):
+                    note = parse_markdown_note(note_path)
+                text = f"{note.title}\n\n{note.body}"
+                with profiler.stage("embed"):
+                    embedding = engine.embed(text)
+                with profiler.stage("score"):
+                    result = engine.score(embedding, note_id=note.id, note_title=note.title)
+                if profiler.enabled:
+                    profiler.count("bytes_read", note_path.stat().st_size)
+                    profiler.count("tokens", count_tokens(text))
+                    profiler.record_batch(1)
+                
+                if verbose:
+                    click.echo(format_tag_result(result, verbose=True))
                 
-        except Exception as e:
-            click.echo(f"  Error processing {note_path.name}: {e}", err=True)
+                if result.tags and not dry_run:
+                    tag_names = [tag.topic for tag in result.tags]
+                    with profiler.stage("write"):
+                        apply_tags_to_note(note_path, tag_names, replace=replace)
+                    if profiler.enabled:
+                        profiler.count("bytes_written", note_path.stat().st_size)
+                    tagged_count += 1
+                    if not verbose:
+                        click.echo(format_tag_result(result, verbose=False))
+                elif result.tags and dry_run:
+                    tagged_count += 1
+                    click.echo(f"  [dry-run] {format_tag_result(result, verbose=verbose)}")
+                    
+            except Exception as e:
+                click.echo(f"  Error processing {note_path.name}: {e}", err=True)
     
     click.echo("-" * 60)
     action = "would tag" if dry_run else "tagged"
@@ -151,17 +179,19 @@ def link_directory(
     dry_run: bool,
     verbose: bool,
     sync: bool = False,
+    profiler: Optional[Profiler] = None,
 ) -> None:
     """Find similar notes and add [[wiki links]] to them."""
+    profiler = profiler or NULL_PROFILER
     if sync:
         _link_directory_sync(
             directory, threshold, max_links, require_shared_tag,
-            recursive, dry_run, verbose
+            recursive, dry_run, verbose, profiler
         )
     else:
         asyncio.run(_link_directory_async(
             directory, threshold, max_links, require_shared_tag,
-            recursive, dry_run, verbose
+            recursive, dry_run, verbose, profiler
         ))
 
 
@@ -173,6 +203,7 @@ async def _link_directory_async(
     recursive: bool,
     dry_run: bool,
     verbose: bool,
+    profiler: Profiler = NULL_PROFILER,
 ) -> None:
     """Async implementation of link_directory."""
     config = LinkConfig(
@@ -182,13 +213,16 @@ async def _link_directory_async(
     )
     
     click.echo("Initializing linking engine...")
-    engine = LinkingEngine(config)
-    engine.initialize()
+    with profiler.stage("model_load"):
+        engine = LinkingEngine(config)
+        engine.initialize()
     click.echo(f"Model loaded. Device: {engine._model.device}")
     click.echo(f"Threshold: {config.threshold}, Max links: {config.max_links}")
     click.echo("-" * 60)
     
-    files = list(find_markdown_files(directory, recursive))
+    with profiler.stage("walk"):
+        files = list(find_markdown_files(directory, recursive))
+    profiler.count("files", len(files))
     if not files:
         click.echo(f"No markdown files found in {directory}")
         return
@@ -196,11 +230,16 @@ async def _link_directory_async(
     click.echo(f"Found {len(files)} markdown files")
     click.echo("Embedding notes...")
     
-    notes = [parse_markdown_note(f) for f in files]
-    engine.embed_notes(notes)
-    
-    click.echo("Finding similar notes...")
-    results = engine.link_all()
+    with profiler.hot_section():
+        with profiler.stage("parse"):
+            notes = [parse_markdown_note(f) for f in files]
+        with profiler.stage("embed"):
+            engine.embed_notes(notes)
+        _count_notes(profiler, files, notes)
+        
+        click.echo("Finding similar notes...")
+        with profiler.stage("link"):
+            results = engine.link_all()
     
     tasks = []
     to_link = []
@@ -225,7 +264,10 @@ async def _link_directory_async(
                 click.echo(f"[dry-run] {note_title}: {', '.join(link_titles)}")
     
     if tasks:
-        await asyncio.gather(*tasks)
+        with profiler.stage("write"):
+            await asyncio.gather(*tasks)
+        if profiler.enabled:
+            profiler.count("bytes_written", sum(Path(r.note_id).stat().st_size for r in results if r.links))
         if not verbose:
             for note_title, links in to_link:
                 link_titles = [f"[[{l.to_title}]]" for l in links]
@@ -244,18 +286,23 @@ def analyze_directory(
     device: Optional[str],
     recursive: bool,
     verbose: bool,
+    profiler: Optional[Profiler] = None,
 ) -> None:
     """Analyze notes and store embeddings in SQLite database."""
     from notes_tagger.models import ModelType
     
+    profiler = profiler or NULL_PROFILER
     resolved_db = db_path or (directory / DEFAULT_DB_PATH)
     
     click.echo("Initializing embedding model...")
-    model = EmbeddingModel(model_name, device)
+    with profiler.stage("model_load"):
+        model = EmbeddingModel(model_name, device)
     click.echo(f"Model loaded: {model.model_name}, Device: {model.device}")
     click.echo("-" * 60)
     
-    files = list(find_markdown_files(directory, recursive))
+    with profiler.stage("walk"):
+        files = list(find_markdown_files(directory, recursive))
+    profiler.count("files", len(files))
     if not files:
         click.echo(f"No markdown files found in {directory}")
         return
@@ -263,20 +310,26 @@ def analyze_directory(
     click.echo(f"Found {len(files)} markdown files")
     click.echo("Parsing and embedding notes...")
     
-    notes_data = []
-    texts = []
-    for f in files:
-        note = parse_markdown_note(f)
-        notes_data.append((note.id, note.title, note.tags or []))
-        texts.append(f"{note.title}\n\n{note.body}")
-    
-    embeddings = model.embed_batch(texts)
-    
-    click.echo(f"Storing embeddings in {resolved_db}...")
-    with EmbeddingStore(resolved_db) as store:
-        store.clear()
-        store.upsert_notes_batch(notes_data, embeddings, model.model_name)
-        store.set_metadata("source_directory", str(directory.resolve()))
+    with profiler.hot_section():
+        notes = []
+        with profiler.stage("parse"):
+            for f in files:
+                notes.append(parse_markdown_note(f))
+        notes_data = [(note.id, note.title, note.tags or []) for note in notes]
+        texts = [f"{note.title}\n\n{note.body}" for note in notes]
+        
+        with profiler.stage("embed"):
+            embeddings = model.embed_batch(texts)
+        _count_notes(profiler, files, notes)
+        
+        click.echo(f"Storing embeddings in {resolved_db}...")
+        with profiler.stage("store"):
+            with EmbeddingStore(resolved_db) as store:
+                store.clear()
+                store.upsert_notes_batch(notes_data, embeddings, model.model_name)
+                store.set_metadata("source_directory", str(directory.resolve()))
+    if profiler.enabled:
+        profiler.count("bytes_written", resolved_db.stat().st_size)
     
     click.echo("-" * 60)
     click.echo(f"Done! Analyzed {len(files)} notes, embeddings stored in {resolved_db}")
@@ -290,8 +343,10 @@ def link_from_store(
     require_shared_tag: bool,
     dry_run: bool,
     verbose: bool,
+    profiler: Optional[Profiler] = None,
 ) -> None:
     """Find similar notes from SQLite store and apply backlinks."""
+    profiler = profiler or NULL_PROFILER
     resolved_db = db_path or (directory / DEFAULT_DB_PATH)
     
     if not resolved_db.exists():
@@ -301,83 +356,92 @@ def link_from_store(
     
     click.echo(f"Loading embeddings from {resolved_db}...")
     
-    with EmbeddingStore(resolved_db) as store:
-        note_ids, embeddings = store.get_all_embeddings()
-        
-        if len(note_ids) == 0:
-            click.echo("No embeddings found in database.")
-            return
-        
-        click.echo(f"Loaded {len(note_ids)} note embeddings")
-        click.echo(f"Threshold: {threshold}, Max links: {max_links}")
-        click.echo("-" * 60)
-        
-        id_to_idx = {nid: i for i, nid in enumerate(note_ids)}
-        note_metadata = {nid: store.get_note_metadata(nid) for nid in note_ids}
+    with profiler.stage("load"):
+        with EmbeddingStore(resolved_db) as store:
+            note_ids, embeddings = store.get_all_embeddings()
+            
+            if len(note_ids) == 0:
+                click.echo("No embeddings found in database.")
+                return
+            
+            click.echo(f"Loaded {len(note_ids)} note embeddings")
+            click.echo(f"Threshold: {threshold}, Max links: {max_links}")
+            click.echo("-" * 60)
+            
+            id_to_idx = {nid: i for i, nid in enumerate(note_ids)}
+            note_metadata = {nid: store.get_note_metadata(nid) for nid in note_ids}
+    profiler.count("files", len(note_ids))
+    if profiler.enabled:
+        profiler.count("bytes_read", resolved_db.stat().st_size)
     
     click.echo("Finding similar notes...")
     linked_count = 0
     
-    for i, note_id in enumerate(note_ids):
-        note_path = Path(note_id)
-        if not note_path.exists():
-            if verbose:
-                click.echo(f"Skipping {note_id}: file not found")
-            continue
-        
-        scores = compute_similarity_scores(embeddings, i)
-        neighbors = find_top_k_neighbors(
-            scores,
-            exclude_idx=i,
-            threshold=threshold,
-            max_results=max_links,
-        )
-        
-        source_meta = note_metadata.get(note_id)
-        source_tags = set(source_meta[1]) if source_meta else set()
-        
-        links = []
-        for idx, score in neighbors:
-            target_id = note_ids[idx]
-            target_meta = note_metadata.get(target_id)
-            if not target_meta:
+    with profiler.hot_section():
+        for i, note_id in enumerate(note_ids):
+            note_path = Path(note_id)
+            if not note_path.exists():
+                if verbose:
+                    click.echo(f"Skipping {note_id}: file not found")
                 continue
             
-            target_title, target_tags = target_meta
-            shared_tags = sorted(source_tags & set(target_tags))
+            with profiler.stage("link"):
+                scores = compute_similarity_scores(embeddings, i)
+                neighbors = find_top_k_neighbors(
+                    scores,
+                    exclude_idx=i,
+                    threshold=threshold,
+                    max_results=max_links,
+                )
+            
+            source_meta = note_metadata.get(note_id)
+            source_tags = set(source_meta[1]) if source_meta else set()
             
-            if require_shared_tag and not shared_tags:
+            links = []
+            for idx, score in neighbors:
+                target_id = note_ids[idx]
+                target_meta = note_metadata.get(target_id)
+                if not target_meta:
+                    continue
+                
+                target_title, target_tags = target_meta
+                shared_tags = sorted(source_tags & set(target_tags))
+                
+                if require_shared_tag and not shared_tags:
+                    continue
+                
+                links.append(NoteLink(
+                    from_id=note_id,
+                    to_id=target_id,
+                    to_title=target_title,
+                    similarity=score,
+                    shared_tags=shared_tags,
+                ))
+            
+            if not links:
                 continue
             
-            links.append(NoteLink(
-                from_id=note_id,
-                to_id=target_id,
-                to_title=target_title,
-                similarity=score,
-                shared_tags=shared_tags,
-            ))
-        
-        if not links:
-            continue
-        
-        note_title = note_path.stem
-        
-        if verbose:
-            click.echo(f"\n{note_title}:")
-            for link in links:
-                click.echo(f"  → [[{link.to_title}]] ({link.similarity:.3f})")
-        
-        if not dry_run:
-            apply_backlinks_to_note(note_path, links)
-            linked_count += 1
-            if not verbose:
-                link_titles = [f"[[{l.to_title}]]" for l in links]
-                click.echo(f"{note_title}: {', '.join(link_titles)}")
-        else:
-            linked_count += 1
-            if not verbose:
-                link_titles = [f"[[{l.to_title}]]" for l in links]
-                click.echo(f"[dry-run] {note_title}: {', '.join(link_titles)}")
+            note_title = note_path.stem
+            
+            if verbose:
+                click.echo(f"\n{note_title}:")
+                for link in links:
+                    click.echo(f"  → [[{link.to_title}]] ({link.similarity:.3f})")
+            
+            if not dry_run:
+                with profiler.stage("write"):
+                    apply_backlinks_to_note(note_path, links)
+                if profiler.enabled:
+                    profiler.count("bytes_written", note_path.stat().st_size)
+                linked_count += 1
+                if not verbose:
+                    link_titles = [f"[[{l.to_title}]]" for l in links]
+                    click.echo(f"{note_title}: {', '.join(link_titles)}")
+            else:
+                linked_count += 1
+                if not verbose:
+                    link_titles = [f"[[{l.to_title}]]" for l in links]
+                    click.echo(f"[dry-run] {note_title}: {', '.join(link_titles)}")
     
     click.echo("-" * 60)
     action = "would link" if dry_run else "linked"
@@ -392,6 +456,7 @@ def _link_directory_sync(
     recursive: bool,
     dry_run: bool,
     verbose: bool,
+    profiler: Profiler = NULL_PROFILER,
 ) -> None:
     """Sync implementation of link_directory."""
     config = LinkConfig(
@@ -401,13 +466,16 @@ def _link_directory_sync(
     )
     
     click.echo("Initializing linking engine...")
-    engine = LinkingEngine(config)
-    engine.initialize()
+    with profiler.stage("model_load"):
+        engine = LinkingEngine(config)
+        engine.initialize()
     click.echo(f"Model loaded. Device: {engine._model.device}")
     click.echo(f"Threshold: {config.threshold}, Max links: {config.max_links}")
     click.echo("-" * 60)
     
-    files = list(find_markdown_files(directory, recursive))
+    with profiler.stage("walk"):
+        files = list(find_markdown_files(directory, recursive))
+    profiler.count("files", len(files))
     if not files:
         click.echo(f"No markdown files found in {directory}")
         return
@@ -415,11 +483,16 @@ def _link_directory_sync(
     click.echo(f"Found {len(files)} markdown files")
     click.echo("Embedding notes...")
     
-    notes = [parse_markdown_note(f) for f in files]
-    engine.embed_notes(notes)
-    
-    click.echo("Finding similar notes...")
-    results = engine.link_all()
+    with profiler.hot_section():
+        with profiler.stage("parse"):
+            notes = [parse_markdown_note(f) for f in files]
+        with profiler.stage("embed"):
+            engine.embed_notes(notes)
+        _count_notes(profiler, files, notes)
+        
+        click.echo("Finding similar notes...")
+        with profiler.stage("link"):
+            results = engine.link_all()
     
     linked_count = 0
     for result in results:
@@ -435,7 +508,10 @@ def _link_directory_sync(
                 click.echo(f"  → [[{link.to_title}]] ({link.similarity:.3f})")
         
         if not dry_run:
-            apply_backlinks_to_note(note_path, result.links)
+            with profiler.stage("write"):
+                apply_backlinks_to_note(note_path, result.links)
+            if profiler.enabled:
+                profiler.count("bytes_written", note_path.stat().st_size)
             linked_count += 1
             if not verbose:
                 link_titles = [f"[[{l.to_title}]]" for l in result.links]
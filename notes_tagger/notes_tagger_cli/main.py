@@ -1,10 +1,13 @@
 """CLI entry point for notes tagger."""
 
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 import click
 
+from notes_tagger.profiling import Profiler
+
 from notes_tagger_cli.commands import (
     tag_directory,
     tag_single_file,
@@ -14,6 +17,46 @@ from notes_tagger_cli.commands import (
 )
 
 
+def profile_options(func: Callable) -> Callable:
+    """Add --profile, --profile-format and --cprofile options to a command."""
+    func = click.option(
+        "--cprofile",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="Dump cProfile stats of the hot section to this file",
+    )(func)
+    func = click.option(
+        "--profile-format",
+        type=click.Choice(["json", "chrome"]),
+        default="json",
+        help="Profile output: JSON summary or Chrome trace (default: json)",
+    )(func)
+    func = click.option(
+        "--profile",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="Write per-stage timings and counters to this file",
+    )(func)
+    return func
+
+
+@contextmanager
+def profiling(
+    profile: Optional[Path],
+    profile_format: str,
+    cprofile: Optional[Path],
+) -> Iterator[Optional[Profiler]]:
+    """Yield a Profiler if profiling was requested and write it on exit."""
+    if profile is None and cprofile is None:
+        yield None
+        return
+    profiler = Profiler(cprofile_path=cprofile)
+    try:
+        yield profiler
+    finally:
+        if profile is not None:
+            profiler.write(profile, fmt=profile_format)
+            click.echo(f"Profile written to {profile}")
+
+
 @click.group()
 @click.version_option(version="0.1.0", prog_name="notes-tagger")
 def cli() -> None:
@@ -58,6 +101,7 @@ def cli() -> None:
     default=False,
     help="Replace existing tags (default: append)",
 )
+@profile_options
 def tag(
     path: Path,
     config: Optional[Path],
@@ -67,6 +111,9 @@ def tag(
     dry_run: bool,
     verbose: bool,
     replace: bool,
+    profile: Optional[Path],
+    profile_format: str,
+    cprofile: Optional[Path],
 ) -> None:
     """Tag markdown notes with semantic topics.
     
@@ -81,6 +128,8 @@ def tag(
         notes-tagger tag ./notes --dry-run --verbose
         
         notes-tagger tag note.md --replace
+        
+        notes-tagger tag ./notes --profile profile.json
     """
     if path.is_file():
         tag_single_file(
@@ -93,16 +142,18 @@ def tag(
             replace=replace,
         )
     elif path.is_dir():
-        tag_directory(
-            directory=path,
-            config_path=config,
-            threshold=threshold,
-            max_tags=max_tags,
-            recursive=recursive,
-            dry_run=dry_run,
-            verbose=verbose,
-            replace=replace,
-        )
+        with profiling(profile, profile_format, cprofile) as profiler:
+            tag_directory(
+                directory=path,
+                config_path=config,
+                threshold=threshold,
+                max_tags=max_tags,
+                recursive=recursive,
+                dry_run=dry_run,
+                verbose=verbose,
+                replace=replace,
+                profiler=profiler,
+            )
     else:
         raise click.BadParameter(f"{path} is not a file or directory")
 
@@ -157,6 +208,7 @@ def topics() -> None:
     is_flag=True,
     help="Use synchronous file writes instead of async",
 )
+@profile_options
 def link(
     path: Path,
     threshold: float,
@@ -166,6 +218,9 @@ def link(
     dry_run: bool,
     verbose: bool,
     sync: bool,
+    profile: Optional[Path],
+    profile_format: str,
+    cprofile: Optional[Path],
 ) -> None:
     """Add [[wiki links]] to semantically similar notes.
     
@@ -182,16 +237,18 @@ def link(
     if not path.is_dir():
         raise click.BadParameter(f"{path} must be a directory")
     
-    link_directory(
-        directory=path,
-        threshold=threshold,
-        max_links=max_links,
-        require_shared_tag=require_shared_tag,
-        recursive=recursive,
-        dry_run=dry_run,
-        verbose=verbose,
-        sync=sync,
-    )
+    with profiling(profile, profile_format, cprofile) as profiler:
+        link_directory(
+            directory=path,
+            threshold=threshold,
+            max_links=max_links,
+            require_shared_tag=require_shared_tag,
+            recursive=recursive,
+            dry_run=dry_run,
+            verbose=verbose,
+            sync=sync,
+            profiler=profiler,
+        )
 
 
 @cli.command()
@@ -222,6 +279,7 @@ def link(
     is_flag=True,
     help="Show detailed output",
 )
+@profile_options
 def analyze(
     path: Path,
     db: Optional[Path],
@@ -229,6 +287,9 @@ def analyze(
     device: Optional[str],
     recursive: bool,
     verbose: bool,
+    profile: Optional[Path],
+    profile_format: str,
+    cprofile: Optional[Path],
 ) -> None:
     """Analyze notes and store embeddings in SQLite database.
     
@@ -247,14 +308,16 @@ def analyze(
     if not path.is_dir():
         raise click.BadParameter(f"{path} must be a directory")
     
-    analyze_directory(
-        directory=path,
-        db_path=db,
-        model_name=model,
-        device=device,
-        recursive=recursive,
-        verbose=verbose,
-    )
+    with profiling(profile, profile_format, cprofile) as profiler:
+        analyze_directory(
+            directory=path,
+            db_path=db,
+            model_name=model,
+            device=device,
+            recursive=recursive,
+            verbose=verbose,
+            profiler=profiler,
+        )
 
 
 @cli.command("link-db")
@@ -291,6 +354,7 @@ def analyze(
     is_flag=True,
     help="Show detailed output with similarity scores",
 )
+@profile_options
 def link_db(
     path: Path,
     db: Optional[Path],
@@ -299,6 +363,9 @@ def link_db(
     require_shared_tag: bool,
     dry_run: bool,
     verbose: bool,
+    profile: Optional[Path],
+    profile_format: str,
+    cprofile: Optional[Path],
 ) -> None:
     """Add [[wiki links]] using pre-computed embeddings from SQLite.
     
@@ -315,15 +382,17 @@ def link_db(
     if not path.is_dir():
         raise click.BadParameter(f"{path} must be a directory")
     
-    link_from_store(
-        directory=path,
-        db_path=db,
-        threshold=threshold,
-        max_links=max_links,
-        require_shared_tag=require_shared_tag,
-        dry_run=dry_run,
-        verbose=verbose,
-    )
+    with profiling(profile, profile_format, cprofile) as profiler:
+        link_from_store(
+            directory=path,
+            db_path=db,
+            threshold=threshold,
+            max_links=max_links,
+            require_shared_tag=require_shared_tag,
+            dry_run=dry_run,
+            verbose=verbose,
+            profiler=profiler,
+        )
 
 
 if __name__ == "__main__":
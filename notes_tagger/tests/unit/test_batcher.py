@@ -0,0 +1,100 @@
+"""Unit tests for the micro-batching tagger."""
+
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from notes_tagger.config import DEFAULT_CONFIG
+from notes_tagger.embeddings.hashing import HashingEmbeddingModel
+from notes_tagger.exceptions import ModelNotInitializedError
+from notes_tagger.tagger.batcher import BatchingTagger
+from notes_tagger.tagger.engine import TaggingEngine
+
+TEXTS = [
+    "Reviewed the quarterly budget and revenue forecast",
+    "Team meeting with action items and decisions",
+    "Goroutines, channels and mutexes for concurrency",
+    "Training neural networks with transformers",
+] * 8
+
+
+class RecordingModel(HashingEmbeddingModel):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes: list[int] = []
+
+    def embed_batch(self, texts, batch_size=32):
+        self.batch_sizes.append(len(texts))
+        return super().embed_batch(texts, batch_size)
+
+
+@pytest.fixture
+def engine():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = DEFAULT_CONFIG.model_copy(update={"cache_dir": tmpdir})
+        eng = TaggingEngine(config, model=RecordingModel())
+        eng.initialize()
+        yield eng
+
+
+class TestBatchingTagger:
+    def test_matches_engine_results(self, engine):
+        expected = [engine.tag(t).tags for t in TEXTS]
+
+        with BatchingTagger(engine) as tagger, ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(tagger.tag, TEXTS))
+
+        assert [r.tags for r in results] == expected
+
+    def test_coalesces_concurrent_requests(self, engine):
+        engine._model.batch_sizes.clear()
+        barrier = threading.Barrier(16)
+
+        def call(text):
+            barrier.wait()
+            return tagger.tag(text)
+
+        with BatchingTagger(engine, max_batch_size=8, max_wait_ms=50) as tagger:
+            with ThreadPoolExecutor(16) as pool:
+                list(pool.map(call, TEXTS[:16]))
+
+        assert sum(engine._model.batch_sizes) == 16
+        assert max(engine._model.batch_sizes) > 1
+        assert max(engine._model.batch_sizes) <= 8
+        assert tagger.requests == 16
+
+    def test_async_front_end(self, engine):
+        async def run(tagger):
+            return await asyncio.gather(*(tagger.tag_async(t, note_id=str(i)) for i, t in enumerate(TEXTS)))
+
+        with BatchingTagger(engine) as tagger:
+            results = asyncio.run(run(tagger))
+
+        assert [r.note_id for r in results] == [str(i) for i in range(len(TEXTS))]
+
+    def test_close_resolves_pending_and_rejects_new(self, engine):
+        tagger = BatchingTagger(engine, max_wait_ms=100).start()
+        futures = [tagger.submit(t) for t in TEXTS[:4]]
+        tagger.close()
+
+        assert all(f.done() for f in futures)
+        with pytest.raises(RuntimeError):
+            tagger.submit("late")
+
+    def test_model_errors_propagate(self, engine):
+        def fail(texts, batch_size=32):
+            raise ValueError("boom")
+
+        engine._model.embed_batch = fail
+        with BatchingTagger(engine) as tagger:
+            with pytest.raises(ValueError):
+                tagger.tag("anything")
+
+    def test_requires_initialized_engine(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = DEFAULT_CONFIG.model_copy(update={"cache_dir": tmpdir})
+            with pytest.raises(ModelNotInitializedError):
+                BatchingTagger(TaggingEngine(config)).start()
@@ -0,0 +1,56 @@
+"""Unit tests for the benchmark suite."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from benchmarks.run import main, run_benchmark
+from benchmarks.vault import VaultSpec, generate_vault
+from notes_tagger.embeddings.hashing import HashingEmbeddingModel
+from notes_tagger.storage.obsidian import parse_markdown_note
+
+
+class TestGenerateVault:
+    def test_generates_requested_notes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = generate_vault(Path(tmpdir), VaultSpec(num_notes=20, mean_words=50))
+
+            assert len(paths) == 20
+            assert all(p.exists() for p in paths)
+            assert all(parse_markdown_note(p).body for p in paths)
+
+    def test_seed_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            spec = VaultSpec(num_notes=5, mean_words=40, seed=3)
+            paths_a = generate_vault(Path(a), spec)
+            paths_b = generate_vault(Path(b), spec)
+
+            assert [p.read_text() for p in paths_a] == [p.read_text() for p in paths_b]
+
+
+class TestRunBenchmark:
+    def test_reports_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_vault(Path(tmpdir), VaultSpec(num_notes=10, mean_words=40))
+
+            results = run_benchmark(Path(tmpdir), HashingEmbeddingModel())
+
+            assert results["num_notes"] == 10
+            assert set(results["stages"]) == {
+                "walk", "parse", "embed", "score", "link", "write_back",
+            }
+            assert results["stages"]["embed"]["items"] == 10
+
+    def test_existing_vault_is_benchmarked_on_a_copy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = generate_vault(Path(tmpdir), VaultSpec(num_notes=5, mean_words=40))
+            before = [p.read_text() for p in paths]
+
+            result = CliRunner().invoke(main, ["--vault", tmpdir])
+
+            assert result.exit_code == 0, result.output
+            assert json.loads(result.output)["stages"]["write_back"]["items"] == 5
+            assert [p.read_text() for p in paths] == before
+            assert sorted(p for p in Path(tmpdir).rglob("*") if p.is_file()) == sorted(paths)
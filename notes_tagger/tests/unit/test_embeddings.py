@@ -7,6 +7,7 @@ import numpy as np
 import pytest
 
 from notes_tagger.embeddings.cache import EmbeddingCache
+from notes_tagger.embeddings.hashing import HashingEmbeddingModel
 from notes_tagger.embeddings.utils import (
     average_embeddings,
     chunk_texts,
@@ -134,3 +135,26 @@ class TestEmbeddingCache:
             
             assert not cache.embeddings_file.exists()
             assert not cache.metadata_file.exists()
+
+
+class TestHashingEmbeddingModel:
+    def test_deterministic(self):
+        model = HashingEmbeddingModel(embedding_dim=64)
+        np.testing.assert_array_equal(model.embed("budget review"), model.embed("budget review"))
+
+    def test_batch_shape_and_normalized(self):
+        model = HashingEmbeddingModel(embedding_dim=64)
+        embeddings = model.embed_batch(["one text", "another text", "third"])
+
+        assert embeddings.shape == (3, 64)
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-5)
+
+    def test_shared_words_are_similar(self):
+        model = HashingEmbeddingModel()
+        a, b, c = model.embed_batch([
+            "quarterly budget revenue forecast",
+            "budget revenue forecast for the quarter",
+            "goroutines channels mutexes",
+        ])
+
+        assert a @ b > a @ c
@@ -90,6 +90,19 @@ class TestConfig:
         with pytest.raises(ValidationError):
             Config(topics={"test": "desc"}, threshold=1.5)
 
+    def test_config_topic_parents(self):
+        config = Config(
+            topics={"go": "golang", "rust": "rust lang", "programming": "code"},
+            topic_parents={"go": "programming", "rust": "programming"},
+            topic_index="clustered",
+        )
+        assert config.topic_parents["go"] == "programming"
+        assert config.topic_index == "clustered"
+
+    def test_config_topic_parents_unknown_topic(self):
+        with pytest.raises(ValidationError):
+            Config(topics={"go": "golang"}, topic_parents={"zig": "programming"})
+
 
 class TestEmbeddingMetadata:
     def test_embedding_metadata(self):
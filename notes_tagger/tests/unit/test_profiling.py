@@ -0,0 +1,78 @@
+"""Unit tests for the profiling module."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from notes_tagger.profiling import NULL_PROFILER, Profiler, count_tokens
+
+
+class TestProfiler:
+    def test_stage_accumulates_calls(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.stage("parse"):
+                pass
+
+        stages = profiler.summary()["stages"]
+
+        assert stages["parse"]["calls"] == 3
+        assert stages["parse"]["seconds"] >= 0
+
+    def test_counters_and_derived_rates(self):
+        profiler = Profiler()
+        with profiler.stage("embed"):
+            profiler.count("tokens", 100)
+        profiler.count("files", 4)
+        profiler.record_batch(2)
+        profiler.record_batch(4)
+
+        summary = profiler.summary()
+
+        assert summary["counters"]["files"] == 4
+        assert summary["batches"] == {"count": 2, "mean_size": 3.0, "max_size": 4}
+        assert summary["tokens_per_sec"] > 0
+
+    def test_disabled_profiler_records_nothing(self):
+        with NULL_PROFILER.stage("parse"):
+            NULL_PROFILER.count("files")
+
+        assert NULL_PROFILER.summary()["stages"] == {}
+        assert NULL_PROFILER.counters == {}
+
+    def test_write_json_and_chrome(self):
+        profiler = Profiler()
+        with profiler.stage("walk"):
+            profiler.count("files", 2)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = Path(tmpdir) / "profile.json"
+            trace_path = Path(tmpdir) / "trace.json"
+            profiler.write(json_path)
+            profiler.write(trace_path, fmt="chrome")
+
+            summary = json.loads(json_path.read_text())
+            trace = json.loads(trace_path.read_text())
+
+        assert summary["counters"]["files"] == 2
+        assert trace["traceEvents"][0]["name"] == "walk"
+        assert trace["traceEvents"][0]["ph"] == "X"
+
+    def test_write_rejects_unknown_format(self):
+        with pytest.raises(ValueError):
+            Profiler().write("unused.json", fmt="xml")
+
+    def test_hot_section_dumps_cprofile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump = Path(tmpdir) / "hot.prof"
+            profiler = Profiler(cprofile_path=dump)
+            with profiler.hot_section():
+                sum(range(1000))
+
+            assert dump.exists()
+
+
+def test_count_tokens():
+    assert count_tokens("one two  three\nfour") == 4
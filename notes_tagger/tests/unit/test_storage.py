@@ -1,9 +1,11 @@
 """Unit tests for storage module."""
 
 import json
+import pickle
 import tempfile
 from pathlib import Path
 
+import numpy as np
 import pytest
 import yaml
 
@@ -79,6 +81,145 @@ class TestPickleCache:
             
             assert set(keys) == {"key1", "key2"}
 
+    def test_keys_are_sharded(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir)
+            cache.save("some/odd key", 1)
+
+            files = [p for p in Path(tmpdir).rglob("*.pkl")]
+
+            assert len(files) == 1
+            assert len(files[0].relative_to(tmpdir).parts) == 3
+            assert cache.list_keys() == ["some/odd key"]
+
+    def test_lru_eviction(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir)
+            cache.save("probe", b"x" * 100)
+            entry_size = cache.total_bytes
+            cache.clear()
+
+            cache = PickleCache(tmpdir, max_bytes=entry_size * 2)
+            cache.save("a", b"a" * 100)
+            cache.save("b", b"b" * 100)
+            cache.load("a")
+            cache.save("c", b"c" * 100)
+
+            assert set(cache.list_keys()) == {"a", "c"}
+            assert cache.stats().evictions == 1
+            assert cache.total_bytes <= entry_size * 2
+
+    def test_index_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir)
+            cache.save("a", 1)
+            cache.save("b", 2)
+            cache.load("a")
+            cache.flush()
+
+            reopened = PickleCache(tmpdir)
+
+            assert reopened.list_keys() == ["b", "a"]
+            assert reopened.load("b") == 2
+
+    def test_stats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir)
+            cache.save("a", 1)
+            cache.load("a")
+            cache.load("missing")
+
+            stats = cache.stats()
+
+            assert stats.hits == 1
+            assert stats.misses == 1
+            assert stats.entries == 1
+            assert stats.hit_rate == 0.5
+
+    def test_numpy_fast_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir)
+            arr = np.arange(12, dtype=np.float32).reshape(3, 4)
+            cache.save("arr", arr)
+
+            assert len(list(Path(tmpdir).rglob("*.npy"))) == 1
+            np.testing.assert_array_equal(cache.load("arr"), arr)
+
+    def test_adopts_legacy_flat_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(Path(tmpdir) / "old_key.pkl", "wb") as f:
+                pickle.dump({"legacy": True}, f)
+
+            cache = PickleCache(tmpdir)
+
+            assert cache.load("old_key") == {"legacy": True}
+            assert not (Path(tmpdir) / "old_key.pkl").exists()
+
+    def test_legacy_file_is_served_to_keys_with_its_sanitized_name(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(Path(tmpdir) / "my_key.pkl", "wb") as f:
+                pickle.dump("legacy", f)
+
+            cache = PickleCache(tmpdir)
+
+            assert cache.load("my.key") == "legacy"
+            assert cache.load("my_key") == "legacy"
+            cache.save("my.key", "new")
+            assert cache.load("my.key") == "new"
+            assert cache.load("my_key") == "legacy"
+
+    def test_corrupt_index_is_rebuilt_from_the_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with PickleCache(tmpdir) as cache:
+                cache.save("a", 1)
+                cache.save("b", np.arange(3))
+            (Path(tmpdir) / "index.json").write_text("{not json")
+
+            reopened = PickleCache(tmpdir)
+
+            assert sorted(reopened.list_keys()) == ["a", "b"]
+            assert reopened.total_bytes == cache.total_bytes
+            assert reopened.load("a") == 1
+            np.testing.assert_array_equal(reopened.load("b"), np.arange(3))
+
+    def test_entries_missing_from_the_index_are_found_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            PickleCache(tmpdir).save("a", 1)
+
+            assert PickleCache(tmpdir).load("a") == 1
+
+    def test_item_larger_than_the_budget_is_skipped(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = PickleCache(tmpdir, max_bytes=200)
+            cache.save("small", b"s" * 10)
+            cache.save("big", b"b" * 1000)
+
+            assert cache.list_keys() == ["small"]
+            assert cache.load("big") is None
+            assert cache.stats().evictions == 0
+            assert len([p for p in Path(tmpdir).rglob("*") if p.is_file()]) == 1
+
+    def test_instances_sharing_a_directory_keep_each_others_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            a = PickleCache(tmpdir)
+            b = PickleCache(tmpdir)
+            a.save("x", 1)
+            b.save("y", 2)
+
+            assert b.load("x") == 1
+            a.close()
+            b.close()
+            assert sorted(PickleCache(tmpdir).list_keys()) == ["x", "y"]
+
+    def test_lru_touch_is_persisted_on_close(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with PickleCache(tmpdir) as cache:
+                cache.save("a", 1)
+                cache.save("b", 2)
+                cache.load("a")
+
+            assert PickleCache(tmpdir).list_keys() == ["b", "a"]
+
 
 class TestFormatsJson:
     def test_load_notes_from_json(self):
@@ -1,8 +1,15 @@
 """Unit tests for tagger module."""
 
+import tempfile
+
 import numpy as np
 import pytest
 
+from notes_tagger.config import DEFAULT_CONFIG
+from notes_tagger.exceptions import ModelNotInitializedError
+from notes_tagger.embeddings.hashing import HashingEmbeddingModel
+from notes_tagger.tagger.engine import TaggingEngine
+from notes_tagger.tagger.index import TopicIndex, spherical_kmeans
 from notes_tagger.tagger.scoring import (
     cosine_similarity,
     cosine_similarity_matrix,
@@ -104,3 +111,109 @@ class TestRankTopics:
         assert isinstance(result[0], TagScore)
         assert result[0].topic == "finance"
         assert result[0].score == 0.75
+
+
+def _clustered_topics(num_parents=10, per_parent=10, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_parents, dim))
+    embeddings = np.vstack([
+        center + 0.1 * rng.standard_normal((per_parent, dim)) for center in centers
+    ])
+    names = [f"t{i}" for i in range(len(embeddings))]
+    parents = {name: f"p{i // per_parent}" for i, name in enumerate(names)}
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True), names, parents
+
+
+class TestTopicIndex:
+    def test_groups_by_parent(self):
+        embeddings, names, parents = _clustered_topics()
+        index = TopicIndex.build(embeddings, names, topic_parents=parents)
+
+        assert index.num_clusters == 10
+        assert all(len(m) == 10 for m in index.members)
+
+    def test_kmeans_without_parents(self):
+        embeddings, names, _ = _clustered_topics()
+        index = TopicIndex.build(embeddings, names, num_clusters=10)
+
+        assert index.num_clusters <= 10
+        assert sum(len(m) for m in index.members) == len(names)
+
+    def test_probe_all_clusters_is_exact(self):
+        embeddings, names, parents = _clustered_topics()
+        index = TopicIndex.build(embeddings, names, topic_parents=parents)
+        query = embeddings[3]
+
+        indices, scores = index.search(query, probe=index.num_clusters)
+
+        assert len(indices) == len(names)
+        np.testing.assert_allclose(scores, embeddings @ query, rtol=1e-5)
+
+    def test_probe_scores_subset(self):
+        embeddings, names, parents = _clustered_topics()
+        index = TopicIndex.build(embeddings, names, topic_parents=parents)
+
+        indices, _ = index.search(embeddings[0], probe=2)
+
+        assert len(indices) == 20
+
+    def test_recall_on_clustered_data(self):
+        embeddings, names, parents = _clustered_topics()
+        index = TopicIndex.build(embeddings, names, topic_parents=parents)
+
+        assert index.recall(embeddings[::7], k=3, probe=2) == 1.0
+
+    def test_spherical_kmeans_assigns_every_vector(self):
+        embeddings, _, _ = _clustered_topics()
+        assignment = spherical_kmeans(embeddings, 10)
+
+        assert assignment.shape == (len(embeddings),)
+        assert assignment.max() < 10
+
+
+class TestTaggingEngineIndex:
+    def _engine(self, tmpdir, **updates):
+        config = DEFAULT_CONFIG.model_copy(update={"cache_dir": tmpdir, "threshold": 0.0, **updates})
+        engine = TaggingEngine(config, model=HashingEmbeddingModel())
+        engine.initialize()
+        return engine
+
+    def test_auto_mode_skips_index_for_small_taxonomy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = self._engine(tmpdir)
+
+            assert engine._index is None
+
+    def test_clustered_matches_exact_when_probing_everything(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = self._engine(
+                tmpdir, topic_index="clustered", index_clusters=4, index_probe=4
+            )
+            text = "Reviewed the quarterly budget and revenue forecast"
+
+            approx = engine.tag(text)
+            exact = engine.score(engine.embed(text), exact=True)
+
+            assert engine._index is not None
+            assert [t.topic for t in approx.tags] == [t.topic for t in exact.tags]
+
+
+
+class TestTaggingEngineEmbed:
+    def test_embed_then_score_matches_tag(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            config = DEFAULT_CONFIG.model_copy(update={"cache_dir": tmpdir, "threshold": 0.0})
+            engine = TaggingEngine(config, model=HashingEmbeddingModel())
+            engine.initialize()
+            text = "Sketching a workout plan for the marathon"
+
+            scored = engine.score(engine.embed(text))
+
+            assert scored == engine.tag(text)
+            np.testing.assert_array_equal(engine.embed_batch([text])[0], engine.embed(text))
+
+    def test_embed_requires_initialize(self):
+        engine = TaggingEngine(DEFAULT_CONFIG, model=HashingEmbeddingModel())
+
+        with pytest.raises(ModelNotInitializedError):
+            engine.embed("text")
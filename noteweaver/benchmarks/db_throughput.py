@@ -0,0 +1,94 @@
+"""Task queue throughput of noteweaver.server.db.
+
+Usage:
+
+    python -m benchmarks.db_throughput --tasks 2000 --threads 1 --threads 8
+    python -m benchmarks.db_throughput --no-reuse   # a fresh connection per call
+    python -m benchmarks.db_throughput --backlog 1000000   # claims over a large table
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from noteweaver.models import TaskCreate, TaskStatus, TaskType, TaskUpdate
+from noteweaver.server import db
+
+
+def _timed(tasks: int, threads: int, op: Callable[[int], None], reuse: bool) -> float:
+    def call(i: int) -> None:
+        op(i)
+        if not reuse:
+            db.close_connections()
+
+    start = time.perf_counter()
+    if threads == 1:
+        for i in range(tasks):
+            call(i)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(call, range(tasks)))
+    return round(tasks / (time.perf_counter() - start), 1)
+
+
+def _fill(db_path: Path, backlog: int) -> None:
+    """Insert ``backlog`` finished tasks that every claim has to skip."""
+    conn = db._connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO tasks (task_type, path, priority, status, created_at) VALUES (?, ?, 1, ?, ?)",
+            ((TaskType.REFINE.value, f"done-{i}.md", TaskStatus.DONE.value, db._now()) for i in range(backlog)),
+        )
+
+
+def run(tasks: int, threads: int, reuse: bool, backlog: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "queue.db"
+        db.init_db(db_path)
+        _fill(db_path, backlog)
+        ids: list[int] = []
+
+        def create(i: int) -> None:
+            ids.append(db.create_task(TaskCreate(task_type=TaskType.REFINE, path=f"note-{i}.md"), db_path).id)
+
+        def claim(i: int) -> None:
+            db.claim_next_task(f"bench-{i % threads}", db_path=db_path)
+
+        def update(i: int) -> None:
+            db.update_task(ids[i], TaskUpdate(status=TaskStatus.DONE), db_path)
+
+        result = {
+            "tasks": tasks,
+            "threads": threads,
+            "backlog": backlog,
+            "reuse_connections": reuse,
+            "create_per_sec": _timed(tasks, threads, create, reuse),
+            "claim_per_sec": _timed(tasks, threads, claim, reuse),
+            "update_per_sec": _timed(tasks, threads, update, reuse),
+        }
+        db.close_connections()
+        return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--threads", type=int, action="append")
+    parser.add_argument("--no-reuse", action="store_true", help="Close connections after every call")
+    parser.add_argument("--backlog", type=int, default=0, help="Finished tasks already in the table")
+    args = parser.parse_args()
+
+    results = [
+        run(args.tasks, threads, not args.no_reuse, args.backlog) for threads in args.threads or [1]
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Embedding throughput against the fake Ollama server.
+
+Usage:
+
+    python -m benchmarks.embed_throughput --chunks 2000 --latency 0.05 \
+        --batch-size 8 --batch-size 32 --in-flight 1 --in-flight 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from noteweaver.server.embeddings import EmbeddingClient
+from noteweaver.server.fake_ollama import FakeOllamaServer
+
+
+def run(
+    chunks: int,
+    batch_size: int,
+    in_flight: int,
+    latency: float,
+    per_item_latency: float,
+    fail_rate: float,
+) -> dict:
+    texts = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 20 for i in range(chunks)]
+    with FakeOllamaServer(
+        latency=latency, per_item_latency=per_item_latency, fail_rate=fail_rate
+    ) as server:
+        with EmbeddingClient(
+            "fake-embed",
+            base_url=server.url,
+            batch_size=batch_size,
+            max_in_flight=in_flight,
+            backoff_seconds=0.01,
+        ) as client:
+            start = time.perf_counter()
+            client.embed_documents(texts)
+            elapsed = time.perf_counter() - start
+        return {
+            "chunks": chunks,
+            "batch_size": batch_size,
+            "in_flight": in_flight,
+            "seconds": round(elapsed, 4),
+            "chunks_per_sec": round(chunks / elapsed, 1),
+            "requests": server.requests,
+            "failures": server.failures,
+            "server_max_in_flight": server.max_in_flight,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, action="append")
+    parser.add_argument("--in-flight", type=int, action="append")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per request")
+    parser.add_argument("--per-item-latency", type=float, default=0.001, help="Seconds per text")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = [
+        run(args.chunks, batch_size, in_flight, args.latency, args.per_item_latency, args.fail_rate)
+        for batch_size in args.batch_size or [32]
+        for in_flight in args.in_flight or [4]
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
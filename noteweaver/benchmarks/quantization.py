@@ -0,0 +1,91 @@
+"""Recall@k, latency and memory of float32, int8 and PQ index formats.
+
+Usage:
+
+    python -m benchmarks.quantization --chunks 100000 --dim 768 --k 10 \
+        --subvectors 16 --subvectors 48
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from noteweaver.server.index_store import IndexSnapshot, write_snapshot
+from noteweaver.server.quantize import FLOAT32, INT8, PQ, VectorFormat
+
+
+def synthetic_vectors(count: int, dim: int, latent: int = 48, seed: int = 0) -> np.ndarray:
+    """Unit vectors with low intrinsic dimension, like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    projection = rng.standard_normal((latent, dim)).astype(np.float32)
+    vectors = rng.standard_normal((count, latent)).astype(np.float32) @ projection
+    vectors += 0.3 * np.sqrt(latent) * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def resident_bytes(snapshot: IndexSnapshot) -> int:
+    """Bytes search has to keep hot: codes (or the float matrix) only."""
+    return snapshot.codec.nbytes if snapshot.codec is not None else snapshot.vectors.nbytes
+
+
+def disk_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir() if p.suffix in (".npy", ".npz"))
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, fmt: VectorFormat, k: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = Path(tmp)
+        chunks = [{"source": "bench.md", "chunk_index": i, "text": ""} for i in range(len(vectors))]
+        start = time.perf_counter()
+        generation = write_snapshot(index_dir, chunks, vectors, "bench", vector_format=fmt)
+        build = time.perf_counter() - start
+        snapshot = IndexSnapshot(index_dir / generation)
+
+        exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+        found = 0
+        start = time.perf_counter()
+        for query, truth in zip(queries, exact):
+            hits = {i for i, _ in snapshot.search(query, k)}
+            found += len(hits & set(truth.tolist()))
+        latency = (time.perf_counter() - start) / len(queries)
+        return {
+            "format": fmt.kind,
+            "subvectors": fmt.pq_subvectors if fmt.kind == PQ else None,
+            "rerank": fmt.keep_float and fmt.kind != FLOAT32,
+            f"recall@{k}": round(found / (len(queries) * k), 4),
+            "query_ms": round(latency * 1000, 3),
+            "build_seconds": round(build, 2),
+            "resident_mb": round(resident_bytes(snapshot) / 2**20, 2),
+            "disk_mb": round(disk_bytes(index_dir / generation) / 2**20, 2),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--subvectors", type=int, action="append")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.chunks + args.queries, args.dim)
+    vectors, queries = vectors[:args.chunks], vectors[args.chunks:]
+
+    formats = [VectorFormat(FLOAT32)]
+    for keep_float in (False, True):
+        formats.append(VectorFormat(INT8, keep_float=keep_float))
+        for m in args.subvectors or [16]:
+            formats.append(VectorFormat(PQ, pq_subvectors=m, keep_float=keep_float))
+    results = [run(vectors, queries, fmt, args.k) for fmt in formats]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
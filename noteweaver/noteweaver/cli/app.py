@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import glob as globbing
 import warnings
 
 warnings.filterwarnings("ignore", message="Core Pydantic V1 functionality")
 
+from pathlib import Path
 from typing import Annotated, Optional
 
 import httpx
@@ -11,6 +13,7 @@ import typer
 from rich.prompt import IntPrompt, Prompt
 
 from noteweaver.cli import client
+from noteweaver.cli.config import load_config
 from noteweaver.cli.display import (
     console,
     print_error,
@@ -18,7 +21,7 @@ from noteweaver.cli.display import (
     print_task_action,
     print_task_table,
 )
-from noteweaver.models import TaskType
+from noteweaver.models import TaskStatus, TaskType
 
 app = typer.Typer(
     name="nweaver", help="NoteWeaver CLI — manage your note processing queue."
@@ -35,12 +38,29 @@ def _handle_request(fn, *args, **kwargs):
     except httpx.ConnectError:
         print_error("Cannot connect to the server. Is nweaver-server running?")
         raise typer.Exit(1)
+    except httpx.TransportError as e:
+        print_error(f"Lost connection to the server: {e}")
+        raise typer.Exit(1)
     except httpx.HTTPStatusError as e:
         detail = e.response.json().get("detail", str(e))
         print_error(detail)
         raise typer.Exit(1)
 
 
+def _glob_notes(pattern: str, base: Path) -> list[str]:
+    """Files matching ``pattern`` in ``base``, as sorted paths relative to it."""
+    paths = []
+    for match in globbing.glob(pattern, root_dir=base, recursive=True):
+        file_path = (base / match).resolve()
+        if file_path.is_dir():
+            continue
+        if not file_path.is_relative_to(base):
+            print_error(f"{match} is outside the notes directory {base}")
+            raise typer.Exit(1)
+        paths.append(file_path.relative_to(base).as_posix())
+    return sorted(paths)
+
+
 # ── Task commands ──────────────────────────────────────────────
 
 
@@ -55,19 +75,48 @@ def task_create(
     priority: Annotated[
         int, typer.Option("--prio", help="Priority (higher = more urgent)")
     ] = 1,
+    glob: Annotated[
+        Optional[str],
+        typer.Option(
+            "--glob",
+            help="Create a task for every matching file in the notes directory, e.g. 'daily/**/*.md'",
+        ),
+    ] = None,
+    wait: Annotated[
+        bool, typer.Option("--wait", help="Wait until the task has finished")
+    ] = False,
 ) -> None:
     """Create a new task. Runs interactively if --task and --path are omitted."""
+    if path is not None and glob is not None:
+        print_error("Use either --path or --glob, not both.")
+        raise typer.Exit(1)
+    if wait and glob is not None:
+        print_error("--wait works with a single --path only.")
+        raise typer.Exit(1)
     if task_type is None:
         task_type = Prompt.ask(
             "What do you want to do?",
             choices=[t.value for t in TaskType],
             default=TaskType.REFINE.value,
         )
+    if glob is not None:
+        paths = _glob_notes(glob, Path(load_config().base_dir).expanduser().resolve())
+        if not paths:
+            print_error(f"No files match {glob}")
+            raise typer.Exit(1)
+        result = _handle_request(client.create_tasks, task_type, paths, priority)
+        print_success(
+            f"[CREATE] Queued {result['created']} task(s) for {len(paths)} file(s), "
+            f"{result['coalesced']} already queued."
+        )
+        return
     if path is None:
         path = Prompt.ask("Which file?")
 
     result = _handle_request(client.create_task, task_type, path, priority)
     print_task_action("CREATE", result)
+    if wait:
+        _wait_for(result["id"], follow=False)
 
 
 @task_app.command("list")
@@ -86,6 +135,43 @@ def task_show(
     print_task_table([task], title=f"Task {task_id}")
 
 
+@task_app.command("wait")
+def task_wait(
+    task_id: Annotated[int, typer.Argument(help="Task ID")],
+    follow: Annotated[
+        bool, typer.Option("--follow", "-f", help="Print every status and progress change")
+    ] = False,
+) -> None:
+    """Wait until a task has finished. Exits non-zero unless it is DONE."""
+    _wait_for(task_id, follow)
+
+
+def _wait_for(task_id: int, follow: bool) -> None:
+    def watch() -> dict | None:
+        task = None
+        for event, task in client.watch_task(task_id):
+            if event == "deleted":
+                return None
+            if follow:
+                print_task_action("WAIT", task, extra=_progress(task))
+        return task
+
+    task = _handle_request(watch)
+    if task is None:
+        print_error(f"Task {task_id} was deleted.")
+        raise typer.Exit(1)
+    if not follow:
+        print_task_action("WAIT", task)
+    if task["status"] != TaskStatus.DONE:
+        raise typer.Exit(1)
+
+
+def _progress(task: dict) -> str:
+    if task.get("progress_total"):
+        return f"Progress: {task['progress_done']}/{task['progress_total']}"
+    return ""
+
+
 @task_app.command("edit")
 def task_edit(
     task_id: Annotated[int, typer.Argument(help="Task ID")],
@@ -1,54 +1,104 @@
 from __future__ import annotations
 
+import atexit
+import json
+from collections.abc import Iterator
+
 import httpx
 
 from noteweaver.cli.config import load_config
 
 _config = load_config()
+_client: httpx.Client | None = None
+
+# Task event streams send a keep-alive every few seconds; a much longer
+# silence means the connection is gone.
+STREAM_READ_TIMEOUT = 60.0
+
 
+def _http() -> httpx.Client:
+    """The process-wide client, so all calls reuse its pooled connections."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(base_url=_config.server_url)
+        atexit.register(close)
+    return _client
 
-def _url(path: str) -> str:
-    return f"{_config.server_url}{path}"
+
+def close() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
 
 
 def create_task(task_type: str, path: str, priority: int = 1) -> dict:
-    r = httpx.post(_url("/tasks"), json={"task_type": task_type, "path": path, "priority": priority})
+    r = _http().post("/tasks", json={"task_type": task_type, "path": path, "priority": priority})
+    r.raise_for_status()
+    return r.json()
+
+
+def create_tasks(task_type: str, paths: list[str], priority: int = 1) -> dict:
+    payload = [{"task_type": task_type, "path": path, "priority": priority} for path in paths]
+    r = _http().post("/tasks/batch", json=payload, timeout=60)
     r.raise_for_status()
     return r.json()
 
 
 def list_tasks() -> list[dict]:
-    r = httpx.get(_url("/tasks"))
+    r = _http().get("/tasks")
     r.raise_for_status()
     return r.json()
 
 
 def get_task(task_id: int) -> dict:
-    r = httpx.get(_url(f"/tasks/{task_id}"))
+    r = _http().get(f"/tasks/{task_id}")
     r.raise_for_status()
     return r.json()
 
 
+def watch_task(task_id: int) -> Iterator[tuple[str, dict]]:
+    """Yield ``(event, task)`` from the task's event stream as it changes.
+
+    Ends once the task reaches a final status or is deleted (``"deleted"``,
+    with only the id in the task dict).
+    """
+    timeout = httpx.Timeout(5.0, read=STREAM_READ_TIMEOUT)
+    with _http().stream("GET", f"/tasks/{task_id}/events", timeout=timeout) as r:
+        if r.is_error:
+            r.read()
+        r.raise_for_status()
+        event, data = "message", []
+        for line in r.iter_lines():
+            if line.startswith("event:"):
+                event = line.removeprefix("event:").strip()
+            elif line.startswith("data:"):
+                data.append(line.removeprefix("data:").strip())
+            elif not line and data:
+                yield event, json.loads("\n".join(data))
+                event, data = "message", []
+
+
 def update_task(task_id: int, **fields: object) -> dict:
     payload = {k: v for k, v in fields.items() if v is not None}
-    r = httpx.patch(_url(f"/tasks/{task_id}"), json=payload)
+    r = _http().patch(f"/tasks/{task_id}", json=payload)
     r.raise_for_status()
     return r.json()
 
 
 def delete_task(task_id: int) -> dict:
-    r = httpx.delete(_url(f"/tasks/{task_id}"))
+    r = _http().delete(f"/tasks/{task_id}")
     r.raise_for_status()
     return r.json()
 
 
 def get_queue() -> list[dict]:
-    r = httpx.get(_url("/queue"))
+    r = _http().get("/queue")
     r.raise_for_status()
     return r.json()
 
 
 def empty_queue() -> dict:
-    r = httpx.post(_url("/queue/empty"))
+    r = _http().post("/queue/empty")
     r.raise_for_status()
     return r.json()
@@ -10,17 +10,23 @@ CONFIG_FILE = CONFIG_DIR / "config.toml"
 
 DEFAULTS = {
     "server_url": "http://localhost:8321",
+    "base_dir": "~/obsidian-notes",
 }
 
 
 @dataclass
 class Config:
     server_url: str = DEFAULTS["server_url"]
+    # The server's notes directory; --glob matches and sends paths relative to it.
+    base_dir: str = DEFAULTS["base_dir"]
 
 
 def load_config() -> Config:
     if CONFIG_FILE.exists():
         with open(CONFIG_FILE, "rb") as f:
             data = tomllib.load(f)
-        return Config(server_url=data.get("server_url", DEFAULTS["server_url"]))
+        return Config(
+            server_url=data.get("server_url", DEFAULTS["server_url"]),
+            base_dir=data.get("base_dir", DEFAULTS["base_dir"]),
+        )
     return Config()
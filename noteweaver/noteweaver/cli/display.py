@@ -10,11 +10,12 @@ STATUS_COLORS = {
     "IN_PROGRESS": "cyan",
     "DONE": "green",
     "FAILED": "red",
+    "CANCELLED": "magenta",
 }
 
 
 def print_task_action(action: str, task: dict, extra: str = "") -> None:
-    color = {"CREATE": "green", "DELETE": "red", "EDIT": "blue"}.get(action, "white")
+    color = {"CREATE": "green", "DELETE": "red", "EDIT": "blue", "WAIT": "cyan"}.get(action, "white")
     status_color = STATUS_COLORS.get(task.get("status", ""), "white")
     msg = (
         f"[bold {color}][{action}][/] "
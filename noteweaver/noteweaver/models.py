@@ -16,6 +16,7 @@ class TaskStatus(StrEnum):
     IN_PROGRESS = "IN_PROGRESS"
     DONE = "DONE"
     FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
 
 
 class TaskCreate(BaseModel):
@@ -31,6 +32,11 @@ class TaskUpdate(BaseModel):
     status: TaskStatus | None = None
 
 
+class TaskBatchResult(BaseModel):
+    created: int
+    coalesced: int
+
+
 class Task(BaseModel):
     id: int
     task_type: TaskType
@@ -38,14 +44,93 @@ class Task(BaseModel):
     priority: int
     status: TaskStatus
     created_at: datetime
+    claimed_by: str | None = None
+    lease_expires_at: datetime | None = None
+    progress_done: int | None = None
+    progress_total: int | None = None
+
+
+class SearchMode(StrEnum):
+    LEXICAL = "lexical"
+    VECTOR = "vector"
+    HYBRID = "hybrid"
 
 
 class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
+    mode: SearchMode = SearchMode.VECTOR
+    shards: list[str] | None = None
+    path_prefix: str | None = None
+    tags: list[str] = Field(default_factory=list)
+    modified_after: datetime | None = None
+
+
+class IndexReport(BaseModel):
+    indexed_chunks: int = 0
+    embedded_chunks: int = 0
+    deduplicated_chunks: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    tombstones: int = 0
+    compacted: bool = False
+    generation: str | None = None
+    shards: dict[str, str] = Field(default_factory=dict)
+
+
+class IndexJobState(StrEnum):
+    IDLE = "idle"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class IndexStatus(BaseModel):
+    state: IndexJobState = IndexJobState.IDLE
+    job_id: int = 0
+    phase: str | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    files_done: int = 0
+    files_total: int = 0
+    chunks_done: int = 0
+    chunks_total: int = 0
+    eta_seconds: float | None = None
+    rerun_pending: bool = False
+    report: IndexReport | None = None
+    error: str | None = None
+
+
+class ShardInfo(BaseModel):
+    name: str
+    generation: str
+    chunks: int
+    files: int
 
 
 class SearchResult(BaseModel):
     path: str
     chunk: str
     score: float
+
+
+class CacheCounters(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class SearchCacheStats(BaseModel):
+    query_embeddings: CacheCounters
+    results: CacheCounters
+
+
+class RefineCacheStats(BaseModel):
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+    max_bytes: int
+    saved_llm_seconds: float
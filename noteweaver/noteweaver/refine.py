@@ -1,3 +1,6 @@
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Awaitable, Callable
 from pathlib import Path
 
 from langchain_core.output_parsers import StrOutputParser
@@ -5,8 +8,13 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import ChatOllama
 
 from .logger import Logger
+from .server.chunker import count_tokens, iter_sections
 from .server.config import load_config
 
+# Called as progress(done, total) with the number of finished passes of a
+# long-note refine: one per section plus the final merge.
+RefineProgress = Callable[[int, int], Awaitable[None]]
+
 
 class RefineNote:
     _refine_prompt = ChatPromptTemplate.from_template("""
@@ -25,9 +33,41 @@ class RefineNote:
     REFINED NOTE:
     """)
 
+    _section_prompt = ChatPromptTemplate.from_template("""
+    SYSTEM: You are an expert editor. You are given one section of a longer,
+    messy note. Transform it into a highly readable Markdown format.
+
+    TASK:
+    - Fix grammar and shorthand.
+    - Keep the section's own headers; use H2 and H3 headers for organization.
+    - Do not add a summary or keywords, they are written for the whole note.
+
+    SECTION {index} OF {total}:
+    {section}
+
+    REFINED SECTION:
+    """)
+
+    _merge_prompt = ChatPromptTemplate.from_template("""
+    SYSTEM: You are an expert editor. Below is a refined note, possibly
+    abbreviated to the start of each section.
+
+    TASK:
+    - Write a "TL;DR" summary of the whole note.
+    - Extract 3-5 keywords for tagging.
+    - Output only the TL;DR and the keywords in Markdown.
+
+    REFINED NOTE:
+    {refined_note}
+
+    TL;DR AND KEYWORDS:
+    """)
+
     _config = load_config()
     _llm = ChatOllama(model=_config.model, temperature=0.2)
     _refine_chain = _refine_prompt | _llm | StrOutputParser()
+    _section_chain = _section_prompt | _llm | StrOutputParser()
+    _merge_chain = _merge_prompt | _llm | StrOutputParser()
     _logger = Logger(name="noteweaver.refine").get()
 
     @staticmethod
@@ -43,3 +83,91 @@ class RefineNote:
         except Exception:
             RefineNote._logger.exception("Failed to refine note for %s", path)
             raise
+
+    @staticmethod
+    def cache_key(content: str) -> str:
+        """Hash of everything that determines the output: note, model and prompt."""
+        h = hashlib.blake2b(digest_size=20)
+        config = RefineNote._config
+        for part in (
+            config.model,
+            str(RefineNote._llm.temperature),
+            RefineNote._refine_prompt.messages[0].prompt.template,
+            RefineNote._section_prompt.messages[0].prompt.template,
+            RefineNote._merge_prompt.messages[0].prompt.template,
+            f"{config.long_note_tokens}:{config.refine_section_tokens}",
+            content,
+        ):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    @staticmethod
+    async def astream(
+        str_path: str, content: str | None = None, progress: RefineProgress | None = None
+    ) -> AsyncIterator[str]:
+        """Yield the refined note piece by piece as the model generates it.
+
+        Notes longer than ``long_note_tokens`` are refined section by
+        section instead, see :meth:`_astream_long`.
+        """
+        path = Path(str_path)
+        RefineNote._logger.info("Starting streamed note refinement for %s", path)
+        if content is None:
+            content = path.read_text()
+        if count_tokens(content) > RefineNote._config.long_note_tokens:
+            pieces = RefineNote._astream_long(path, content, progress)
+        else:
+            pieces = RefineNote._refine_chain.astream({"raw_note": content})
+        async for piece in pieces:
+            yield piece
+        RefineNote._logger.info("Completed note refinement for %s", path)
+
+    @staticmethod
+    async def _astream_long(
+        path: Path, content: str, progress: RefineProgress | None
+    ) -> AsyncIterator[str]:
+        """Map-reduce refine: sections concurrently, then one merge pass.
+
+        Sections are split at headings and refined up to
+        ``refine_section_parallelism`` at a time; the merge pass writes the
+        TL;DR and keywords for the whole note, which lead the output.
+        """
+        config = RefineNote._config
+        sections = list(iter_sections(content.splitlines(), config.refine_section_tokens))
+        total = len(sections) + 1
+        RefineNote._logger.info("Refining %s as %d sections", path, len(sections))
+        limit = asyncio.Semaphore(max(1, config.refine_section_parallelism))
+        done = 0
+
+        async def refine_section(index: int, section: str) -> str:
+            nonlocal done
+            async with limit:
+                refined = await RefineNote._section_chain.ainvoke(
+                    {"index": index + 1, "total": len(sections), "section": section}
+                )
+            done += 1
+            if progress is not None:
+                await progress(done, total)
+            return refined.strip()
+
+        if progress is not None:
+            await progress(0, total)
+        refined = await asyncio.gather(*(refine_section(i, s) for i, s in enumerate(sections)))
+        async for piece in RefineNote._merge_chain.astream(
+            {"refined_note": _merge_input(refined, config.long_note_tokens)}
+        ):
+            yield piece
+        yield "\n\n"
+        yield "\n\n".join(refined)
+        yield "\n"
+        if progress is not None:
+            await progress(total, total)
+
+
+def _merge_input(sections: list[str], max_tokens: int) -> str:
+    """The refined sections, each cut to its share of ``max_tokens`` if needed."""
+    if sum(count_tokens(s) for s in sections) <= max_tokens:
+        return "\n\n".join(sections)
+    share = max(1, max_tokens // len(sections))
+    return "\n\n".join(" ".join(s.split()[:share]) for s in sections)
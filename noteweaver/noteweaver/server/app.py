@@ -10,12 +10,19 @@ from fastapi import FastAPI
 
 from noteweaver.logger import Logger
 from noteweaver.server.config import DEFAULT_CONFIG_PATH, ServerConfig, load_config
-from noteweaver.server.db import init_db
-from noteweaver.server.indexer import index_directory, index_exists
+from noteweaver.server.db import close_connections, init_db
+from noteweaver.server.embeddings import EmbeddingClient
+from noteweaver.server.index_jobs import jobs
+from noteweaver.server.indexer import configure_caches, index_exists, load_index
+from noteweaver.server.quantize import VectorFormat
+from noteweaver.server.refine_cache import RefineCache
 from noteweaver.server.routes import router
-from noteweaver.server.worker import start_worker
+from noteweaver.server.worker import WorkerPool, start_workers
 
 config: ServerConfig = ServerConfig()
+embedding_client: EmbeddingClient | None = None
+workers: WorkerPool | None = None
+refine_cache: RefineCache | None = None
 
 
 def create_app(cfg: ServerConfig | None = None) -> FastAPI:
@@ -33,12 +40,35 @@ def create_app(cfg: ServerConfig | None = None) -> FastAPI:
 
     @application.on_event("startup")
     def startup() -> None:
+        global embedding_client, workers, refine_cache
+        embedding_client = EmbeddingClient.from_config(config)
+        configure_caches(config.query_cache_size, config.result_cache_size)
         init_db()
         logger.info("Server started (model=%s, log_file=%s)", config.model, config.log_file)
         if not index_exists(config.base_dir):
-            logger.info("No existing index found, triggering initial indexing")
-            index_directory(config.base_dir, config.embedding_model)
-        start_worker(config.base_dir)
+            logger.info("No existing index found, starting initial indexing in the background")
+            jobs.start(
+                config.base_dir,
+                config.embedding_model,
+                client=embedding_client,
+                sharded=config.shard_index,
+                vector_format=VectorFormat.from_config(config),
+            )
+        else:
+            load_index(config.base_dir, config.embedding_model)
+        refine_cache = RefineCache.for_base_dir(config.base_dir, config.refine_cache_mb)
+        workers = start_workers(
+            config.base_dir, config.worker_count, config.refine_timeout_seconds, refine_cache
+        )
+
+    @application.on_event("shutdown")
+    def shutdown() -> None:
+        if workers is not None:
+            logger.info("Draining %d queue workers", workers.count)
+            workers.stop(config.drain_timeout_seconds)
+        if embedding_client is not None:
+            embedding_client.close()
+        close_connections()
 
     return application
 
@@ -58,7 +88,15 @@ def main() -> None:
     cfg = load_config(args.config)
     init_db()
     create_app(cfg)
-    uvicorn.run("noteweaver.server.app:app", host="0.0.0.0", port=8321, reload=True)
+    # Open task event streams would otherwise hold up shutdown until
+    # their tasks finish.
+    uvicorn.run(
+        "noteweaver.server.app:app",
+        host="0.0.0.0",
+        port=8321,
+        reload=True,
+        timeout_graceful_shutdown=int(cfg.drain_timeout_seconds),
+    )
 
 
 app = create_app()
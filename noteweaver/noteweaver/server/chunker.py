@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Iterable, Iterator
+
+CHUNKER_VERSION = "markdown-v2"
+CHUNK_TOKENS = 256
+_FRONTMATTER_FENCE = "---"
+_MAX_FRONTMATTER_LINES = 200
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+\S")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def chunk_digest(text: str) -> int:
+    """64-bit content hash used to find identical chunks across files."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[tuple[str | None, str]]:
+    """Yield (current heading, block) pairs from markdown lines.
+
+    A block is a heading line, a paragraph (text up to a blank line) or a
+    whole fenced code block, which is never split at blank lines.
+    """
+    heading: str | None = None
+    block: list[str] = []
+    fence: str | None = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if fence is not None:
+            block.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                yield heading, "\n".join(block)
+                block = []
+            continue
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            if block:
+                yield heading, "\n".join(block)
+            block = [line]
+            fence = fence_match.group(1)
+        elif _HEADING_RE.match(line):
+            if block:
+                yield heading, "\n".join(block)
+                block = []
+            heading = line.strip()
+            yield heading, heading
+        elif not line.strip():
+            if block:
+                yield heading, "\n".join(block)
+                block = []
+        else:
+            block.append(line)
+    if block:
+        yield heading, "\n".join(block)
+
+
+def _skip_frontmatter(lines: Iterable[str]) -> Iterator[str]:
+    """Drop a leading ``---`` frontmatter block; its tags are indexed as metadata."""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    if first.strip() != _FRONTMATTER_FENCE:
+        yield first
+        yield from lines
+        return
+    held = [first]
+    for line in lines:
+        held.append(line)
+        if line.strip() == _FRONTMATTER_FENCE:
+            break
+        if len(held) > _MAX_FRONTMATTER_LINES:
+            yield from held
+            break
+    else:
+        # Never closed: a thematic break, not frontmatter.
+        yield from held
+    yield from lines
+
+
+def _split_block(block: str, max_tokens: int) -> Iterator[str]:
+    """Split an oversized block at line or sentence ends, then at words."""
+    sep = "\n" if "\n" in block else " "
+    pieces = block.splitlines() if sep == "\n" else _SENTENCE_RE.split(block)
+    current: list[str] = []
+    size = 0
+    for piece in pieces:
+        words = piece.split()
+        if len(words) > max_tokens:
+            if current:
+                yield sep.join(current)
+                current, size = [], 0
+            while len(words) > max_tokens:
+                yield " ".join(words[:max_tokens])
+                words = words[max_tokens:]
+            piece = " ".join(words)
+        if not words:
+            continue
+        if size + len(words) > max_tokens and current:
+            yield sep.join(current)
+            current, size = [], 0
+        current.append(piece)
+        size += len(words)
+    if current:
+        yield sep.join(current)
+
+
+def iter_chunks(lines: Iterable[str], max_tokens: int = CHUNK_TOKENS) -> Iterator[str]:
+    """Pack markdown blocks into chunks of at most ``max_tokens`` tokens.
+
+    A heading starts a new chunk unless the current one holds nothing but
+    headings; paragraphs are packed until the budget is reached. Chunks
+    that continue a section repeat its heading so they keep their context
+    when embedded on their own. Leading frontmatter is skipped.
+    """
+    current: list[str] = []
+    size = 0
+    has_body = False
+    section: str | None = None
+
+    for heading, block in iter_blocks(_skip_frontmatter(lines)):
+        tokens = count_tokens(block)
+        if block == heading:
+            if current and (has_body or size + tokens > max_tokens):
+                yield "\n\n".join(current)
+                current, size, has_body = [], 0, False
+            current.append(block)
+            size += tokens
+            section = heading
+            continue
+        # Leave room for the headings this block has to follow: those that
+        # start the current chunk, or the section heading repeated on the
+        # chunks it continues into.
+        section_tokens = count_tokens(section) if section is not None else 0
+        reserve = section_tokens if has_body else size
+        budget = max_tokens - reserve if reserve < max_tokens else max_tokens
+        parts = list(_split_block(block, budget)) if tokens > budget else [block]
+        for part in parts:
+            part_tokens = count_tokens(part)
+            if size + part_tokens > max_tokens and current:
+                yield "\n\n".join(current)
+                current, size = [], 0
+                if has_body and section is not None and section_tokens + part_tokens <= max_tokens:
+                    current, size = [section], section_tokens
+            current.append(part)
+            size += part_tokens
+            has_body = True
+    if current:
+        yield "\n\n".join(current)
+
+
+def _pack(blocks: Iterable[str], max_tokens: int) -> Iterator[str]:
+    current: list[str] = []
+    size = 0
+    for block in blocks:
+        tokens = count_tokens(block)
+        if current and size + tokens > max_tokens:
+            yield "\n\n".join(current)
+            current, size = [], 0
+        if tokens > max_tokens:
+            yield from _split_block(block, max_tokens)
+            continue
+        current.append(block)
+        size += tokens
+    if current:
+        yield "\n\n".join(current)
+
+
+def _pack_section(heading: str | None, blocks: list[str], max_tokens: int) -> Iterator[str]:
+    """Pack an oversized section's blocks, leading the first with its heading."""
+    if heading is None:
+        yield from _pack(blocks, max_tokens)
+        return
+    heading_tokens = count_tokens(heading)
+    budget = max_tokens - heading_tokens if heading_tokens < max_tokens else max_tokens
+    pieces = _pack(blocks, budget)
+    first = next(pieces, None)
+    yield heading if first is None else f"{heading}\n\n{first}"
+    yield from pieces
+
+
+def iter_sections(lines: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """Split a note into heading-aligned sections of at most ``max_tokens``.
+
+    Whole headed sections are packed together while they fit; a section
+    that is too long on its own is cut between its blocks, and its heading
+    leads the first piece.
+    """
+    sections: list[tuple[str | None, list[str]]] = []
+    for heading, block in iter_blocks(lines):
+        if block == heading:
+            sections.append((heading, []))
+        else:
+            if not sections:
+                sections.append((None, []))
+            sections[-1][1].append(block)
+
+    packed: list[str] = []
+    size = 0
+    for heading, blocks in sections:
+        head = [heading] if heading is not None else []
+        tokens = sum(count_tokens(block) for block in head + blocks)
+        if packed and size + tokens > max_tokens:
+            yield "\n\n".join(packed)
+            packed, size = [], 0
+        if tokens > max_tokens:
+            yield from _pack_section(heading, blocks, max_tokens)
+            continue
+        packed.extend(head + blocks)
+        size += tokens
+    if packed:
+        yield "\n\n".join(packed)
@@ -29,6 +29,25 @@ class ServerConfig:
     log_file: str = "noteweaver.log"
     model: str = ""
     embedding_model: str = "nomic-embed-text"
+    shard_index: bool = False
+    vector_format: str = "float32"
+    pq_subvectors: int = 16
+    keep_float_vectors: bool = True
+    rerank_factor: int = 4
+    ollama_url: str = "http://localhost:11434"
+    embed_batch_size: int = 32
+    embed_max_in_flight: int = 4
+    embed_max_retries: int = 4
+    embed_backoff_seconds: float = 0.5
+    query_cache_size: int = 1024
+    result_cache_size: int = 256
+    worker_count: int = 1
+    drain_timeout_seconds: float = 30.0
+    refine_timeout_seconds: float = 600.0
+    refine_cache_mb: float = 256.0
+    long_note_tokens: int = 3000
+    refine_section_tokens: int = 1000
+    refine_section_parallelism: int = 4
 
     def __post_init__(self):
         if not self.model:
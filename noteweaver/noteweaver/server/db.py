@@ -1,38 +1,146 @@
 from __future__ import annotations
 
 import sqlite3
-from datetime import datetime, timezone
+import threading
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from noteweaver.models import Task, TaskCreate, TaskStatus, TaskType, TaskUpdate
+from noteweaver.models import Task, TaskBatchResult, TaskCreate, TaskStatus, TaskType, TaskUpdate
+from noteweaver.server import task_events
 
 DEFAULT_DB_PATH = Path("noteweaver_queue.db")
+BUSY_TIMEOUT_MS = 5000
+# Per-connection prepared statement cache; the queries below are few and fixed.
+STATEMENT_CACHE_SIZE = 64
+# A claimed task whose lease runs out is handed to the next claimer, so a
+# crashed worker or process cannot hold it forever.
+DEFAULT_LEASE_SECONDS = 900
 
+# One connection per (thread, database), opened on first use and kept
+# for the life of the thread so pragmas and prepared statements are set
+# up once instead of on every call.
+_local = threading.local()
+_all_connections: list[sqlite3.Connection] = []
+_all_connections_lock = threading.Lock()
+# Bumped by close_connections() so other threads drop their closed ones.
+_pool_epoch = 0
 
-def _connect(db_path: Path = DEFAULT_DB_PATH) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+
+def _open(db_path: Path) -> sqlite3.Connection:
+    # Connections never leave their thread; check_same_thread is off only
+    # so close_connections() can close them at shutdown.
+    conn = sqlite3.connect(
+        db_path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    with _all_connections_lock:
+        _all_connections.append(conn)
+    return conn
+
+
+def _connect(db_path: Path = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    pool: dict[Path, sqlite3.Connection] | None = getattr(_local, "connections", None)
+    if pool is None or _local.epoch != _pool_epoch:
+        pool = _local.connections = {}
+        _local.epoch = _pool_epoch
+    conn = pool.get(db_path)
+    if conn is None:
+        conn = pool[db_path] = _open(db_path)
     return conn
 
 
+def close_connections() -> None:
+    """Close every pooled connection, e.g. on shutdown or after tests."""
+    global _pool_epoch
+    with _all_connections_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+        _pool_epoch += 1
+    for conn in connections:
+        conn.close()
+
+
+class DuplicateTaskError(ValueError):
+    """An update would give a (task_type, path) a second QUEUED task."""
+
+
+class TaskClaimedError(ValueError):
+    """A status change other than a cancel was made to a claimed task."""
+
+
+# Columns added after the first release, created on older databases.
+_ADDED_COLUMNS = (
+    ("claimed_by", "TEXT"),
+    ("lease_expires_at", "TEXT"),
+    ("progress_done", "INTEGER"),
+    ("progress_total", "INTEGER"),
+)
+
+
 def init_db(db_path: Path = DEFAULT_DB_PATH) -> None:
     conn = _connect(db_path)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_type TEXT NOT NULL,
-            path TEXT NOT NULL,
-            priority INTEGER NOT NULL DEFAULT 1,
-            status TEXT NOT NULL DEFAULT 'QUEUED',
-            created_at TEXT NOT NULL
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_type TEXT NOT NULL,
+                path TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 1,
+                status TEXT NOT NULL DEFAULT 'QUEUED',
+                created_at TEXT NOT NULL,
+                claimed_by TEXT,
+                lease_expires_at TEXT,
+                progress_done INTEGER,
+                progress_total INTEGER
+            )
+        """)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+        for column, kind in _ADDED_COLUMNS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {kind}")
+        # Serves both claim lookups and the queue listing order.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_claim_order "
+            "ON tasks (status, priority DESC, created_at)"
+        )
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'tasks_queued_once'"
+        ).fetchone():
+            _coalesce_existing(conn)
+        # At most one QUEUED task per (task_type, path); see enqueue_task.
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS tasks_queued_once "
+            "ON tasks (task_type, path) WHERE status = 'QUEUED'"
         )
-    """)
-    conn.commit()
-    conn.close()
+
+
+def _coalesce_existing(conn: sqlite3.Connection) -> None:
+    """Merge duplicate QUEUED tasks of databases created before coalescing."""
+    queued = TaskStatus.QUEUED.value
+    conn.execute(
+        "UPDATE tasks SET priority = (SELECT MAX(t.priority) FROM tasks t "
+        "WHERE t.task_type = tasks.task_type AND t.path = tasks.path AND t.status = ?) "
+        "WHERE status = ?",
+        (queued, queued),
+    )
+    conn.execute(
+        "DELETE FROM tasks WHERE status = ? AND id NOT IN "
+        "(SELECT MIN(id) FROM tasks WHERE status = ? GROUP BY task_type, path)",
+        (queued, queued),
+    )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
 
 
 def _row_to_task(row: sqlite3.Row) -> Task:
+    lease = row["lease_expires_at"]
     return Task(
         id=row["id"],
         task_type=TaskType(row["task_type"]),
@@ -40,41 +148,84 @@ def _row_to_task(row: sqlite3.Row) -> Task:
         priority=row["priority"],
         status=TaskStatus(row["status"]),
         created_at=datetime.fromisoformat(row["created_at"]),
+        claimed_by=row["claimed_by"],
+        lease_expires_at=datetime.fromisoformat(lease) if lease else None,
+        progress_done=row["progress_done"],
+        progress_total=row["progress_total"],
     )
 
 
+def _changed(row: sqlite3.Row | None) -> Task | None:
+    """The task of a committed write's RETURNING row; wakes task watchers."""
+    if row is None:
+        return None
+    task_events.publish()
+    return _row_to_task(row)
+
+
+def enqueue_task(data: TaskCreate, db_path: Path = DEFAULT_DB_PATH) -> tuple[Task, bool]:
+    """Queue a task, coalescing it into an already QUEUED one for the same
+    (task_type, path). That task keeps its place and takes the higher of
+    the two priorities. Returns the task and whether it was newly created.
+    """
+    conn = _connect(db_path)
+    while True:
+        with conn:
+            row = conn.execute(
+                "INSERT INTO tasks (task_type, path, priority, status, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (task_type, path) WHERE status = 'QUEUED' DO NOTHING RETURNING *",
+                (data.task_type.value, data.path, data.priority, TaskStatus.QUEUED.value, _now()),
+            ).fetchone()
+            created = row is not None
+            if not created:
+                row = conn.execute(
+                    "UPDATE tasks SET priority = MAX(priority, ?) "
+                    "WHERE task_type = ? AND path = ? AND status = ? RETURNING *",
+                    (data.priority, data.task_type.value, data.path, TaskStatus.QUEUED.value),
+                ).fetchone()
+        if row is not None:
+            task_events.publish()
+            return _row_to_task(row), created
+        # The queued task was claimed in between; insert again.
+
+
 def create_task(data: TaskCreate, db_path: Path = DEFAULT_DB_PATH) -> Task:
+    return enqueue_task(data, db_path)[0]
+
+
+def enqueue_tasks(items: list[TaskCreate], db_path: Path = DEFAULT_DB_PATH) -> TaskBatchResult:
+    """Queue many tasks in one transaction, coalescing like enqueue_task."""
     conn = _connect(db_path)
-    now = datetime.now(timezone.utc).isoformat()
-    cur = conn.execute(
-        "INSERT INTO tasks (task_type, path, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
-        (data.task_type.value, data.path, data.priority, TaskStatus.QUEUED.value, now),
-    )
-    conn.commit()
-    row = conn.execute("SELECT * FROM tasks WHERE id = ?", (cur.lastrowid,)).fetchone()
-    conn.close()
-    return _row_to_task(row)
+    now = _now()
+    with conn:
+        # Take the write lock up front so no other insert lands between
+        # reading the last id and counting the rows added after it.
+        conn.execute("BEGIN IMMEDIATE")
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO tasks (task_type, path, priority, status, created_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (task_type, path) WHERE status = 'QUEUED' "
+            "DO UPDATE SET priority = MAX(priority, excluded.priority)",
+            ((d.task_type.value, d.path, d.priority, TaskStatus.QUEUED.value, now) for d in items),
+        )
+        created = conn.execute("SELECT COUNT(*) FROM tasks WHERE id > ?", (last_id,)).fetchone()[0]
+    task_events.publish()
+    return TaskBatchResult(created=created, coalesced=len(items) - created)
 
 
 def get_task(task_id: int, db_path: Path = DEFAULT_DB_PATH) -> Task | None:
     conn = _connect(db_path)
     row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
-    conn.close()
     return _row_to_task(row) if row else None
 
 
 def list_tasks(db_path: Path = DEFAULT_DB_PATH) -> list[Task]:
     conn = _connect(db_path)
     rows = conn.execute("SELECT * FROM tasks ORDER BY priority DESC, created_at ASC").fetchall()
-    conn.close()
     return [_row_to_task(r) for r in rows]
 
 
 def update_task(task_id: int, data: TaskUpdate, db_path: Path = DEFAULT_DB_PATH) -> Task | None:
-    existing = get_task(task_id, db_path)
-    if existing is None:
-        return None
-
     updates: list[str] = []
     values: list[object] = []
     if data.task_type is not None:
@@ -86,30 +237,41 @@ def update_task(task_id: int, data: TaskUpdate, db_path: Path = DEFAULT_DB_PATH)
     if data.priority is not None:
         updates.append("priority = ?")
         values.append(data.priority)
+    where = "id = ?"
     if data.status is not None:
-        updates.append("status = ?")
+        # A manual status change releases any claim; IN_PROGRESS without
+        # an owner marks the task to be picked up next.
+        updates.append("status = ?, claimed_by = NULL, lease_expires_at = NULL")
         values.append(data.status.value)
+        if data.status != TaskStatus.CANCELLED:
+            # A claimed task belongs to its worker until it finishes, or it
+            # could be refined twice; it can only be cancelled.
+            where += " AND NOT (status = ? AND claimed_by IS NOT NULL)"
 
     if not updates:
-        return existing
+        return get_task(task_id, db_path)
 
     values.append(task_id)
+    if where != "id = ?":
+        values.append(TaskStatus.IN_PROGRESS.value)
     conn = _connect(db_path)
-    conn.execute(f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?", values)
-    conn.commit()
-    conn.close()
-    return get_task(task_id, db_path)
+    try:
+        with conn:
+            row = conn.execute(
+                f"UPDATE tasks SET {', '.join(updates)} WHERE {where} RETURNING *", values
+            ).fetchone()
+    except sqlite3.IntegrityError as e:
+        raise DuplicateTaskError(f"Another task for this path is already queued: {e}") from e
+    if row is None and where != "id = ?" and get_task(task_id, db_path) is not None:
+        raise TaskClaimedError(f"Task {task_id} is being worked on; it can only be cancelled")
+    return _changed(row)
 
 
 def delete_task(task_id: int, db_path: Path = DEFAULT_DB_PATH) -> Task | None:
-    task = get_task(task_id, db_path)
-    if task is None:
-        return None
     conn = _connect(db_path)
-    conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-    conn.commit()
-    conn.close()
-    return task
+    with conn:
+        row = conn.execute("DELETE FROM tasks WHERE id = ? RETURNING *", (task_id,)).fetchone()
+    return _changed(row)
 
 
 def get_queue(db_path: Path = DEFAULT_DB_PATH) -> list[Task]:
@@ -118,40 +280,111 @@ def get_queue(db_path: Path = DEFAULT_DB_PATH) -> list[Task]:
         "SELECT * FROM tasks WHERE status IN (?, ?) ORDER BY priority DESC, created_at ASC",
         (TaskStatus.QUEUED.value, TaskStatus.IN_PROGRESS.value),
     ).fetchall()
-    conn.close()
     return [_row_to_task(r) for r in rows]
 
 
-def claim_next_task(db_path: Path = DEFAULT_DB_PATH) -> Task | None:
+def claim_next_task(
+    owner: str = "",
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    db_path: Path = DEFAULT_DB_PATH,
+) -> Task | None:
+    """Atomically claim the next task for ``owner``.
+
+    Tasks marked IN_PROGRESS without an owner (pre-claimed through PATCH)
+    or whose lease expired come first, then the next QUEUED task. The
+    pick and the update are one statement, so concurrent claimers in any
+    process never get the same task, and both lookups walk the
+    (status, priority, created_at) index instead of scanning the table.
+    """
     conn = _connect(db_path)
-    # Pick up tasks already marked IN_PROGRESS (pre-claimed by the route) first,
-    # then fall back to the next QUEUED task.
-    row = conn.execute(
-        "SELECT * FROM tasks WHERE status IN (?, ?) "
-        "ORDER BY CASE status WHEN ? THEN 0 ELSE 1 END, priority DESC, created_at ASC LIMIT 1",
-        (TaskStatus.IN_PROGRESS.value, TaskStatus.QUEUED.value, TaskStatus.IN_PROGRESS.value),
-    ).fetchone()
-    if row is None:
-        conn.close()
-        return None
-    if row["status"] == TaskStatus.QUEUED.value:
-        conn.execute(
-            "UPDATE tasks SET status = ? WHERE id = ?",
-            (TaskStatus.IN_PROGRESS.value, row["id"]),
+    now = datetime.now(timezone.utc)
+    expires = (now + timedelta(seconds=lease_seconds)).isoformat()
+    with conn:
+        row = conn.execute(
+            """
+            UPDATE tasks SET status = ?, claimed_by = ?, lease_expires_at = ?,
+                progress_done = NULL, progress_total = NULL
+            WHERE id = COALESCE(
+                (SELECT id FROM tasks
+                 WHERE status = ? AND (claimed_by IS NULL OR lease_expires_at < ?)
+                 ORDER BY priority DESC, created_at ASC LIMIT 1),
+                (SELECT id FROM tasks
+                 WHERE status = ?
+                 ORDER BY priority DESC, created_at ASC LIMIT 1)
+            )
+            RETURNING *
+            """,
+            (
+                TaskStatus.IN_PROGRESS.value, owner, expires,
+                TaskStatus.IN_PROGRESS.value, now.isoformat(),
+                TaskStatus.QUEUED.value,
+            ),
+        ).fetchone()
+    return _changed(row)
+
+
+def renew_lease(
+    task_id: int,
+    owner: str,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    db_path: Path = DEFAULT_DB_PATH,
+) -> bool:
+    """Extend the lease of a task still claimed by ``owner``."""
+    expires = (datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)).isoformat()
+    conn = _connect(db_path)
+    with conn:
+        cur = conn.execute(
+            "UPDATE tasks SET lease_expires_at = ? WHERE id = ? AND claimed_by = ? AND status = ?",
+            (expires, task_id, owner, TaskStatus.IN_PROGRESS.value),
         )
-        conn.commit()
-        row = conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone()
-    conn.close()
-    return _row_to_task(row)
+    return cur.rowcount == 1
+
+
+def set_progress(
+    task_id: int, owner: str, done: int, total: int, db_path: Path = DEFAULT_DB_PATH
+) -> bool:
+    """Record how many of ``total`` steps of a claimed task are finished."""
+    conn = _connect(db_path)
+    with conn:
+        cur = conn.execute(
+            "UPDATE tasks SET progress_done = ?, progress_total = ? WHERE id = ? AND claimed_by = ?",
+            (done, total, task_id, owner),
+        )
+    if cur.rowcount != 1:
+        return False
+    task_events.publish()
+    return True
+
+
+def finish_task(
+    task_id: int, owner: str, status: TaskStatus, db_path: Path = DEFAULT_DB_PATH
+) -> Task | None:
+    """Set the final status of a task, unless ``owner`` lost its claim."""
+    conn = _connect(db_path)
+    with conn:
+        row = conn.execute(
+            "UPDATE tasks SET status = ?, claimed_by = NULL, lease_expires_at = NULL "
+            "WHERE id = ? AND claimed_by = ? AND status = ? RETURNING *",
+            (status.value, task_id, owner, TaskStatus.IN_PROGRESS.value),
+        ).fetchone()
+    return _changed(row)
+
+
+def count_by_status(db_path: Path = DEFAULT_DB_PATH) -> dict[TaskStatus, int]:
+    conn = _connect(db_path)
+    rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+    counts = dict.fromkeys(TaskStatus, 0)
+    counts.update((TaskStatus(row["status"]), row["n"]) for row in rows)
+    return counts
 
 
 def empty_queue(db_path: Path = DEFAULT_DB_PATH) -> int:
     conn = _connect(db_path)
-    cur = conn.execute(
-        "DELETE FROM tasks WHERE status IN (?, ?)",
-        (TaskStatus.QUEUED.value, TaskStatus.IN_PROGRESS.value),
-    )
-    conn.commit()
-    count = cur.rowcount
-    conn.close()
-    return count
+    with conn:
+        cur = conn.execute(
+            "DELETE FROM tasks WHERE status IN (?, ?)",
+            (TaskStatus.QUEUED.value, TaskStatus.IN_PROGRESS.value),
+        )
+    if cur.rowcount:
+        task_events.publish()
+    return cur.rowcount
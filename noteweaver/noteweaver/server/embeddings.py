@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import httpx
+
+from noteweaver.logger import Logger
+
+if TYPE_CHECKING:
+    from noteweaver.server.config import ServerConfig
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+logger = Logger(name="noteweaver.embeddings").get()
+
+
+class EmbeddingError(RuntimeError):
+    pass
+
+
+class EmbeddingCheckpoint:
+    """Append-only store of finished batches, keyed by model and text hash.
+
+    A run that dies halfway (timeout, Ollama restart) resumes from here
+    instead of re-embedding everything that already succeeded.
+    """
+
+    def __init__(self, path: Path, model: str):
+        self.path = path
+        self.model = model
+        self._vectors: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn final write
+                self._vectors[entry["key"]] = entry["vector"]
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> list[float] | None:
+        return self._vectors.get(self.key(text))
+
+    def add(self, texts: Sequence[str], vectors: Sequence[list[float]]) -> None:
+        lines = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                self._vectors[key] = vector
+                lines.append(json.dumps({"key": key, "vector": vector}))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+            self.path.unlink(missing_ok=True)
+
+
+class EmbeddingClient:
+    """Batched, concurrent client for Ollama's ``/api/embed`` endpoint.
+
+    Texts are split into batches of ``batch_size``; at most ``max_in_flight``
+    batches are sent at once. A failed batch is retried with exponential
+    backoff and only aborts the run after ``max_retries`` attempts.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = DEFAULT_OLLAMA_URL,
+        batch_size: int = 32,
+        max_in_flight: int = 4,
+        max_retries: int = 4,
+        backoff_seconds: float = 0.5,
+        timeout: float = 120.0,
+    ):
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be at least 1")
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_in_flight),
+        )
+
+    @classmethod
+    def from_config(cls, config: ServerConfig, model: str | None = None) -> EmbeddingClient:
+        return cls(
+            model=model or config.embedding_model,
+            base_url=config.ollama_url,
+            batch_size=config.embed_batch_size,
+            max_in_flight=config.embed_max_in_flight,
+            max_retries=config.embed_max_retries,
+            backoff_seconds=config.embed_backoff_seconds,
+        )
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> EmbeddingClient:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _post(self, texts: list[str]) -> list[list[float]]:
+        response = self._http.post("/api/embed", json={"model": self.model, "input": texts})
+        response.raise_for_status()
+        vectors = response.json()["embeddings"]
+        if len(vectors) != len(texts):
+            raise EmbeddingError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        return vectors
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._post(texts)
+            except (httpx.HTTPError, EmbeddingError, KeyError, ValueError) as e:
+                if attempt == self.max_retries:
+                    raise EmbeddingError(
+                        f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = self.backoff_seconds * 2**attempt * (1 + random.random() * 0.1)
+                logger.warning(
+                    "Embedding batch failed (%s), retry %d/%d in %.2fs",
+                    e, attempt + 1, self.max_retries, delay,
+                )
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0]
+
+    def embed_documents(
+        self,
+        texts: Sequence[str],
+        checkpoint: EmbeddingCheckpoint | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> list[list[float]]:
+        results: list[list[float] | None] = [None] * len(texts)
+        todo: list[int] = []
+        for i, text in enumerate(texts):
+            cached = checkpoint.get(text) if checkpoint is not None else None
+            if cached is None:
+                todo.append(i)
+            else:
+                results[i] = cached
+        done = len(texts) - len(todo)
+        if done:
+            logger.info("Resuming from checkpoint: %d of %d chunks already embedded", done, len(texts))
+        if progress is not None:
+            progress(done, len(texts))
+
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        with ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="noteweaver-embed") as pool:
+            futures = {
+                pool.submit(self._embed_batch, [texts[i] for i in batch]): batch
+                for batch in batches
+            }
+            error: BaseException | None = None
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                batch = futures[future]
+                try:
+                    vectors = future.result()
+                except BaseException as e:
+                    # Stop queued batches but still checkpoint the ones
+                    # already in flight so a rerun does not repeat them.
+                    if error is None:
+                        error = e
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                for i, vector in zip(batch, vectors):
+                    results[i] = vector
+                if checkpoint is not None:
+                    checkpoint.add([texts[i] for i in batch], vectors)
+                done += len(batch)
+                if progress is not None:
+                    progress(done, len(texts))
+            if error is not None:
+                raise error
+        return results  # type: ignore[return-value]
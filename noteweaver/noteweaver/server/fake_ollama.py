@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_embedding(text: str, dim: int) -> list[float]:
+    """Deterministic bag-of-words hashing embedding, unit length."""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeOllamaServer:
+    """In-process HTTP stand-in for Ollama's embedding API.
+
+    Serves ``/api/embed``, ``/api/embeddings`` and ``/api/tags`` with
+    deterministic vectors. ``latency`` is added per request (plus
+    ``per_item_latency`` per input text), ``fail_rate`` makes requests
+    return 503 at random and ``fail_first`` fails the first N requests,
+    which is enough to exercise batching, concurrency and retries
+    without a real model.
+
+    Usage:
+        with FakeOllamaServer(latency=0.01) as server:
+            client = EmbeddingClient("nomic-embed-text", base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        dim: int = 256,
+        latency: float = 0.0,
+        per_item_latency: float = 0.0,
+        fail_rate: float = 0.0,
+        fail_first: int = 0,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.requests = 0
+        self.failures = 0
+        self.embedded = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> FakeOllamaServer:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True, name="fake-ollama"
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> FakeOllamaServer:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self.requests <= self.fail_first or self._random.random() < self.fail_rate
+            if fail:
+                self.failures += 1
+            return fail
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency + self.per_item_latency * len(texts))
+            return [fake_embedding(text, self.dim) for text in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.embedded += len(texts)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def _reply(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path == "/api/tags":
+                    self._reply(200, {"models": [{"name": "fake-embed"}]})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path not in ("/api/embed", "/api/embeddings"):
+                    self._reply(404, {"error": "not found"})
+                    return
+                if server._should_fail():
+                    self._reply(503, {"error": "server busy"})
+                    return
+                if self.path == "/api/embeddings":
+                    vector = server._embed([payload.get("prompt", "")])[0]
+                    self._reply(200, {"embedding": vector})
+                    return
+                texts = payload.get("input", [])
+                if isinstance(texts, str):
+                    texts = [texts]
+                self._reply(200, {"model": payload.get("model"), "embeddings": server._embed(texts)})
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Ollama embedding server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--per-item-latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        args.host, args.port, args.dim, args.latency, args.per_item_latency, args.fail_rate
+    )
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
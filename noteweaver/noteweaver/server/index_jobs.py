@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from noteweaver.logger import Logger
+from noteweaver.models import IndexJobState, IndexStatus
+from noteweaver.server import indexer
+from noteweaver.server.embeddings import EmbeddingClient
+from noteweaver.server.quantize import VectorFormat
+
+logger = Logger(name="noteweaver.index_jobs").get()
+
+
+@dataclass
+class _Request:
+    compact: bool = False
+    shards: set[str] | None = None
+
+    def merge(self, other: _Request) -> _Request:
+        if self.shards is None or other.shards is None:
+            shards = None
+        else:
+            shards = self.shards | other.shards
+        return _Request(self.compact or other.compact, shards)
+
+
+class IndexJobRunner:
+    """Run index builds on a background thread, one at a time.
+
+    A request that arrives while a build is running is coalesced into a
+    single follow-up run, so any number of concurrent POST /index calls
+    cost at most one extra build and the last one always sees the
+    latest files. Coalesced requests rebuild the union of their shards.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._status = IndexStatus()
+        self._thread: threading.Thread | None = None
+        self._rerun: _Request | None = None
+        self._phase_started = 0.0
+        self._started = 0.0
+
+    def status(self) -> IndexStatus:
+        with self._lock:
+            status = self._status.model_copy()
+            status.rerun_pending = self._rerun is not None
+            if status.state == IndexJobState.RUNNING:
+                status.eta_seconds = self._eta(status)
+            return status
+
+    def _eta(self, status: IndexStatus) -> float | None:
+        now = time.monotonic()
+        if status.phase == "embedding" and status.chunks_done and status.chunks_total:
+            rate = status.chunks_done / (now - self._phase_started)
+            return round((status.chunks_total - status.chunks_done) / rate, 1)
+        if status.phase == "scanning" and status.files_done and status.files_total:
+            # File counts add up across the shards of a sharded build, whose
+            # scans alternate with embedding and writing, so the rate is
+            # taken over the whole job rather than the current phase.
+            rate = status.files_done / (now - self._started)
+            return round((status.files_total - status.files_done) / rate, 1)
+        return None
+
+    def start(
+        self,
+        base_dir: str,
+        embedding_model: str,
+        compact: bool = False,
+        client: EmbeddingClient | None = None,
+        sharded: bool = False,
+        shards: Iterable[str] | None = None,
+        vector_format: VectorFormat | None = None,
+    ) -> IndexStatus:
+        request = _Request(compact, set(shards) if shards is not None else None)
+        with self._lock:
+            if self._status.state == IndexJobState.RUNNING:
+                self._rerun = self._rerun.merge(request) if self._rerun else request
+                logger.info("Index build %d running, coalescing request", self._status.job_id)
+            else:
+                self._begin(request)
+                self._thread = threading.Thread(
+                    target=self._run,
+                    args=(base_dir, embedding_model, request, client, sharded, vector_format),
+                    daemon=True,
+                    name="noteweaver-indexer",
+                )
+                self._thread.start()
+        return self.status()
+
+    def wait(self, timeout: float | None = None) -> IndexStatus:
+        with self._done:
+            self._done.wait_for(
+                lambda: self._status.state != IndexJobState.RUNNING,
+                timeout=timeout,
+            )
+        return self.status()
+
+    def _begin(self, request: _Request) -> None:
+        self._status = IndexStatus(
+            state=IndexJobState.RUNNING,
+            job_id=self._status.job_id + 1,
+            phase="scanning",
+            started_at=datetime.now(),
+        )
+        self._started = self._phase_started = time.monotonic()
+        logger.info(
+            "Index build %d started (compact=%s, shards=%s)",
+            self._status.job_id, request.compact, sorted(request.shards) if request.shards else "all",
+        )
+
+    def _progress(self, phase: str, done: int, total: int) -> None:
+        with self._lock:
+            status = self._status
+            if phase != status.phase:
+                status.phase = phase
+                self._phase_started = time.monotonic()
+            if phase == "scanning":
+                status.files_done, status.files_total = done, total
+            elif phase == "embedding":
+                status.chunks_done, status.chunks_total = done, total
+
+    def _run(
+        self,
+        base_dir: str,
+        embedding_model: str,
+        request: _Request,
+        client: EmbeddingClient | None,
+        sharded: bool,
+        vector_format: VectorFormat | None,
+    ) -> None:
+        while True:
+            try:
+                report = indexer.index_directory(
+                    base_dir,
+                    embedding_model,
+                    compact=request.compact,
+                    client=client,
+                    progress=self._progress,
+                    sharded=sharded,
+                    shards=request.shards,
+                    vector_format=vector_format,
+                )
+            except Exception as e:
+                logger.exception("Index build %d failed", self._status.job_id)
+                final, report, error = IndexJobState.FAILED, None, str(e)
+            else:
+                final, error = IndexJobState.DONE, None
+
+            with self._lock:
+                if self._rerun is not None:
+                    request, self._rerun = self._rerun, None
+                    self._begin(request)
+                    continue
+                self._status.state = final
+                self._status.phase = None
+                self._status.report = report
+                self._status.error = error
+                self._status.finished_at = datetime.now()
+                self._status.eta_seconds = None
+                logger.info(
+                    "Index build %d %s in %.1fs",
+                    self._status.job_id, final, time.monotonic() - self._started,
+                )
+                self._done.notify_all()
+                return
+
+
+jobs = IndexJobRunner()
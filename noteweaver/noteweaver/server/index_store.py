@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from noteweaver.logger import Logger
+from noteweaver.server import quantize
+from noteweaver.server.chunker import chunk_digest
+from noteweaver.server.quantize import VectorFormat
+from noteweaver.server.lexical import TERMS_FILE, BM25Index, write_postings
+from noteweaver.server.metadata import MetadataFilter, MetadataIndex
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+GENERATION_PREFIX = "gen-"
+FORMAT_VERSION = 5
+
+logger = Logger(name="noteweaver.index_store").get()
+
+
+def current_generation(index_dir: Path) -> str | None:
+    pointer = index_dir / CURRENT_FILE
+    if not pointer.exists():
+        return None
+    name = pointer.read_text(encoding="utf-8").strip()
+    return name if (index_dir / name).is_dir() else None
+
+
+def _next_generation(index_dir: Path) -> str:
+    numbers = [
+        int(p.name.removeprefix(GENERATION_PREFIX))
+        for p in index_dir.glob(f"{GENERATION_PREFIX}*")
+        if p.is_dir() and p.name.removeprefix(GENERATION_PREFIX).isdigit()
+    ]
+    return f"{GENERATION_PREFIX}{max(numbers, default=0) + 1:06d}"
+
+
+def write_snapshot(
+    index_dir: Path,
+    chunks: list[dict],
+    vectors: np.ndarray | list[list[float]],
+    embedding_model: str,
+    files: dict[str, dict] | None = None,
+    live: np.ndarray | None = None,
+    chunker: str = "",
+    vector_format: VectorFormat | None = None,
+    pq_codebook: quantize.ProductQuantizer | None = None,
+) -> str:
+    """Write a new index generation and atomically point CURRENT at it.
+
+    Vectors are stored pre-normalized as a float32 ``.npy``; chunk texts
+    are concatenated into one UTF-8 blob with an offsets array so they
+    can be memory-mapped and only decoded for returned results.
+    ``files`` is the per-file manifest (content hash and chunk ids) and
+    ``live`` marks rows that have not been tombstoned. With an int8 or
+    PQ ``vector_format`` the compressed codes are written as well, and
+    the float store only if ``keep_float`` is set. With ``pq_codebook``
+    the rows of ``vectors`` already are PQ codes under that codebook and
+    are written as they are, without a float store.
+    """
+    vector_format = vector_format or VectorFormat()
+    index_dir.mkdir(parents=True, exist_ok=True)
+    generation = _next_generation(index_dir)
+    tmp_dir = index_dir / f"{generation}.tmp"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir()
+
+    if pq_codebook is not None:
+        codes = np.asarray(vectors, dtype=np.uint8).reshape(len(chunks), len(pq_codebook.centroids))
+        quantize.ProductQuantizer(pq_codebook.centroids, codes).save(tmp_dir)
+        dim = pq_codebook.dim
+    else:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if not chunks:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        elif matrix.ndim != 2:
+            matrix = matrix.reshape(len(chunks), -1)
+        matrix = quantize.normalize(matrix).astype(np.float32)
+        if vector_format.keep_float:
+            np.save(tmp_dir / "vectors.npy", matrix)
+        codec = quantize.encode(matrix, vector_format)
+        if codec is not None:
+            codec.save(tmp_dir)
+        dim = int(matrix.shape[1])
+
+    sources: list[str] = []
+    source_ids: dict[str, int] = {}
+    chunk_source = np.empty(len(chunks), dtype=np.int32)
+    chunk_pos = np.empty(len(chunks), dtype=np.int32)
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    hashes = np.empty(len(chunks), dtype=np.uint64)
+    with open(tmp_dir / "texts.bin", "wb") as f:
+        for i, chunk in enumerate(chunks):
+            source = chunk["source"]
+            if source not in source_ids:
+                source_ids[source] = len(sources)
+                sources.append(source)
+            chunk_source[i] = source_ids[source]
+            chunk_pos[i] = chunk["chunk_index"]
+            hashes[i] = chunk_digest(chunk["text"])
+            encoded = chunk["text"].encode("utf-8")
+            f.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+    np.save(tmp_dir / "chunk_source.npy", chunk_source)
+    np.save(tmp_dir / "chunk_pos.npy", chunk_pos)
+    np.save(tmp_dir / "text_offsets.npy", offsets)
+    np.save(tmp_dir / "chunk_hash.npy", hashes)
+    if live is None:
+        live = np.ones(len(chunks), dtype=bool)
+    np.save(tmp_dir / "live.npy", np.asarray(live, dtype=bool))
+    write_postings(tmp_dir, (chunk["text"] for chunk in chunks))
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "generation": generation,
+        "embedding_model": embedding_model,
+        "chunker": chunker,
+        "vector_format": vector_format.kind,
+        "rerank_factor": vector_format.rerank_factor,
+        "count": len(chunks),
+        "live_count": int(np.count_nonzero(live)),
+        "dim": dim,
+        "sources": sources,
+        "files": files or {},
+    }
+    (tmp_dir / MANIFEST_FILE).write_text(json.dumps(manifest), encoding="utf-8")
+
+    tmp_dir.rename(index_dir / generation)
+    pointer_tmp = index_dir / f"{CURRENT_FILE}.tmp"
+    pointer_tmp.write_text(generation, encoding="utf-8")
+    os.replace(pointer_tmp, index_dir / CURRENT_FILE)
+    _prune_generations(index_dir, keep=2)
+    logger.info("Wrote index generation %s (%d chunks)", generation, len(chunks))
+    return generation
+
+
+def _prune_generations(index_dir: Path, keep: int) -> None:
+    """Remove all but the newest ``keep`` generations.
+
+    Snapshots still mapped by in-flight searches stay readable after
+    their files are unlinked, so pruning never blocks a swap.
+    """
+    generations = sorted(
+        p for p in index_dir.glob(f"{GENERATION_PREFIX}*")
+        if p.is_dir() and not p.name.endswith(".tmp")
+    )
+    for old in generations[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+class IndexSnapshot:
+    """A read-only, memory-mapped index generation."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        manifest = json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        self.generation: str = manifest["generation"]
+        self.embedding_model: str = manifest["embedding_model"]
+        self.chunker: str = manifest.get("chunker", "")
+        self.vector_format: str = manifest.get("vector_format", quantize.FLOAT32)
+        self.rerank_factor: int = manifest.get("rerank_factor", 4)
+        self.sources: list[str] = manifest["sources"]
+        self.files: dict[str, dict] = manifest["files"]
+        self.count: int = manifest["count"]
+        self.live_count: int = manifest["live_count"]
+        mmap_mode = "r" if self.count else None
+        vectors_path = path / "vectors.npy"
+        self.vectors = np.load(vectors_path, mmap_mode=mmap_mode) if vectors_path.exists() else None
+        self.codec = quantize.load(path, self.vector_format, mmap_mode)
+        self.chunk_source = np.load(path / "chunk_source.npy", mmap_mode=mmap_mode)
+        self.chunk_pos = np.load(path / "chunk_pos.npy", mmap_mode=mmap_mode)
+        self.text_offsets = np.load(path / "text_offsets.npy")
+        texts_path = path / "texts.bin"
+        if texts_path.stat().st_size:
+            self._texts = np.memmap(texts_path, dtype=np.uint8, mode="r")
+        else:
+            self._texts = np.zeros(0, dtype=np.uint8)
+        self.live = np.load(path / "live.npy")
+        hash_path = path / "chunk_hash.npy"
+        if hash_path.exists():
+            self.chunk_hash = np.load(hash_path)
+        else:
+            self.chunk_hash = np.array(
+                [chunk_digest(self.text(i)) for i in range(self.count)], dtype=np.uint64
+            )
+        if not (path / TERMS_FILE).exists():
+            # Generations written before lexical search: build postings once.
+            write_postings(path, (self.text(i) for i in range(self.count)))
+        self.lexical = BM25Index(path, self.live)
+        self.metadata = MetadataIndex(self.files)
+
+    @classmethod
+    def open_current(cls, index_dir: Path) -> IndexSnapshot | None:
+        generation = current_generation(index_dir)
+        if generation is None:
+            return None
+        return cls(index_dir / generation)
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    @property
+    def tombstones(self) -> int:
+        return self.count - self.live_count
+
+    def source(self, i: int) -> str:
+        return self.sources[int(self.chunk_source[i])]
+
+    def text(self, i: int) -> str:
+        start, end = self.text_offsets[i], self.text_offsets[i + 1]
+        return self._texts[start:end].tobytes().decode("utf-8")
+
+    def _top_k(
+        self, scores: np.ndarray, top_k: int, rows: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """Best ``top_k`` of ``scores``, which are per row of ``rows`` if given.
+
+        Filtered rows are always live, so only full scans mask tombstones.
+        """
+        if rows is None:
+            if self.tombstones:
+                scores[~self.live] = -np.inf
+            ids = None
+        else:
+            ids = rows
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(ids[i]) if ids is not None else int(i), float(scores[i]))
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def filter_rows(self, flt: MetadataFilter | None) -> np.ndarray | None:
+        """Live chunk ids matching ``flt``, or None to search every row."""
+        if not flt:
+            return None
+        return self.metadata.rows_for(flt)
+
+    def float_vectors(self, rows: np.ndarray | slice = slice(None)) -> np.ndarray:
+        """Exact vectors if the float store was kept, else decoded codes."""
+        if self.vectors is not None:
+            return np.asarray(self.vectors[rows], dtype=np.float32)
+        return self.codec.decode(rows)
+
+    def search(
+        self, query_vector: np.ndarray, top_k: int, rows: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """Return (chunk id, cosine similarity) for the top_k live chunks.
+
+        Compressed indexes score every row on the codes, then re-rank the
+        best ``top_k * rerank_factor`` candidates against the float store
+        when it exists. ``rows`` (from :meth:`filter_rows`) restricts
+        scoring to those chunks.
+        """
+        if self.live_count == 0 or top_k <= 0 or (rows is not None and not len(rows)):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        if self.codec is None:
+            vectors = self.vectors if rows is None else self.vectors[rows]
+            return self._top_k(vectors @ query, top_k, rows)
+
+        candidates = self._top_k(self.codec.scores(query, rows), top_k * self.rerank_factor, rows)
+        if self.vectors is None or not candidates:
+            return candidates[:top_k]
+        candidate_rows = np.sort([i for i, _ in candidates])
+        exact = np.asarray(self.vectors[candidate_rows], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:top_k]
+        return [(int(candidate_rows[i]), float(exact[i])) for i in order]
+
+    def lexical_search(
+        self, query: str, top_k: int, rows: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """Return (chunk id, BM25 score) for the top_k live chunks matching a query term."""
+        if self.live_count == 0 or top_k <= 0 or (rows is not None and not len(rows)):
+            return []
+        scores = self.lexical.scores(query, rows)
+        scores[scores <= 0] = -np.inf
+        return self._top_k(scores, top_k, rows)
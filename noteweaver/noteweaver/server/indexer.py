@@ -1,115 +1,677 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
+import itertools
 import json
+import os
+import shutil
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
-from langchain_ollama import OllamaEmbeddings
-
 from noteweaver.logger import Logger
-from noteweaver.models import SearchResult
+from noteweaver.models import IndexReport, SearchCacheStats, SearchMode, SearchResult, ShardInfo
+from noteweaver.server import metrics
+from noteweaver.server.chunker import CHUNKER_VERSION, chunk_digest, iter_chunks
+from noteweaver.server.embeddings import EmbeddingCheckpoint, EmbeddingClient
+from noteweaver.server.index_store import IndexSnapshot, current_generation, write_snapshot
+from noteweaver.server.lexical import reciprocal_rank_fusion
+from noteweaver.server.lru import LRUCache
+from noteweaver.server.metadata import MetadataFilter, watch_frontmatter
+from noteweaver.server.quantize import PQ, ProductQuantizer, VectorFormat, normalize
 
 INDEX_DIR_NAME = ".noteweaver_index"
-INDEX_FILE = "index.json"
+SHARDS_DIR = "shards"
+# Shard name of an unsharded index, and of files directly under base_dir
+# in a sharded one.
+UNSHARDED = ""
+ROOT_SHARD = "_root"
+LEGACY_INDEX_FILE = "index.json"
+CHECKPOINT_FILE = "embed-checkpoint.jsonl"
 SUPPORTED_EXTENSIONS = {".txt", ".md"}
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+# Rewrite the index without dead rows once this share of it is tombstoned.
+COMPACT_TOMBSTONE_RATIO = 0.25
+# Hybrid search fuses this many candidates (at least) from each ranker.
+HYBRID_CANDIDATES = 50
+SEARCH_THREADS = min(8, os.cpu_count() or 1)
 
 logger = Logger(name="noteweaver.indexer").get()
 
+# Called as progress(phase, done, total) with phase one of "scanning"
+# (files), "embedding" (chunks) or "writing".
+ProgressCallback = Callable[[str, int, int], None]
 
-def _split_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    if len(text) <= chunk_size:
-        return [text] if text.strip() else []
-    chunks: list[str] = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        if chunk.strip():
-            chunks.append(chunk)
-        start += chunk_size - overlap
-    return chunks
+_index_lock = threading.Lock()
 
+# Loaded shard snapshots per base dir. The inner dict is never mutated:
+# a re-index publishes a new one, so searches grab a reference under the
+# lock and score without it while older requests finish on the old one.
+_indexes: dict[Path, dict[str, IndexSnapshot]] = {}
+_indexes_lock = threading.Lock()
+_search_pool = ThreadPoolExecutor(SEARCH_THREADS, thread_name_prefix="noteweaver-search")
 
-def _index_path(base_dir: Path) -> Path:
-    return base_dir / INDEX_DIR_NAME / INDEX_FILE
+# Query vectors keyed by (model, normalized query) and result lists keyed
+# by index generation, so a swap invalidates results but not embeddings.
+_query_cache = LRUCache(1024)
+_result_cache = LRUCache(256)
 
 
-def _collect_chunks(base_dir: Path) -> list[dict]:
-    chunks: list[dict] = []
+def _index_dir(base_dir: Path) -> Path:
+    return base_dir / INDEX_DIR_NAME
+
+
+def _migrate_legacy_index(base_dir: Path, embedding_model: str) -> bool:
+    legacy = _index_dir(base_dir) / LEGACY_INDEX_FILE
+    if not legacy.exists():
+        return False
+    logger.info("Converting legacy JSON index at %s", legacy)
+    index_data = json.loads(legacy.read_text(encoding="utf-8"))
+    if index_data["chunks"]:
+        # No hashes were recorded, so every file counts as changed on the
+        # next index run; until then the old vectors keep serving search.
+        files: dict[str, dict] = {}
+        for i, chunk in enumerate(index_data["chunks"]):
+            entry = files.setdefault(chunk["source"], {"hash": "", "mtime_ns": 0, "size": -1, "chunks": []})
+            entry["chunks"].append(i)
+        write_snapshot(
+            _index_dir(base_dir), index_data["chunks"], index_data["vectors"], embedding_model, files
+        )
+    legacy.unlink()
+    return bool(index_data["chunks"])
+
+
+def shard_of(rel_path: str) -> str:
+    parts = Path(rel_path).parts
+    return parts[0] if len(parts) > 1 else ROOT_SHARD
+
+
+def _is_sharded(base_dir: Path) -> bool:
+    return (_index_dir(base_dir) / SHARDS_DIR).is_dir()
+
+
+def _shard_dir(base_dir: Path, name: str) -> Path:
+    if name == UNSHARDED:
+        return _index_dir(base_dir)
+    return _index_dir(base_dir) / SHARDS_DIR / name
+
+
+def _shard_names(base_dir: Path) -> list[str]:
+    if not _is_sharded(base_dir):
+        return [UNSHARDED]
+    return sorted(p.name for p in (_index_dir(base_dir) / SHARDS_DIR).iterdir() if p.is_dir())
+
+
+def _publish(base_dir: Path, shards: dict[str, IndexSnapshot]) -> None:
+    with _indexes_lock:
+        _indexes[base_dir] = shards
+    _result_cache.clear()
+
+
+def configure_caches(query_cache_size: int, result_cache_size: int) -> None:
+    _query_cache.resize(query_cache_size)
+    _result_cache.resize(result_cache_size)
+
+
+def cache_stats() -> SearchCacheStats:
+    return SearchCacheStats(
+        query_embeddings=_query_cache.counters(),
+        results=_result_cache.counters(),
+    )
+
+
+def _normalize_query(query: str, mode: SearchMode) -> str:
+    """The cache key form of a query.
+
+    Whitespace is collapsed in every mode. Case is folded only for lexical
+    search, whose tokenizer lowercases anyway; the embedding model is
+    case-sensitive.
+    """
+    normalized = " ".join(query.split())
+    return normalized.casefold() if mode == SearchMode.LEXICAL else normalized
+
+
+def load_index(base_dir: str, embedding_model: str = "") -> dict[str, IndexSnapshot]:
+    base = Path(base_dir).resolve()
+    if not _is_sharded(base) and current_generation(_index_dir(base)) is None:
+        _migrate_legacy_index(base, embedding_model)
+    shards: dict[str, IndexSnapshot] = {}
+    for name in _shard_names(base):
+        snapshot = IndexSnapshot.open_current(_shard_dir(base, name))
+        if snapshot is not None:
+            shards[name] = snapshot
+            logger.info(
+                "Loaded index %s%s (%d chunks)",
+                f"shard {name} " if name else "", snapshot.generation, len(snapshot),
+            )
+    _publish(base, shards)
+    return shards
+
+
+def shard_info(base_dir: str) -> list[ShardInfo]:
+    return [
+        ShardInfo(name=name, generation=snapshot.generation, chunks=len(snapshot), files=len(snapshot.files))
+        for name, snapshot in sorted(get_shards(base_dir).items())
+    ]
+
+
+def loaded_shards(base_dir: str) -> dict[str, IndexSnapshot]:
+    """The shards currently loaded for base_dir, without loading them."""
+    with _indexes_lock:
+        return _indexes.get(Path(base_dir).resolve(), {})
+
+
+def get_shards(base_dir: str) -> dict[str, IndexSnapshot]:
+    base = Path(base_dir).resolve()
+    with _indexes_lock:
+        shards = _indexes.get(base)
+    if shards is None:
+        shards = load_index(base_dir)
+    return shards
+
+
+def _scan_files(base_dir: Path) -> dict[str, Path]:
+    files: dict[str, Path] = {}
     for ext in SUPPORTED_EXTENSIONS:
         for file_path in base_dir.rglob(f"*{ext}"):
             if INDEX_DIR_NAME in file_path.parts:
                 continue
-            try:
-                text = file_path.read_text(encoding="utf-8")
-            except Exception:
-                logger.warning("Skipping unreadable file %s", file_path)
-                continue
-            rel_path = str(file_path.relative_to(base_dir))
-            split = _split_text(text)
-            for i, chunk in enumerate(split):
-                chunks.append({"source": rel_path, "chunk_index": i, "text": chunk})
-    return chunks
+            files[str(file_path.relative_to(base_dir))] = file_path
+    return files
 
 
-def index_directory(base_dir: str, embedding_model: str) -> int:
-    base = Path(base_dir).resolve()
+def _stream_lines(file_path: Path, hasher) -> Iterator[str]:
+    with open(file_path, "rb") as f:
+        for raw in f:
+            hasher.update(raw)
+            yield raw.decode("utf-8")
+
+
+def _file_unchanged(entry: dict | None, stat) -> bool:
+    # Entries written before tags were extracted need one re-read.
+    return (
+        entry is not None
+        and "tags" in entry
+        and entry["mtime_ns"] == stat.st_mtime_ns
+        and entry["size"] == stat.st_size
+    )
+
+
+def index_directory(
+    base_dir: str,
+    embedding_model: str,
+    compact: bool = False,
+    client: EmbeddingClient | None = None,
+    progress: ProgressCallback | None = None,
+    sharded: bool = False,
+    shards: Iterable[str] | None = None,
+    vector_format: VectorFormat | None = None,
+) -> IndexReport:
+    """Bring the index of base_dir up to date.
+
+    With ``sharded`` every top-level directory gets its own index (files
+    directly in base_dir go to the ``_root`` shard) and ``shards``
+    restricts the run to those shards; the others are left untouched.
+    ``vector_format`` selects float32, int8 or product-quantized storage.
+    """
+    # Only one build per process; searches keep using the loaded snapshots
+    # until the new generations are published at the very end.
+    with _index_lock:
+        outcome = "failed"
+        start = time.perf_counter()
+        try:
+            report = _index_directory(
+                Path(base_dir).resolve(),
+                embedding_model,
+                compact,
+                client,
+                progress or _no_progress,
+                sharded,
+                set(shards) if shards is not None else None,
+                vector_format or VectorFormat(),
+            )
+            outcome = "done"
+        finally:
+            metrics.INDEX_BUILD_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+        metrics.INDEX_EMBEDDED_CHUNKS.inc(report.embedded_chunks)
+        return report
+
+
+def _no_progress(phase: str, done: int, total: int) -> None:
+    pass
+
+
+def _index_directory(
+    base: Path,
+    embedding_model: str,
+    compact: bool,
+    client: EmbeddingClient | None,
+    progress: ProgressCallback,
+    sharded: bool,
+    only: set[str] | None,
+    vector_format: VectorFormat,
+) -> IndexReport:
     logger.info("Indexing directory %s with model %s", base, embedding_model)
+    current = get_shards(str(base))
+    layout_changed = sharded != _is_sharded(base) and bool(current)
+    if layout_changed:
+        logger.info("Index layout changed (sharded=%s), rebuilding all shards", sharded)
+        only = None
+
+    groups: dict[str, list[tuple[str, Path]]] = {}
+    scanned = sorted(_scan_files(base).items())
+    for rel_path, file_path in scanned:
+        groups.setdefault(shard_of(rel_path) if sharded else UNSHARDED, []).append((rel_path, file_path))
+    if not layout_changed:
+        for name in current:
+            groups.setdefault(name, [])
+    targets = sorted(name for name in groups if only is None or name in only)
+
+    report = IndexReport()
+    published = {} if layout_changed else dict(current)
+    offset = 0
+    total_files = sum(len(groups[name]) for name in targets)
+    for name in targets:
+        previous = None if layout_changed else current.get(name)
+        reuse = list(current.values()) if layout_changed else [previous] if previous else []
+        shard_progress = _offset_progress(progress, offset, total_files)
+        offset += len(groups[name])
+        if not groups[name]:
+            if previous is not None:
+                logger.info("Removing empty shard %s", name)
+                report.removed += len(previous.files)
+                published.pop(name, None)
+                shutil.rmtree(_shard_dir(base, name), ignore_errors=True)
+            continue
+        shard_report, snapshot = _index_shard(
+            _shard_dir(base, name), groups[name], previous, reuse,
+            embedding_model, compact, client, shard_progress, vector_format,
+        )
+        _merge_reports(report, shard_report)
+        if snapshot is not None:
+            published[name] = snapshot
+            if sharded:
+                report.shards[name] = snapshot.generation
+            else:
+                report.generation = snapshot.generation
+
+    _publish(base, published)
+    if layout_changed:
+        _remove_layout(base, sharded=not sharded)
+    report.indexed_chunks = sum(len(snapshot) for snapshot in published.values())
+    report.tombstones = sum(snapshot.tombstones for snapshot in published.values())
+    logger.info(
+        "Indexed %s: %d added, %d updated, %d removed, %d chunks embedded, %d live chunks",
+        base, report.added, report.updated, report.removed, report.embedded_chunks, report.indexed_chunks,
+    )
+    return report
+
+
+def _offset_progress(progress: ProgressCallback, offset: int, total: int) -> ProgressCallback:
+    def report(phase: str, done: int, phase_total: int) -> None:
+        if phase == "scanning":
+            progress(phase, offset + done, total)
+        else:
+            progress(phase, done, phase_total)
+    return report
+
+
+def _merge_reports(total: IndexReport, shard: IndexReport) -> None:
+    total.added += shard.added
+    total.updated += shard.updated
+    total.removed += shard.removed
+    total.embedded_chunks += shard.embedded_chunks
+    total.deduplicated_chunks += shard.deduplicated_chunks
+    total.compacted = total.compacted or shard.compacted
+
+
+def _remove_layout(base_dir: Path, sharded: bool) -> None:
+    index_dir = _index_dir(base_dir)
+    if sharded:
+        shutil.rmtree(index_dir / SHARDS_DIR, ignore_errors=True)
+        return
+    (index_dir / "CURRENT").unlink(missing_ok=True)
+    for path in index_dir.glob("gen-*"):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _frozen_codebook(previous: IndexSnapshot | None, vector_format: VectorFormat) -> ProductQuantizer | None:
+    """The previous PQ codebook, if its codes are all that is stored.
+
+    Without a float store the exact vectors are gone, and decoding the
+    codes to retrain on them would add quantization error on every
+    re-index. Existing rows keep their codes instead and only new chunks
+    are encoded; a build with ``keep_float`` retrains from exact vectors.
+    """
+    if previous is None or vector_format.kind != PQ or vector_format.keep_float:
+        return None
+    codec = previous.codec
+    if previous.vectors is not None or not isinstance(codec, ProductQuantizer):
+        return None
+    if len(codec.centroids) != min(vector_format.pq_subvectors, codec.dim):
+        return None
+    return codec
+
+
+def _known_vectors(
+    snapshots: list[IndexSnapshot], codebook: ProductQuantizer | None = None
+) -> dict[int, np.ndarray]:
+    """Live rows by chunk hash: float vectors, or codes under ``codebook``."""
+    known: dict[int, np.ndarray] = {}
+    for snapshot in snapshots:
+        if not snapshot.count:
+            continue
+        live_rows = np.flatnonzero(snapshot.live)
+        if codebook is None:
+            rows = snapshot.float_vectors(live_rows)
+        elif snapshot.codec is codebook:
+            rows = np.asarray(codebook.codes[live_rows])
+        else:
+            continue
+        known.update(zip((int(h) for h in snapshot.chunk_hash[live_rows]), rows))
+    return known
+
+
+def _index_shard(
+    shard_dir: Path,
+    scanned: list[tuple[str, Path]],
+    previous: IndexSnapshot | None,
+    reuse: list[IndexSnapshot],
+    embedding_model: str,
+    compact: bool,
+    client: EmbeddingClient | None,
+    progress: ProgressCallback,
+    vector_format: VectorFormat,
+) -> tuple[IndexReport, IndexSnapshot | None]:
+    if previous is not None and previous.embedding_model != embedding_model:
+        logger.info(
+            "Embedding model changed (%s -> %s), rebuilding %s",
+            previous.embedding_model, embedding_model, shard_dir,
+        )
+        previous = None
+    reuse = [snapshot for snapshot in reuse if snapshot.embedding_model == embedding_model]
+    old_files = previous.files if previous is not None else {}
+
+    # A new chunker invalidates the stored chunks of every file, but
+    # identical chunk texts can still reuse their old vectors below.
+    rechunk = previous is not None and previous.chunker != CHUNKER_VERSION
+
+    report = IndexReport()
+    files: dict[str, dict] = {}
+    pending: list[dict] = []
+    pending_files: dict[str, dict] = {}
+    for done, (rel_path, file_path) in enumerate(scanned):
+        progress("scanning", done, len(scanned))
+        old = old_files.get(rel_path)
+        try:
+            stat = file_path.stat()
+            if not rechunk and _file_unchanged(old, stat):
+                files[rel_path] = old
+                continue
+            hasher = hashlib.sha256()
+            tags: list[str] = []
+            texts = list(iter_chunks(watch_frontmatter(_stream_lines(file_path, hasher), tags)))
+        except Exception:
+            logger.warning("Skipping unreadable file %s", file_path)
+            if old is not None:
+                files[rel_path] = old
+            continue
+        digest = hasher.hexdigest()
+        if not rechunk and old is not None and old["hash"] == digest:
+            files[rel_path] = {**old, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "tags": tags}
+            continue
+        if old is None:
+            report.added += 1
+        else:
+            report.updated += 1
+        pending_files[rel_path] = {
+            "hash": digest, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "tags": tags, "chunks": [],
+        }
+        for i, text in enumerate(texts):
+            pending.append({"source": rel_path, "chunk_index": i, "text": text})
+    progress("scanning", len(scanned), len(scanned))
+    report.removed = len(old_files.keys() - files.keys() - pending_files.keys())
+
+    reformat = previous is not None and (
+        previous.vector_format != vector_format.kind
+        or (previous.vectors is not None) != vector_format.keep_float
+    )
+    touched = reformat or report.added or report.updated or report.removed or any(
+        files[p] is not old_files.get(p) for p in files
+    )
+    if previous is not None and not touched and not compact:
+        logger.info("Index is up to date (%s)", previous.generation)
+        return report, previous
+    if previous is None and not pending:
+        logger.info("No documents found to index in %s", shard_dir)
+        return report, None
+
+    # Embed each distinct chunk text once: boilerplate shared across
+    # files, or already present in the current index, is looked up by
+    # content hash instead of being sent to the embedding server again.
+    codebook = _frozen_codebook(previous, vector_format)
+    known = _known_vectors(reuse, codebook)
+    digests = [chunk_digest(c["text"]) for c in pending]
+    to_embed: dict[int, str] = {}
+    for digest, chunk in zip(digests, pending):
+        if digest not in known:
+            to_embed.setdefault(digest, chunk["text"])
+
+    checkpoint = EmbeddingCheckpoint(shard_dir / CHECKPOINT_FILE, embedding_model)
+    progress("embedding", 0, len(to_embed))
+    if to_embed:
+        owned = client is None
+        client = client or EmbeddingClient(embedding_model)
+        try:
+            embedded = client.embed_documents(
+                list(to_embed.values()),
+                checkpoint=checkpoint,
+                progress=lambda done, total: progress("embedding", done, total),
+            )
+        finally:
+            if owned:
+                client.close()
+        fresh = np.asarray(embedded, dtype=np.float32)
+        if codebook is not None:
+            fresh = codebook.encode(normalize(fresh))
+        known.update(zip(to_embed, fresh))
+    new_vectors = [known[digest] for digest in digests]
+    report.embedded_chunks = len(to_embed)
+    report.deduplicated_chunks = len(pending) - len(to_embed)
+
+    # Keep every existing row so chunk ids stay stable; rows of changed
+    # or deleted files become tombstones until the next compaction.
+    chunks: list[dict] = []
+    vectors: list[np.ndarray] = []
+    live: list[bool] = []
+    if previous is not None and previous.count:
+        kept = {i for entry in files.values() for i in entry["chunks"]}
+        for i in range(previous.count):
+            chunks.append({
+                "source": previous.source(i),
+                "chunk_index": int(previous.chunk_pos[i]),
+                "text": previous.text(i),
+            })
+            live.append(bool(previous.live[i]) and i in kept)
+        vectors.append(np.asarray(codebook.codes) if codebook is not None else previous.float_vectors())
+    for chunk in pending:
+        pending_files[chunk["source"]]["chunks"].append(len(chunks))
+        chunks.append(chunk)
+        live.append(True)
+    if new_vectors:
+        vectors.append(np.stack(new_vectors))
+    files.update(pending_files)
 
-    chunks = _collect_chunks(base)
-    if not chunks:
-        logger.info("No documents found to index")
-        return 0
+    progress("writing", 0, len(chunks))
+    live_mask = np.array(live, dtype=bool)
+    dead = len(live_mask) - int(live_mask.sum())
+    if compact or (chunks and dead / len(chunks) > COMPACT_TOMBSTONE_RATIO):
+        chunks, vectors, files, live_mask = _compact(chunks, vectors, files, live_mask)
+        report.compacted = True
 
-    embeddings = OllamaEmbeddings(model=embedding_model)
-    texts = [c["text"] for c in chunks]
-    vectors = embeddings.embed_documents(texts)
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    generation = write_snapshot(
+        shard_dir, chunks, matrix, embedding_model, files, live_mask,
+        chunker=CHUNKER_VERSION, vector_format=vector_format, pq_codebook=codebook,
+    )
+    checkpoint.clear()
+    return report, IndexSnapshot(shard_dir / generation)
 
-    index_data = {
-        "chunks": chunks,
-        "vectors": [v for v in vectors],
+
+def _compact(
+    chunks: list[dict],
+    vectors: list[np.ndarray],
+    files: dict[str, dict],
+    live: np.ndarray,
+) -> tuple[list[dict], list[np.ndarray], dict[str, dict], np.ndarray]:
+    keep = np.flatnonzero(live)
+    remap = {int(old): new for new, old in enumerate(keep)}
+    matrix = np.concatenate(vectors)[keep] if vectors else np.zeros((0, 0), dtype=np.float32)
+    compacted_files = {
+        path: {**entry, "chunks": [remap[i] for i in entry["chunks"]]}
+        for path, entry in files.items()
     }
+    logger.info("Compacting index: dropping %d tombstoned chunks", len(chunks) - len(keep))
+    return [chunks[i] for i in keep], [matrix], compacted_files, np.ones(len(keep), dtype=bool)
 
-    index_file = _index_path(base)
-    index_file.parent.mkdir(parents=True, exist_ok=True)
-    index_file.write_text(json.dumps(index_data), encoding="utf-8")
 
-    logger.info("Indexed %d chunks from %s", len(chunks), base)
-    return len(chunks)
+def _embed_query(
+    query: str, normalized: str, embedding_model: str, client: EmbeddingClient | None
+) -> np.ndarray:
+    """Embed the query as typed, cached under its normalized form."""
+    key = (embedding_model, normalized)
+    vector = _query_cache.get(key)
+    if vector is not None:
+        return vector
+    if client is None:
+        with EmbeddingClient(embedding_model) as client:
+            vector = np.array(client.embed_query(query), dtype=np.float32)
+    else:
+        vector = np.array(client.embed_query(query), dtype=np.float32)
+    vector.flags.writeable = False
+    _query_cache.put(key, vector)
+    return vector
 
 
-def search(query: str, base_dir: str, embedding_model: str, top_k: int = 5) -> list[SearchResult]:
-    base = Path(base_dir).resolve()
-    index_file = _index_path(base)
+# A hit is (score, shard name, chunk id).
+Hit = tuple[float, str, int]
 
-    if not index_file.exists():
-        return []
 
-    index_data = json.loads(index_file.read_text(encoding="utf-8"))
-    chunks = index_data["chunks"]
-    vectors = np.array(index_data["vectors"])
+# A shard to search: (name, snapshot, filtered rows or None for all).
+ShardRows = tuple[str, IndexSnapshot, np.ndarray | None]
 
-    embeddings = OllamaEmbeddings(model=embedding_model)
-    query_vector = np.array(embeddings.embed_query(query))
 
-    # Cosine similarity
-    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
-    norms = np.where(norms == 0, 1, norms)
-    similarities = vectors @ query_vector / norms
+def _fan_out(
+    shards: list[ShardRows],
+    rank: Callable[[IndexSnapshot, np.ndarray | None], list[tuple[int, float]]],
+    top_k: int,
+) -> list[Hit]:
+    def run(item: ShardRows) -> list[Hit]:
+        name, snapshot, rows = item
+        return [(score, name, i) for i, score in rank(snapshot, rows)]
 
-    top_indices = np.argsort(similarities)[::-1][:top_k]
+    if len(shards) == 1:
+        return run(shards[0])
+    per_shard = _search_pool.map(run, shards)
+    return heapq.nlargest(top_k, itertools.chain.from_iterable(per_shard), key=lambda hit: hit[0])
 
-    return [
+
+def search(
+    query: str,
+    base_dir: str,
+    embedding_model: str,
+    top_k: int = 5,
+    client: EmbeddingClient | None = None,
+    mode: SearchMode = SearchMode.VECTOR,
+    shards: Iterable[str] | None = None,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[SearchResult]:
+    """Search the loaded index of base_dir.
+
+    ``metadata_filter`` narrows the candidate chunks before any scoring,
+    so a filtered search only touches the vectors of matching notes.
+    """
+    with metrics.SEARCH_SECONDS.time(mode=mode.value):
+        return _search(query, base_dir, embedding_model, top_k, client, mode, shards, metadata_filter)
+
+
+def _search(
+    query: str,
+    base_dir: str,
+    embedding_model: str,
+    top_k: int,
+    client: EmbeddingClient | None,
+    mode: SearchMode,
+    shards: Iterable[str] | None,
+    metadata_filter: MetadataFilter | None,
+) -> list[SearchResult]:
+    loaded = get_shards(base_dir)
+    wanted = set(shards) if shards is not None else None
+    flt = metadata_filter or None
+    if flt is not None and flt.path_prefix and UNSHARDED not in loaded:
+        # Only the shard of the prefix's top-level directory can match; a
+        # single component may also name a file directly in base_dir.
+        parts = flt.path_prefix.split("/")
+        prefix_shards = {parts[0]} if len(parts) > 1 else {parts[0], ROOT_SHARD}
+        wanted = prefix_shards if wanted is None else wanted & prefix_shards
+    selected = [
+        (name, snapshot)
+        for name, snapshot in sorted(loaded.items())
+        if (wanted is None or name in wanted) and len(snapshot)
+    ]
+    if not selected:
+        return []
+
+    normalized = _normalize_query(query, mode)
+    result_key = (
+        str(Path(base_dir).resolve()),
+        tuple((name, snapshot.generation) for name, snapshot in selected),
+        embedding_model, mode, normalized, top_k, flt.key() if flt is not None else None,
+    )
+    cached = _result_cache.get(result_key)
+    if cached is not None:
+        return list(cached)
+
+    filtered = [(name, snapshot, snapshot.filter_rows(flt)) for name, snapshot in selected]
+    filtered = [(name, snapshot, rows) for name, snapshot, rows in filtered if rows is None or len(rows)]
+    if not filtered:
+        _result_cache.put(result_key, ())
+        return []
+
+    if mode == SearchMode.LEXICAL:
+        hits = _fan_out(filtered, lambda s, rows: s.lexical_search(query, top_k, rows), top_k)
+    elif mode == SearchMode.VECTOR:
+        query_vector = _embed_query(query, normalized, embedding_model, client)
+        hits = _fan_out(filtered, lambda s, rows: s.search(query_vector, top_k, rows), top_k)
+    else:
+        # BM25 scores are only comparable within a shard, but rank fusion
+        # only needs each ranker's merged order.
+        candidates = max(top_k, HYBRID_CANDIDATES)
+        query_vector = _embed_query(query, normalized, embedding_model, client)
+        lexical = _fan_out(filtered, lambda s, rows: s.lexical_search(query, candidates, rows), candidates)
+        dense = _fan_out(filtered, lambda s, rows: s.search(query_vector, candidates, rows), candidates)
+        fused = reciprocal_rank_fusion(
+            [[(name, i) for _, name, i in lexical], [(name, i) for _, name, i in dense]]
+        )[:top_k]
+        hits = [(score, name, i) for (name, i), score in fused]
+
+    results = [
         SearchResult(
-            path=chunks[i]["source"],
-            chunk=chunks[i]["text"],
-            score=round(float(similarities[i]), 4),
+            path=loaded[name].source(i),
+            chunk=loaded[name].text(i),
+            score=round(score, 4),
         )
-        for i in top_indices
+        for score, name, i in hits
     ]
+    _result_cache.put(result_key, tuple(results))
+    return results
 
 
 def index_exists(base_dir: str) -> bool:
-    return _index_path(Path(base_dir).resolve()).exists()
+    base = Path(base_dir).resolve()
+    if (_index_dir(base) / LEGACY_INDEX_FILE).exists():
+        return True
+    return any(current_generation(_shard_dir(base, name)) is not None for name in _shard_names(base))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from collections.abc import Hashable, Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+TERMS_FILE = "terms.json"
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+# Keep identifiers like ERR_CONN-42, v1.2.3 or foo::bar as one token, and
+# additionally index their parts so "conn" still matches.
+_TOKEN_RE = re.compile(r"\w+(?:[-_.:/]+\w+)*")
+_PART_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def write_postings(path: Path, texts: Iterable[str]) -> None:
+    """Build a CSR inverted index: per term, the chunk ids and term counts."""
+    postings: dict[str, list[tuple[int, int]]] = {}
+    doc_len: list[int] = []
+    for doc, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((doc, tf))
+
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    for i, term in enumerate(terms):
+        offsets[i + 1] = offsets[i] + len(postings[term])
+    docs = np.empty(offsets[-1], dtype=np.int32)
+    tfs = np.empty(offsets[-1], dtype=np.float32)
+    for i, term in enumerate(terms):
+        entries = postings[term]
+        docs[offsets[i]:offsets[i + 1]] = [d for d, _ in entries]
+        tfs[offsets[i]:offsets[i + 1]] = [tf for _, tf in entries]
+
+    (path / TERMS_FILE).write_text(json.dumps(terms), encoding="utf-8")
+    np.save(path / "term_offsets.npy", offsets)
+    np.save(path / "postings_docs.npy", docs)
+    np.save(path / "postings_tf.npy", tfs)
+    np.save(path / "doc_len.npy", np.asarray(doc_len, dtype=np.int32))
+
+
+def _match(haystack: np.ndarray, needles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Positions in sorted ``haystack`` of the ``needles`` it holds, and their indices."""
+    at = np.searchsorted(haystack, needles)
+    inside = np.flatnonzero(at < len(haystack))
+    found = inside[haystack[at[inside]] == needles[inside]]
+    return at[found], found
+
+
+class BM25Index:
+    def __init__(self, path: Path, live: np.ndarray | None = None):
+        terms = json.loads((path / TERMS_FILE).read_text(encoding="utf-8"))
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = np.load(path / "term_offsets.npy")
+        mmap_mode = "r" if self.offsets[-1] else None
+        self.docs = np.load(path / "postings_docs.npy", mmap_mode=mmap_mode)
+        self.tfs = np.load(path / "postings_tf.npy", mmap_mode=mmap_mode)
+        self.doc_len = np.load(path / "doc_len.npy").astype(np.float32)
+        # Tombstoned chunks stay in the postings until compaction, but do
+        # not count towards document frequencies or the average length.
+        if live is None or live.all():
+            self.num_docs = len(self.doc_len)
+            self.doc_freq = np.diff(self.offsets)
+            self.avg_len = float(self.doc_len.mean()) if self.num_docs else 0.0
+        else:
+            self.num_docs = int(np.count_nonzero(live))
+            self.doc_freq = np.zeros(len(terms), dtype=np.int64)
+            if self.offsets[-1]:
+                self.doc_freq = np.add.reduceat(live[self.docs].astype(np.int64), self.offsets[:-1])
+            self.avg_len = float(self.doc_len[live].mean()) if self.num_docs else 0.0
+
+    def scores(self, query: str, rows: np.ndarray | None = None) -> np.ndarray:
+        """BM25 score of every chunk, or of each of the sorted ``rows``.
+
+        With ``rows`` only the postings of those chunks are accumulated.
+        """
+        scores = np.zeros(len(self.doc_len) if rows is None else len(rows), dtype=np.float32)
+        n = self.num_docs
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None or not self.doc_freq[term_id]:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.docs[start:end]
+            tf = self.tfs[start:end]
+            if rows is None:
+                target = docs
+            elif len(rows) < len(docs):
+                # Postings are in chunk order, so both sides are sorted.
+                in_docs, target = _match(docs, rows)
+                docs, tf = rows[target], tf[in_docs]
+            else:
+                target, in_postings = _match(rows, docs)
+                docs, tf = docs[in_postings], tf[in_postings]
+            df = self.doc_freq[term_id]
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[docs] / self.avg_len)
+            scores[target] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]], k: int = RRF_K
+) -> list[tuple[Hashable, float]]:
+    fused: dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
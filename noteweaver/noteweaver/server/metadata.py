@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import bisect
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import PurePosixPath
+
+import numpy as np
+
+_FENCE = "---"
+# Frontmatter is only looked for in the first lines of a note.
+_MAX_FRONTMATTER_LINES = 200
+_TAGS_KEY_RE = re.compile(r"^(tags|tag|keywords)\s*:\s*(.*)$", re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r"^\s*-\s+(.*)$")
+
+
+def _clean_tag(tag: str) -> str:
+    return tag.strip().strip("'\"").lstrip("#").strip().lower()
+
+
+def parse_tags(frontmatter: list[str]) -> list[str]:
+    """Read ``tags`` from YAML-style frontmatter lines.
+
+    Supports ``tags: [a, b]``, ``tags: a, b`` and block lists of
+    ``- a`` items; this is not a YAML parser.
+    """
+    tags: list[str] = []
+    in_list = False
+    for line in frontmatter:
+        if in_list:
+            item = _LIST_ITEM_RE.match(line)
+            if item:
+                tags.append(_clean_tag(item.group(1)))
+                continue
+            in_list = False
+        match = _TAGS_KEY_RE.match(line)
+        if not match:
+            continue
+        value = match.group(2).strip()
+        if not value:
+            in_list = True
+            continue
+        tags.extend(_clean_tag(t) for t in value.strip("[]").split(","))
+    return sorted({tag for tag in tags if tag})
+
+
+def watch_frontmatter(lines: Iterable[str], tags: list[str]) -> Iterator[str]:
+    """Pass lines through, collecting frontmatter tags into ``tags``.
+
+    Lets the indexer read a file once for hashing, chunking and metadata.
+    """
+    frontmatter: list[str] | None = None
+    for number, line in enumerate(lines):
+        if number == 0 and line.strip() == _FENCE:
+            frontmatter = []
+        elif frontmatter is not None:
+            if line.strip() == _FENCE:
+                tags.extend(parse_tags(frontmatter))
+                frontmatter = None
+            elif number > _MAX_FRONTMATTER_LINES:
+                frontmatter = None
+            else:
+                frontmatter.append(line.rstrip("\r\n"))
+        yield line
+
+
+@dataclass
+class MetadataFilter:
+    """Restricts a search to notes under ``path_prefix``, carrying all of
+    ``tags`` and modified after ``modified_after``."""
+
+    path_prefix: str | None = None
+    tags: list[str] = field(default_factory=list)
+    modified_after: datetime | None = None
+
+    def __post_init__(self):
+        if self.path_prefix is not None:
+            prefix = PurePosixPath(self.path_prefix.replace("\\", "/")).as_posix().strip("/")
+            self.path_prefix = None if prefix in ("", ".") else prefix
+        self.tags = sorted({_clean_tag(tag) for tag in self.tags or [] if _clean_tag(tag)})
+
+    def __bool__(self) -> bool:
+        return bool(self.path_prefix or self.tags or self.modified_after)
+
+    def key(self) -> tuple:
+        after = self.modified_after.timestamp() if self.modified_after else None
+        return self.path_prefix, tuple(self.tags), after
+
+
+class MetadataIndex:
+    """Per-generation lookup from note metadata to live chunk ids.
+
+    Files are sorted by path and their chunk ids stored contiguously, so
+    a path prefix is a bisected range of rows. Tags map to file numbers
+    and modification times are kept sorted, so every filter costs in
+    proportion to the notes it matches rather than to the index.
+    """
+
+    def __init__(self, files: dict[str, dict]):
+        self.paths = sorted(files, key=lambda p: p.replace("\\", "/"))
+        self._posix = [p.replace("\\", "/") for p in self.paths]
+        counts = [len(files[p]["chunks"]) for p in self.paths]
+        self.offsets = np.zeros(len(self.paths) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.rows = np.fromiter(
+            (i for p in self.paths for i in files[p]["chunks"]), dtype=np.int64, count=int(self.offsets[-1])
+        )
+        mtimes = np.array([files[p]["mtime_ns"] for p in self.paths], dtype=np.int64)
+        self._by_mtime = np.argsort(mtimes, kind="stable")
+        self._mtimes = mtimes[self._by_mtime]
+        tag_files: dict[str, list[int]] = {}
+        for number, path in enumerate(self.paths):
+            for tag in files[path].get("tags", ()):
+                tag_files.setdefault(tag, []).append(number)
+        self.tags = {tag: np.array(numbers, dtype=np.int64) for tag, numbers in tag_files.items()}
+
+    def _prefix_range(self, prefix: str) -> tuple[int, int]:
+        # "a/b" matches the file "a/b" or everything under "a/b/", but not
+        # "a/bc" or "a/b.md"; "0" sorts right after "/".
+        lo = bisect.bisect_left(self._posix, prefix)
+        if lo < len(self._posix) and self._posix[lo] == prefix:
+            return lo, lo + 1
+        return bisect.bisect_left(self._posix, prefix + "/"), bisect.bisect_left(self._posix, prefix + "0")
+
+    def files(self, flt: MetadataFilter) -> np.ndarray | slice:
+        """File numbers matching ``flt``, as a slice when only a prefix is given."""
+        selected: np.ndarray | slice = slice(0, len(self.paths))
+        if flt.path_prefix:
+            selected = slice(*self._prefix_range(flt.path_prefix))
+        for tag in flt.tags:
+            numbers = self.tags.get(tag, np.zeros(0, dtype=np.int64))
+            if isinstance(selected, slice):
+                selected = numbers[(numbers >= selected.start) & (numbers < selected.stop)]
+            else:
+                selected = np.intersect1d(selected, numbers, assume_unique=True)
+        if flt.modified_after is not None:
+            cutoff = int(flt.modified_after.timestamp() * 1_000_000_000)
+            newer = self._by_mtime[np.searchsorted(self._mtimes, cutoff, side="right"):]
+            if isinstance(selected, slice):
+                selected = np.sort(newer[(newer >= selected.start) & (newer < selected.stop)])
+            else:
+                selected = np.intersect1d(selected, newer, assume_unique=True)
+        return selected
+
+    def rows_for(self, flt: MetadataFilter) -> np.ndarray:
+        """Sorted live chunk ids of the notes matching ``flt``."""
+        selected = self.files(flt)
+        if isinstance(selected, slice):
+            rows = self.rows[self.offsets[selected.start]:self.offsets[selected.stop]]
+        elif len(selected):
+            rows = np.concatenate([self.rows[self.offsets[f]:self.offsets[f + 1]] for f in selected])
+        else:
+            rows = np.zeros(0, dtype=np.int64)
+        return np.sort(rows)
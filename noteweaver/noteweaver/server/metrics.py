@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# A small in-process subset of a Prometheus client: labelled counters,
+# gauges and histograms rendered in the text exposition format by
+# GET /metrics.
+
+LabelValues = tuple[str, ...]
+
+_registry: list[_Metric] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _label_text(self, values: LabelValues, extra: dict[str, str] | None = None) -> str:
+        pairs = list(zip(self.labels, values)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._label_text(key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def replace(self, values: dict[LabelValues, float]) -> None:
+        """Swap in a full set of samples, dropping label sets not in ``values``."""
+        with self._lock:
+            self._values = dict(values)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._label_text(key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket (non-cumulative) counts, +Inf last, and the sum.
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = {"le": _format_value(bound)}
+                yield f"{self.name}_bucket{self._label_text(key, le)} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._label_text(key)} {cumulative}"
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+SEARCH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+INDEX_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+
+# Task queue, filled in at scrape time.
+TASKS = Gauge("noteweaver_tasks", "Tasks in the queue database by status.", ("status",))
+
+# Worker
+TASK_SECONDS = Histogram(
+    "noteweaver_task_duration_seconds",
+    "Time from claiming a task to its final status.",
+    TASK_BUCKETS,
+    ("task_type", "outcome"),
+)
+TASK_WAIT_SECONDS = Histogram(
+    "noteweaver_task_queue_wait_seconds",
+    "Time from creating a task to claiming it.",
+    TASK_BUCKETS,
+    ("task_type",),
+)
+LLM_SECONDS = Histogram(
+    "noteweaver_llm_generation_seconds",
+    "Wall-clock time of refine generations (cache misses only).",
+    TASK_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "noteweaver_llm_output_tokens_total",
+    "Whitespace tokens generated by refines; divide its rate by that of "
+    "noteweaver_llm_generation_seconds_sum for tokens/sec.",
+)
+WORKERS = Gauge("noteweaver_workers", "Configured concurrent queue workers.")
+WORKERS_BUSY = Gauge("noteweaver_workers_busy", "Queue workers currently processing a task.")
+WORKER_BUSY_SECONDS = Counter(
+    "noteweaver_worker_busy_seconds_total", "Time queue workers spent processing tasks."
+)
+WORKER_IDLE_SECONDS = Counter(
+    "noteweaver_worker_idle_seconds_total", "Time queue workers spent waiting for tasks."
+)
+REFINE_CACHE = Gauge(
+    "noteweaver_refine_cache", "Refine result cache counters (hits, misses, entries, bytes).", ("stat",)
+)
+REFINE_CACHE_SAVED = Gauge(
+    "noteweaver_refine_cache_saved_llm_seconds", "LLM generation time saved by refine cache hits."
+)
+
+# Search and index
+SEARCH_SECONDS = Histogram(
+    "noteweaver_search_duration_seconds", "Search latency, including result cache hits.", SEARCH_BUCKETS, ("mode",)
+)
+SEARCH_CACHE = Gauge(
+    "noteweaver_search_cache", "Search cache counters.", ("cache", "stat")
+)
+INDEX_BUILD_SECONDS = Histogram(
+    "noteweaver_index_build_duration_seconds", "Duration of index builds.", INDEX_BUCKETS, ("outcome",)
+)
+INDEX_EMBEDDED_CHUNKS = Counter(
+    "noteweaver_index_embedded_chunks_total", "Chunks sent to the embedding model by index builds."
+)
+INDEX_CHUNKS = Gauge("noteweaver_index_chunks", "Live chunks in the loaded index.", ("shard",))
+INDEX_TOMBSTONES = Gauge("noteweaver_index_tombstones", "Tombstoned chunks in the loaded index.", ("shard",))
+INDEX_FILES = Gauge("noteweaver_index_files", "Indexed files.", ("shard",))
+INDEX_GENERATION = Gauge("noteweaver_index_generation", "Generation number of the loaded index.", ("shard",))
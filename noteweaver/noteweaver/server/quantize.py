@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from noteweaver.server.config import ServerConfig
+
+FLOAT32 = "float32"
+INT8 = "int8"
+PQ = "pq"
+VECTOR_FORMATS = (FLOAT32, INT8, PQ)
+
+# Rows scored per step so decoding never materializes the whole matrix.
+BLOCK_ROWS = 65536
+PQ_CENTROIDS = 256
+PQ_TRAIN_SAMPLE = 10000
+PQ_ITERATIONS = 12
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class VectorFormat:
+    kind: str = FLOAT32
+    pq_subvectors: int = 16
+    keep_float: bool = True
+    rerank_factor: int = 4
+
+    def __post_init__(self):
+        if self.kind not in VECTOR_FORMATS:
+            raise ValueError(f"Unknown vector format {self.kind!r}, expected one of {VECTOR_FORMATS}")
+        if self.kind == FLOAT32:
+            self.keep_float = True
+
+    @classmethod
+    def from_config(cls, config: ServerConfig) -> VectorFormat:
+        return cls(
+            kind=config.vector_format,
+            pq_subvectors=config.pq_subvectors,
+            keep_float=config.keep_float_vectors,
+            rerank_factor=config.rerank_factor,
+        )
+
+
+class Int8Codec:
+    """Per-row symmetric int8 quantization: v ~= codes * scale."""
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray) -> Int8Codec:
+        peak = np.abs(vectors).max(axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+        scales = (np.where(peak == 0, 1, peak) / 127).astype(np.float32)
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return cls(codes, scales)
+
+    def save(self, path: Path) -> None:
+        np.save(path / "codes.npy", self.codes)
+        np.save(path / "scales.npy", self.scales)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: str | None) -> Int8Codec:
+        return cls(np.load(path / "codes.npy", mmap_mode=mmap_mode), np.load(path / "scales.npy"))
+
+    def decode(self, rows: np.ndarray | slice) -> np.ndarray:
+        return self.codes[rows].astype(np.float32) * self.scales[rows, None]
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        if rows is not None:
+            return (self.codes[rows].astype(np.float32) @ query) * self.scales[rows]
+        out = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            out[block] = (self.codes[block].astype(np.float32) @ query) * self.scales[block]
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+
+class ProductQuantizer:
+    """Product quantization with asymmetric distance computation.
+
+    Each vector is cut into ``M`` sub-vectors and every sub-vector is
+    replaced by the id of its nearest of 256 centroids, so a row costs
+    ``M`` bytes. A query is scored by building an (M, 256) table of
+    inner products once and summing ``M`` lookups per row.
+    """
+
+    def __init__(self, centroids: list[np.ndarray], codes: np.ndarray):
+        self.centroids = centroids
+        self.codes = codes
+        self.bounds = np.cumsum([0] + [c.shape[1] for c in centroids])
+
+    @staticmethod
+    def _kmeans(data: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        centroids = data[rng.choice(len(data), k, replace=False)].copy()
+        for _ in range(PQ_ITERATIONS):
+            # ||x||^2 is the same for every centroid and does not change the argmin.
+            distances = (centroids**2).sum(axis=1)[None, :] - 2 * data @ centroids.T
+            assignment = distances.argmin(axis=1)
+            counts = np.bincount(assignment, minlength=k)
+            sums = np.stack(
+                [np.bincount(assignment, weights=data[:, j], minlength=k) for j in range(data.shape[1])],
+                axis=1,
+            )
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        return centroids.astype(np.float32)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, subvectors: int, seed: int = 0) -> ProductQuantizer:
+        rng = np.random.default_rng(seed)
+        dims = np.array_split(np.arange(vectors.shape[1]), min(subvectors, vectors.shape[1]))
+        sample = vectors
+        if len(vectors) > PQ_TRAIN_SAMPLE:
+            sample = vectors[np.sort(rng.choice(len(vectors), PQ_TRAIN_SAMPLE, replace=False))]
+        sample = np.asarray(sample, dtype=np.float32)
+        k = min(PQ_CENTROIDS, len(sample))
+        centroids = [cls._kmeans(np.ascontiguousarray(sample[:, d[0]:d[-1] + 1]), k, rng) for d in dims]
+        pq = cls(centroids, np.zeros((0, len(centroids)), dtype=np.uint8))
+        pq.codes = pq.encode(vectors)
+        return pq
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), len(self.centroids)), dtype=np.uint8)
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            for m, centroids in enumerate(self.centroids):
+                sub = np.ascontiguousarray(block[:, self.bounds[m]:self.bounds[m + 1]])
+                distances = (centroids**2).sum(axis=1)[None, :] - 2 * sub @ centroids.T
+                codes[start:start + len(block), m] = distances.argmin(axis=1)
+        return codes
+
+    def save(self, path: Path) -> None:
+        np.save(path / "codes.npy", self.codes)
+        np.savez(path / "pq_centroids.npz", *self.centroids)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: str | None) -> ProductQuantizer:
+        with np.load(path / "pq_centroids.npz") as data:
+            centroids = [data[f"arr_{i}"] for i in range(len(data.files))]
+        return cls(centroids, np.load(path / "codes.npy", mmap_mode=mmap_mode))
+
+    def decode(self, rows: np.ndarray | slice) -> np.ndarray:
+        codes = self.codes[rows]
+        return np.hstack([c[codes[:, m]] for m, c in enumerate(self.centroids)])
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        tables = [c @ query[self.bounds[m]:self.bounds[m + 1]] for m, c in enumerate(self.centroids)]
+        codes = self.codes if rows is None else self.codes[rows]
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = codes[start:start + BLOCK_ROWS]
+            acc = np.zeros(len(block), dtype=np.float32)
+            for m, table in enumerate(tables):
+                acc += table[block[:, m]]
+            out[start:start + len(block)] = acc
+        return out
+
+    @property
+    def dim(self) -> int:
+        return int(self.bounds[-1])
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(c.nbytes for c in self.centroids)
+
+
+def encode(vectors: np.ndarray, fmt: VectorFormat) -> Int8Codec | ProductQuantizer | None:
+    if fmt.kind == INT8:
+        return Int8Codec.encode(vectors)
+    if fmt.kind == PQ and len(vectors):
+        return ProductQuantizer.train(vectors, fmt.pq_subvectors)
+    return None
+
+
+def load(path: Path, kind: str, mmap_mode: str | None) -> Int8Codec | ProductQuantizer | None:
+    if kind == INT8:
+        return Int8Codec.load(path, mmap_mode)
+    if kind == PQ and (path / "pq_centroids.npz").exists():
+        return ProductQuantizer.load(path, mmap_mode)
+    return None
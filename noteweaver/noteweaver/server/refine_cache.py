@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from noteweaver.logger import Logger
+from noteweaver.models import RefineCacheStats
+
+CACHE_DIR = Path(".noteweaver") / "refine-cache"
+OUTPUT_SUFFIX = ".out"
+META_SUFFIX = ".json"
+
+logger = Logger(name="noteweaver.refine_cache").get()
+
+
+class RefineCache:
+    """Refined notes on disk, keyed by a hash of note content, model and prompt.
+
+    Entries are evicted least recently used first (by file mtime, which a
+    hit refreshes) once the outputs exceed ``max_bytes``. Each entry
+    remembers how long its generation took, so hits can report the LLM
+    time they saved.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._sizes: dict[str, int] = {}
+        if max_bytes > 0:
+            directory.mkdir(parents=True, exist_ok=True)
+            for path in directory.glob(f"*{OUTPUT_SUFFIX}"):
+                self._sizes[path.stem] = path.stat().st_size
+            self._evict()
+
+    @classmethod
+    def for_base_dir(cls, base_dir: str, max_mb: float) -> RefineCache:
+        return cls(Path(base_dir) / CACHE_DIR, int(max_mb * 1024 * 1024))
+
+    def _output(self, key: str) -> Path:
+        return self.directory / f"{key}{OUTPUT_SUFFIX}"
+
+    def _meta(self, key: str) -> Path:
+        return self.directory / f"{key}{META_SUFFIX}"
+
+    def copy_to(self, key: str, destination: Path) -> bool:
+        """Copy the cached output for ``key`` to ``destination`` if present."""
+        if self.max_bytes <= 0:
+            return False
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                return False
+            try:
+                shutil.copyfile(self._output(key), destination)
+                seconds = json.loads(self._meta(key).read_text(encoding="utf-8"))["seconds"]
+                os.utime(self._output(key))
+            except (OSError, ValueError, KeyError):
+                logger.warning("Dropping unreadable refine cache entry %s", key)
+                self._remove(key)
+                self.misses += 1
+                return False
+            self.hits += 1
+            self.saved_seconds += seconds
+            return True
+
+    def put(self, key: str, output: Path, seconds: float) -> None:
+        """Store a finished generation that took ``seconds``."""
+        if self.max_bytes <= 0:
+            return
+        size = output.stat().st_size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            tmp = self._output(key).with_suffix(".tmp")
+            shutil.copyfile(output, tmp)
+            self._meta(key).write_text(json.dumps({"seconds": seconds, "stored_at": time.time()}), encoding="utf-8")
+            os.replace(tmp, self._output(key))
+            self._sizes[key] = size
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        self._sizes.pop(key, None)
+        self._output(key).unlink(missing_ok=True)
+        self._meta(key).unlink(missing_ok=True)
+
+    def _last_used(self, key: str) -> int:
+        try:
+            return self._output(key).stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _evict(self) -> None:
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=self._last_used)
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes[key]
+            self._remove(key)
+            logger.info("Evicted refine cache entry %s", key)
+
+    def stats(self) -> RefineCacheStats:
+        with self._lock:
+            return RefineCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                entries=len(self._sizes),
+                bytes=sum(self._sizes.values()),
+                max_bytes=self.max_bytes,
+                saved_llm_seconds=round(self.saved_seconds, 3),
+            )
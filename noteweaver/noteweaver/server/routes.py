@@ -1,31 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 from noteweaver.models import (
+    IndexStatus,
+    RefineCacheStats,
+    SearchCacheStats,
     SearchRequest,
     SearchResult,
+    ShardInfo,
     Task,
+    TaskBatchResult,
     TaskCreate,
     TaskStatus,
     TaskType,
     TaskUpdate,
 )
-from noteweaver.server import db, indexer, worker
+from noteweaver.server import db, indexer, metrics, task_events, worker
+from noteweaver.server.index_jobs import jobs
+from noteweaver.server.index_store import GENERATION_PREFIX
+from noteweaver.server.metadata import MetadataFilter
+from noteweaver.server.quantize import VectorFormat
 
 router = APIRouter()
 
+FINAL_STATUSES = {TaskStatus.DONE, TaskStatus.FAILED, TaskStatus.CANCELLED}
+# Open event streams re-read their task at least this often, which catches
+# changes made by other processes and doubles as a keep-alive.
+EVENT_POLL_SECONDS = 5.0
+
+
+def _note_path(base_dir: str, path: str) -> Path:
+    """Resolve a note path given relative to ``base_dir``, refusing any outside it."""
+    base = Path(base_dir).expanduser().resolve()
+    if Path(path).is_absolute():
+        raise HTTPException(status_code=400, detail=f"Path must be relative to base_dir: {path}")
+    file_path = (base / path).resolve()
+    if not file_path.is_relative_to(base):
+        raise HTTPException(status_code=400, detail=f"Path must be inside base_dir: {path}")
+    return file_path
+
 
 @router.post("/tasks", status_code=201)
-def create_task(data: TaskCreate) -> Task:
-    task = db.create_task(data)
-    worker.notify()
+def create_task(data: TaskCreate, response: Response) -> Task:
+    task, created = db.enqueue_task(data)
+    if created:
+        worker.notify()
+    else:
+        # Coalesced into the task already queued for this path.
+        response.status_code = 200
     return task
 
 
+@router.post("/tasks/batch", status_code=201)
+def create_tasks(data: list[TaskCreate]) -> TaskBatchResult:
+    from noteweaver.server.app import config
+
+    for item in data:
+        _note_path(config.base_dir, item.path)
+    result = db.enqueue_tasks(data)
+    if result.created:
+        worker.notify()
+    return result
+
+
 @router.get("/tasks")
 def list_tasks() -> list[Task]:
     return db.list_tasks()
@@ -39,11 +83,54 @@ def get_task(task_id: int) -> Task:
     return task
 
 
+@router.get("/tasks/{task_id}/events")
+def task_events_stream(task_id: int) -> StreamingResponse:
+    """Server-sent events with the task on every change, until it finishes.
+
+    Each ``task`` event carries the task as JSON. The stream ends after the
+    first event with a final status, or with a ``deleted`` event.
+    """
+    if db.get_task(task_id) is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return StreamingResponse(
+        _task_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _task_events(task_id: int) -> AsyncIterator[str]:
+    async with task_events.watching() as changed:
+        last = None
+        while True:
+            task = await asyncio.to_thread(db.get_task, task_id)
+            if task is None:
+                yield f"event: deleted\ndata: {{\"id\": {task_id}}}\n\n"
+                return
+            # Lease renewals alone are not worth an event.
+            state = task.model_dump(exclude={"lease_expires_at"})
+            if state != last:
+                last = state
+                yield f"event: task\ndata: {task.model_dump_json()}\n\n"
+            if task.status in FINAL_STATUSES:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), EVENT_POLL_SECONDS)
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+            changed.clear()
+
+
 @router.patch("/tasks/{task_id}")
 def update_task(task_id: int, data: TaskUpdate) -> Task:
-    task = db.update_task(task_id, data)
+    try:
+        task = db.update_task(task_id, data)
+    except (db.DuplicateTaskError, db.TaskClaimedError) as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     if task is None:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    if data.status == TaskStatus.CANCELLED:
+        worker.cancel(task_id)
     return task
 
 
@@ -55,21 +142,104 @@ def delete_task(task_id: int) -> Task:
     return task
 
 
+@router.get("/refine/cache")
+def refine_cache_stats() -> RefineCacheStats:
+    from noteweaver.server.app import refine_cache
+
+    if refine_cache is None:
+        raise HTTPException(status_code=503, detail="Refine cache not initialised")
+    return refine_cache.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """All metrics in the Prometheus text exposition format."""
+    _refresh_gauges()
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _refresh_gauges() -> None:
+    """Sample the state that is cheaper to read at scrape time than to track."""
+    from noteweaver.server.app import config, refine_cache
+
+    metrics.TASKS.replace({(status.value,): n for status, n in db.count_by_status().items()})
+
+    search_cache = indexer.cache_stats().model_dump()
+    metrics.SEARCH_CACHE.replace(
+        {
+            (name, stat): counters[stat]
+            for name, counters in search_cache.items()
+            for stat in ("hits", "misses", "size")
+        }
+    )
+
+    if refine_cache is not None:
+        stats = refine_cache.stats()
+        metrics.REFINE_CACHE.replace({(stat,): getattr(stats, stat) for stat in ("hits", "misses", "entries", "bytes")})
+        metrics.REFINE_CACHE_SAVED.set(stats.saved_llm_seconds)
+
+    shards = indexer.loaded_shards(config.base_dir)
+    metrics.INDEX_CHUNKS.replace({(name,): len(s) for name, s in shards.items()})
+    metrics.INDEX_TOMBSTONES.replace({(name,): s.tombstones for name, s in shards.items()})
+    metrics.INDEX_FILES.replace({(name,): len(s.files) for name, s in shards.items()})
+    metrics.INDEX_GENERATION.replace(
+        {(name,): int(s.generation.removeprefix(GENERATION_PREFIX)) for name, s in shards.items()}
+    )
+
+
 @router.post("/search")
 def search_notes(data: SearchRequest) -> list[SearchResult]:
-    from noteweaver.server.app import config
+    from noteweaver.server.app import config, embedding_client
 
     return indexer.search(
-        data.query, config.base_dir, config.embedding_model, data.top_k
+        data.query,
+        config.base_dir,
+        config.embedding_model,
+        data.top_k,
+        client=embedding_client,
+        mode=data.mode,
+        shards=data.shards,
+        metadata_filter=MetadataFilter(data.path_prefix, data.tags, data.modified_after),
     )
 
 
-@router.post("/index")
-def reindex() -> dict[str, int]:
+@router.get("/search/stats")
+def search_stats() -> SearchCacheStats:
+    return indexer.cache_stats()
+
+
+@router.post("/index", status_code=202)
+def reindex(
+    compact: bool = False,
+    wait: bool = False,
+    shard: list[str] | None = Query(default=None),
+) -> IndexStatus:
+    from noteweaver.server.app import config, embedding_client
+
+    status = jobs.start(
+        config.base_dir,
+        config.embedding_model,
+        compact=compact,
+        client=embedding_client,
+        sharded=config.shard_index,
+        shards=shard,
+        vector_format=VectorFormat.from_config(config),
+    )
+    if wait:
+        status = jobs.wait()
+    return status
+
+
+@router.get("/index/status")
+def index_status() -> IndexStatus:
+    return jobs.status()
+
+
+@router.get("/index/shards")
+def index_shards() -> list[ShardInfo]:
     from noteweaver.server.app import config
 
-    count = indexer.index_directory(config.base_dir, config.embedding_model)
-    return {"indexed_chunks": count}
+    return indexer.shard_info(config.base_dir)
 
 
 @router.get("/queue")
@@ -91,10 +261,7 @@ class RefineRequest(BaseModel):
 def refine_note(data: RefineRequest) -> Task:
     from noteweaver.server.app import config
 
-    base = Path(config.base_dir).expanduser().resolve()
-    file_path = (base / data.path).resolve()
-    if not file_path.is_relative_to(base):
-        raise HTTPException(status_code=400, detail="Path must be inside base_dir")
+    file_path = _note_path(config.base_dir, data.path)
     if not file_path.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {data.path}")
 
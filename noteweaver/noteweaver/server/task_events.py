@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+# Open task event streams, woken by publish() from request and worker threads.
+_watchers: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+_watchers_lock = threading.Lock()
+
+
+def publish() -> None:
+    """Signal the open streams that a task row changed in this process.
+
+    Streams re-read their own task, so one wake-up covers any change.
+    """
+    with _watchers_lock:
+        watchers = list(_watchers)
+    for loop, changed in watchers:
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            # The stream's loop closed before it unregistered.
+            pass
+
+
+@asynccontextmanager
+async def watching() -> AsyncIterator[asyncio.Event]:
+    """An event that is set whenever publish() is called while inside."""
+    watcher = (asyncio.get_running_loop(), asyncio.Event())
+    with _watchers_lock:
+        _watchers.add(watcher)
+    try:
+        yield watcher[1]
+    finally:
+        with _watchers_lock:
+            _watchers.discard(watcher)
@@ -1,76 +1,286 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import shutil
+import socket
 import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from noteweaver.logger import Logger
-from noteweaver.models import TaskStatus, TaskUpdate
-from noteweaver.refine import RefineNote
-from noteweaver.server import db
+from noteweaver.models import TaskStatus
+from noteweaver.refine import RefineNote, RefineProgress
+from noteweaver.server import db, metrics
 from noteweaver.server.backup import backup_before_refine
+from noteweaver.server.chunker import count_tokens
+from noteweaver.server.refine_cache import RefineCache
 
 logger = Logger(name="noteweaver.worker").get()
 
-_task_available = threading.Event()
+LEASE_SECONDS = db.DEFAULT_LEASE_SECONDS
+# Idle workers also look for work this often, so tasks whose lease expired
+# or that were enqueued by another process are picked up without a notify.
+POLL_SECONDS = 5.0
+
+# Running pools, woken by notify() from request threads.
+_pools: set[WorkerPool] = set()
+_pools_lock = threading.Lock()
 
 
 def notify() -> None:
-    """Signal the worker that a new task has been enqueued."""
-    _task_available.set()
-
-
-def _process_one(base_dir: str) -> bool:
-    """Claim and process the next queued task. Returns True if a task was processed."""
-    task = db.claim_next_task()
-    if task is None:
-        return False
-
-    logger.info("Processing task %d (%s) for %s", task.id, task.task_type, task.path)
-    base = Path(base_dir).expanduser().resolve()
-    file_path = (base / task.path).resolve()
-
-    try:
-        backup_before_refine(file_path, base_dir)
-        refined = RefineNote.refine(str(file_path))
-        file_path.write_text(refined)
-        db.update_task(task.id, TaskUpdate(status=TaskStatus.DONE))
-        logger.info("Task %d completed successfully", task.id)
-    except Exception:
-        db.update_task(task.id, TaskUpdate(status=TaskStatus.FAILED))
-        logger.exception("Task %d failed", task.id)
-
-    return True
-
-
-def _run(base_dir: str, stop_event: threading.Event) -> None:
-    logger.info("Queue worker started (push mode)")
-    while not stop_event.is_set():
-        # Process all available tasks before waiting
-        processed = False
+    """Signal the workers that a new task has been enqueued."""
+    with _pools_lock:
+        pools = list(_pools)
+    for pool in pools:
+        pool.wake()
+
+
+def cancel(task_id: int) -> bool:
+    """Cancel a task running in this process. Returns True if one was found.
+
+    Workers in other processes notice through their lease, which the
+    status change releases.
+    """
+    with _pools_lock:
+        pools = list(_pools)
+    return any(pool.cancel(task_id) for pool in pools)
+
+
+def _owner(worker: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:worker-{worker}"
+
+
+def _temp_path(file_path: Path, task_id: int) -> Path:
+    # Not a .md/.txt file, so the indexer never picks it up.
+    return file_path.with_name(f".{file_path.name}.refine-{task_id}.tmp")
+
+
+def _swap_in(file_path: Path, temp_path: Path) -> None:
+    shutil.copymode(file_path, temp_path)
+    os.replace(temp_path, file_path)
+
+
+class WorkerPool:
+    """``count`` queue workers sharing one asyncio event loop.
+
+    Each worker claims tasks independently and collects the model output
+    into a temp file that atomically replaces the note when the
+    generation completes. A generation that exceeds ``task_timeout`` or
+    whose task is cancelled is abandoned and the note is left untouched.
+    With a ``cache``, a note whose content was refined before with the
+    same model and prompt is served from it without calling the model.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        count: int = 1,
+        task_timeout: float | None = None,
+        cache: RefineCache | None = None,
+    ):
+        self.base_dir = base_dir
+        self.count = max(1, count)
+        self.task_timeout = task_timeout
+        self.cache = cache
+        self.thread = threading.Thread(target=self._run_loop, daemon=True, name="noteweaver-queue-workers")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._ready = threading.Event()
+        self._wake: asyncio.Event | None = None
+        self._stopping = False
+        self._running: dict[int, asyncio.Task] = {}
+        # Two tasks for the same note never refine it at once. Entries are
+        # reference-counted and dropped when no task holds or waits for them.
+        self._path_locks: dict[Path, tuple[asyncio.Lock, int]] = {}
+
+    def start(self) -> WorkerPool:
+        self.thread.start()
+        self._ready.wait()
+        with _pools_lock:
+            _pools.add(self)
+        return self
+
+    def wake(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def cancel(self, task_id: int) -> bool:
+        task = self._running.get(task_id)
+        if task is None or self._loop is None:
+            return False
+        self._loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def stop(self, timeout: float | None = None) -> bool:
+        """Stop claiming and wait up to ``timeout`` seconds for in-flight
+        tasks to finish. Returns False if some are still running; they keep
+        their lease and are reclaimed once it expires."""
+        with _pools_lock:
+            _pools.discard(self)
+        self._stopping = True
+        self.wake()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logger.warning("Queue workers still busy after drain timeout: tasks %s", sorted(self._running))
+            return False
+        return True
+
+    def _run_loop(self) -> None:
+        asyncio.run(self._main())
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._ready.set()
+        metrics.WORKERS.set(self.count)
+        logger.info("Queue workers started (push mode, %d concurrent)", self.count)
+        await asyncio.gather(*(self._worker(i) for i in range(self.count)))
+        logger.info("Queue workers stopped")
+
+    async def _worker(self, worker: int) -> None:
+        owner = _owner(worker)
+        while not self._stopping:
+            # Process all available tasks before waiting
+            processed = False
+            try:
+                while not self._stopping and await self._process_one(owner):
+                    processed = True
+            except Exception:
+                logger.exception("Unexpected error in queue worker %d", worker)
+
+            # Only wait if we didn't process anything
+            if not processed and not self._stopping:
+                idle_since = time.monotonic()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), POLL_SECONDS)
+                except TimeoutError:
+                    pass
+                self._wake.clear()
+                metrics.WORKER_IDLE_SECONDS.inc(time.monotonic() - idle_since)
+
+    async def _process_one(self, owner: str) -> bool:
+        """Claim and process the next queued task. Returns True if a task was processed."""
+        task = await asyncio.to_thread(db.claim_next_task, owner, LEASE_SECONDS)
+        if task is None:
+            return False
+
+        started = time.monotonic()
+        metrics.TASK_WAIT_SECONDS.observe(
+            max(0.0, time.time() - task.created_at.timestamp()), task_type=task.task_type.value
+        )
+        metrics.WORKERS_BUSY.inc()
+        outcome = "failed"
+        logger.info("Processing task %d (%s) for %s", task.id, task.task_type, task.path)
+        base = Path(self.base_dir).expanduser().resolve()
+        file_path = (base / task.path).resolve()
+
+        # Run the refine as its own task so cancel() and a lost lease can
+        # stop it without cancelling the worker loop.
+        refine = asyncio.create_task(self._refine(file_path, task.id, owner))
+        self._running[task.id] = refine
         try:
-            while _process_one(base_dir):
-                processed = True
-                if stop_event.is_set():
-                    return
+            async with self._lease_kept(task.id, owner, refine):
+                await refine
+        except asyncio.CancelledError:
+            if not refine.cancelled():
+                raise
+            outcome = "cancelled"
+            logger.info("Task %d cancelled", task.id)
+        except TimeoutError:
+            outcome = "timeout"
+            await asyncio.to_thread(db.finish_task, task.id, owner, TaskStatus.FAILED)
+            logger.error("Task %d timed out after %ss", task.id, self.task_timeout)
         except Exception:
-            logger.exception("Unexpected error in queue worker")
-
-        # Only wait if we didn't process anything
-        if not processed:
-            _task_available.wait()
-            if stop_event.is_set():
-                break
-            _task_available.clear()
-    logger.info("Queue worker stopped")
-
-
-def start_worker(base_dir: str) -> tuple[threading.Thread, threading.Event]:
-    stop_event = threading.Event()
-    thread = threading.Thread(
-        target=_run,
-        args=(base_dir, stop_event),
-        daemon=True,
-        name="noteweaver-queue-worker",
-    )
-    thread.start()
-    return thread, stop_event
+            await asyncio.to_thread(db.finish_task, task.id, owner, TaskStatus.FAILED)
+            logger.exception("Task %d failed", task.id)
+        else:
+            outcome = "done"
+            await asyncio.to_thread(db.finish_task, task.id, owner, TaskStatus.DONE)
+            logger.info("Task %d completed successfully", task.id)
+        finally:
+            del self._running[task.id]
+            elapsed = time.monotonic() - started
+            metrics.WORKERS_BUSY.dec()
+            metrics.WORKER_BUSY_SECONDS.inc(elapsed)
+            metrics.TASK_SECONDS.observe(elapsed, task_type=task.task_type.value, outcome=outcome)
+        return True
+
+    @asynccontextmanager
+    async def _lease_kept(self, task_id: int, owner: str, refine: asyncio.Task):
+        """Renew the task's lease while it runs; cancel it if the lease is lost."""
+
+        async def renew() -> None:
+            while True:
+                await asyncio.sleep(LEASE_SECONDS / 3)
+                if not await asyncio.to_thread(db.renew_lease, task_id, owner, LEASE_SECONDS):
+                    logger.warning("Task %d: lease lost, cancelling", task_id)
+                    refine.cancel()
+                    return
+
+        renewer = asyncio.create_task(renew())
+        try:
+            yield
+        finally:
+            renewer.cancel()
+
+    @asynccontextmanager
+    async def _path_lock(self, path: Path):
+        lock, users = self._path_locks.get(path, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._path_locks[path] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._path_locks[path]
+            if users == 1:
+                del self._path_locks[path]
+            else:
+                self._path_locks[path] = (lock, users - 1)
+
+    async def _refine(self, file_path: Path, task_id: int, owner: str) -> None:
+        async def progress(done: int, total: int) -> None:
+            await asyncio.to_thread(db.set_progress, task_id, owner, done, total)
+
+        async with self._path_lock(file_path):
+            async with asyncio.timeout(self.task_timeout):
+                await asyncio.to_thread(backup_before_refine, file_path, self.base_dir)
+                await self._write_refined(file_path, _temp_path(file_path, task_id), progress)
+
+    async def _write_refined(self, file_path: Path, temp_path: Path, progress: RefineProgress) -> None:
+        """Produce the refined note in ``temp_path``, then swap it in.
+
+        The workers share one event loop, so file I/O runs in threads and
+        the model output is buffered and written once it is complete.
+        """
+        content = await asyncio.to_thread(file_path.read_text)
+        key = RefineNote.cache_key(content) if self.cache is not None else None
+        try:
+            if key is not None and await asyncio.to_thread(self.cache.copy_to, key, temp_path):
+                logger.info("Refine cache hit for %s", file_path)
+            else:
+                started = time.monotonic()
+                pieces = RefineNote.astream(str(file_path), content, progress)
+                refined = "".join([piece async for piece in pieces])
+                seconds = time.monotonic() - started
+                metrics.LLM_SECONDS.observe(seconds)
+                metrics.LLM_TOKENS.inc(count_tokens(refined))
+                await asyncio.to_thread(self._write_output, temp_path, refined, key, seconds)
+            await asyncio.to_thread(_swap_in, file_path, temp_path)
+        finally:
+            await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+
+    def _write_output(self, temp_path: Path, refined: str, key: str | None, seconds: float) -> None:
+        temp_path.write_text(refined, encoding="utf-8")
+        if key is not None:
+            self.cache.put(key, temp_path, seconds)
+
+
+def start_workers(
+    base_dir: str,
+    count: int = 1,
+    task_timeout: float | None = None,
+    cache: RefineCache | None = None,
+) -> WorkerPool:
+    return WorkerPool(base_dir, count, task_timeout, cache).start()
@@ -0,0 +1,12 @@
+import pytest
+
+from noteweaver.server import db
+
+
+@pytest.fixture
+def queue_db(tmp_path, monkeypatch):
+    """A fresh queue database at the default path, inside ``tmp_path``."""
+    monkeypatch.chdir(tmp_path)
+    db.init_db()
+    yield tmp_path / db.DEFAULT_DB_PATH
+    db.close_connections()
@@ -0,0 +1,68 @@
+"""Unit tests for the markdown chunker."""
+
+from noteweaver.server.chunker import count_tokens, iter_chunks, iter_sections
+
+
+def _chunks(text: str, max_tokens: int = 256) -> list[str]:
+    return list(iter_chunks(text.splitlines(keepends=True), max_tokens))
+
+
+class TestIterChunks:
+    def test_packs_paragraphs_under_their_heading(self):
+        chunks = _chunks("# Title\n\nfirst paragraph\n\nsecond paragraph\n")
+
+        assert chunks == ["# Title\n\nfirst paragraph\n\nsecond paragraph"]
+
+    def test_heading_is_kept_when_its_body_does_not_fit_after_it(self):
+        body = " ".join(["word"] * 255)
+        text = f"# Intro\n\nhello\n\n## Deployment ERR_CONN-42\n\n{body}\n"
+
+        chunks = _chunks(text)
+
+        assert all(count_tokens(c) <= 256 for c in chunks)
+        body_chunks = [c for c in chunks if "word" in c]
+        assert body_chunks
+        assert all(c.startswith("## Deployment ERR_CONN-42\n\n") for c in body_chunks)
+
+    def test_continuation_chunks_repeat_the_section_heading(self):
+        paragraphs = "\n\n".join(" ".join([f"p{i}"] * 6) for i in range(4))
+        chunks = _chunks(f"## Setup\n\n{paragraphs}\n", max_tokens=10)
+
+        assert len(chunks) == 4
+        assert all(c.startswith("## Setup") for c in chunks)
+        assert all(count_tokens(c) <= 10 for c in chunks)
+
+    def test_fenced_code_is_not_split_at_blank_lines(self):
+        text = "# Code\n\n```python\nx = 1\n\ny = 2\n```\n"
+
+        assert _chunks(text) == ["# Code\n\n```python\nx = 1\n\ny = 2\n```"]
+
+    def test_frontmatter_is_skipped(self):
+        text = "---\ntitle: Note\ntags: [a, b]\n---\n# Heading\n\nbody\n"
+
+        assert _chunks(text) == ["# Heading\n\nbody"]
+
+    def test_unclosed_frontmatter_fence_is_content(self):
+        text = "---\nnot frontmatter\n\nbody\n"
+
+        assert _chunks(text) == ["---\nnot frontmatter\n\nbody"]
+
+
+class TestIterSections:
+    def _sections(self, text: str, max_tokens: int) -> list[str]:
+        return list(iter_sections(text.splitlines(keepends=True), max_tokens))
+
+    def test_packs_whole_sections_while_they_fit(self):
+        text = "# A\n\none two\n\n# B\n\nthree four\n\n# C\n\nfive six\n"
+
+        assert self._sections(text, 8) == ["# A\n\none two\n\n# B\n\nthree four", "# C\n\nfive six"]
+
+    def test_oversized_section_keeps_its_heading_on_the_first_piece(self):
+        body = " ".join(["word"] * 30)
+        text = f"# A\n\nshort\n\n## B\n\n{body}\n\n{body}\n\n## C\n\nend\n"
+
+        sections = self._sections(text, 40)
+
+        assert "## B" not in sections
+        assert sections[1].startswith("## B\n\nword")
+        assert all(count_tokens(s) <= 40 for s in sections)
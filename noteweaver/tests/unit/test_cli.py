@@ -0,0 +1,29 @@
+"""Unit tests for the nweaver CLI."""
+
+import pytest
+import typer
+
+from noteweaver.cli.app import _glob_notes
+
+
+@pytest.fixture
+def notes(tmp_path):
+    for name in ("a.md", "daily/b.md", "daily/deep/c.md"):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("note")
+    return tmp_path
+
+
+class TestGlobNotes:
+    def test_matches_are_relative_to_base_dir(self, notes, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path.parent)
+
+        assert _glob_notes("**/*.md", notes) == ["a.md", "daily/b.md", "daily/deep/c.md"]
+        assert _glob_notes("daily/*", notes) == ["daily/b.md"]
+
+    def test_absolute_pattern_inside_base_dir(self, notes):
+        assert _glob_notes(f"{notes}/daily/**/*.md", notes) == ["daily/b.md", "daily/deep/c.md"]
+
+    def test_match_outside_base_dir_is_an_error(self, notes):
+        with pytest.raises(typer.Exit):
+            _glob_notes("../*", notes / "daily")
@@ -0,0 +1,200 @@
+"""Unit tests for the task queue database."""
+
+import threading
+
+import pytest
+
+from noteweaver.models import TaskCreate, TaskStatus, TaskType, TaskUpdate
+from noteweaver.server import db
+
+
+def _task(path: str, priority: int = 1) -> TaskCreate:
+    return TaskCreate(task_type=TaskType.REFINE, path=path, priority=priority)
+
+
+class TestConnections:
+    def test_connection_is_reused_within_a_thread(self, queue_db):
+        assert db._connect() is db._connect()
+
+    def test_each_thread_gets_its_own_connection(self, queue_db):
+        other = []
+        thread = threading.Thread(target=lambda: other.append(db._connect()))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not db._connect()
+
+    def test_connections_are_set_up_once(self, queue_db):
+        conn = db._connect()
+
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+
+    def test_close_connections_reopens_on_next_use(self, queue_db):
+        task = db.create_task(_task("a.md"))
+        before = db._connect()
+
+        db.close_connections()
+
+        assert db._connect() is not before
+        assert db.get_task(task.id).path == "a.md"
+
+
+class TestTasks:
+    def test_create_update_and_delete(self, queue_db):
+        task = db.create_task(_task("a.md"))
+
+        updated = db.update_task(task.id, TaskUpdate(priority=3, status=TaskStatus.DONE))
+        assert (updated.priority, updated.status) == (3, TaskStatus.DONE)
+
+        assert db.delete_task(task.id).id == task.id
+        assert db.get_task(task.id) is None
+        assert db.list_tasks() == []
+
+
+class TestCoalescing:
+    def test_same_path_is_queued_once(self, queue_db):
+        first, created = db.enqueue_task(_task("a.md", priority=1))
+        again, created_again = db.enqueue_task(_task("a.md", priority=3))
+
+        assert created and not created_again
+        assert again.id == first.id
+        assert again.priority == 3
+        assert len(db.list_tasks()) == 1
+
+    def test_claimed_task_does_not_absorb_new_requests(self, queue_db):
+        first, _ = db.enqueue_task(_task("a.md"))
+        db.claim_next_task("w1")
+
+        second, created = db.enqueue_task(_task("a.md"))
+
+        assert created
+        assert second.id != first.id
+
+    def test_batch_counts_created_and_coalesced(self, queue_db):
+        db.enqueue_task(_task("a.md"))
+
+        result = db.enqueue_tasks([_task("a.md"), _task("b.md"), _task("b.md", priority=5)])
+
+        assert (result.created, result.coalesced) == (1, 2)
+        assert {t.path: t.priority for t in db.list_tasks()} == {"a.md": 1, "b.md": 5}
+
+    def test_update_into_a_queued_duplicate_is_rejected(self, queue_db):
+        db.enqueue_task(_task("a.md"))
+        other, _ = db.enqueue_task(_task("b.md"))
+
+        with pytest.raises(db.DuplicateTaskError):
+            db.update_task(other.id, TaskUpdate(path="a.md"))
+
+    def test_existing_duplicates_are_merged_on_upgrade(self, queue_db):
+        conn = db._connect()
+        conn.execute("DROP INDEX tasks_queued_once")
+        for priority in (1, 4, 2):
+            conn.execute(
+                "INSERT INTO tasks (task_type, path, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (TaskType.REFINE.value, "a.md", priority, TaskStatus.QUEUED.value, db._now()),
+            )
+        conn.commit()
+
+        db.init_db()
+
+        tasks = db.list_tasks()
+        assert [(t.path, t.priority) for t in tasks] == [("a.md", 4)]
+        assert tasks[0].id == 1
+
+
+class TestClaims:
+    def test_claims_follow_priority_then_age(self, queue_db):
+        db.create_task(_task("low.md", priority=1))
+        db.create_task(_task("high.md", priority=5))
+        db.create_task(_task("low2.md", priority=1))
+
+        order = [db.claim_next_task("w").path for _ in range(3)]
+
+        assert order == ["high.md", "low.md", "low2.md"]
+        assert db.claim_next_task("w") is None
+
+    def test_concurrent_claims_never_share_a_task(self, queue_db):
+        for i in range(200):
+            db.create_task(_task(f"note-{i}.md"))
+        claimed: list[int] = []
+        lock = threading.Lock()
+        start = threading.Barrier(8)
+
+        def claimer(n: int) -> None:
+            start.wait()
+            while (task := db.claim_next_task(f"worker-{n}")) is not None:
+                with lock:
+                    claimed.append(task.id)
+
+        threads = [threading.Thread(target=claimer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(claimed) == 200
+        assert len(set(claimed)) == 200
+        assert all(t.status == TaskStatus.IN_PROGRESS for t in db.list_tasks())
+
+    def test_expired_lease_is_reclaimed(self, queue_db):
+        task = db.create_task(_task("a.md"))
+        db.claim_next_task("crashed", lease_seconds=-1)
+
+        reclaimed = db.claim_next_task("w2")
+
+        assert reclaimed.id == task.id
+        assert reclaimed.claimed_by == "w2"
+        assert not db.renew_lease(task.id, "crashed")
+        assert db.finish_task(task.id, "crashed", TaskStatus.DONE) is None
+
+    def test_live_lease_is_not_reclaimed(self, queue_db):
+        db.create_task(_task("a.md"))
+        db.claim_next_task("w1")
+
+        assert db.claim_next_task("w2") is None
+
+    def test_finish_by_owner(self, queue_db):
+        task = db.create_task(_task("a.md"))
+        db.claim_next_task("w1")
+        assert db.set_progress(task.id, "w1", 1, 2)
+        assert not db.set_progress(task.id, "w2", 2, 2)
+
+        finished = db.finish_task(task.id, "w1", TaskStatus.DONE)
+
+        assert finished.status == TaskStatus.DONE
+        assert finished.claimed_by is None
+        assert (finished.progress_done, finished.progress_total) == (1, 2)
+
+    def test_claimed_task_refuses_status_changes(self, queue_db):
+        task = db.create_task(_task("a.md"))
+        claimed = db.claim_next_task("w1")
+
+        with pytest.raises(db.TaskClaimedError):
+            db.update_task(task.id, TaskUpdate(status=TaskStatus.QUEUED))
+
+        unchanged = db.get_task(task.id)
+        assert unchanged.status == TaskStatus.IN_PROGRESS
+        assert unchanged.claimed_by == "w1"
+        assert unchanged.lease_expires_at == claimed.lease_expires_at
+        assert db.claim_next_task("w2") is None
+
+    def test_claimed_task_can_be_cancelled(self, queue_db):
+        task = db.create_task(_task("a.md"))
+        db.claim_next_task("w1")
+
+        cancelled = db.update_task(task.id, TaskUpdate(status=TaskStatus.CANCELLED))
+
+        assert cancelled.status == TaskStatus.CANCELLED
+        assert cancelled.claimed_by is None
+        assert db.finish_task(task.id, "w1", TaskStatus.DONE) is None
+
+    def test_unclaimed_task_status_can_change(self, queue_db):
+        task = db.create_task(_task("a.md"))
+
+        started = db.update_task(task.id, TaskUpdate(status=TaskStatus.IN_PROGRESS))
+        requeued = db.update_task(task.id, TaskUpdate(status=TaskStatus.QUEUED))
+
+        assert started.status == TaskStatus.IN_PROGRESS
+        assert requeued.status == TaskStatus.QUEUED
+        assert db.update_task(99, TaskUpdate(status=TaskStatus.QUEUED)) is None
@@ -0,0 +1,100 @@
+"""Unit tests for the batched embedding client and its checkpoint."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from noteweaver.server import embeddings
+from noteweaver.server.embeddings import EmbeddingCheckpoint, EmbeddingClient, EmbeddingError
+from noteweaver.server.fake_ollama import FakeOllamaServer, fake_embedding
+
+TEXTS = [f"note number {i} about topic {i % 3}" for i in range(6)]
+
+
+class _FailingAfter(FakeOllamaServer):
+    """Answers the first ``ok`` requests, then fails every one after."""
+
+    def __init__(self, ok: int):
+        super().__init__()
+        self.ok = ok
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self.requests > self.ok
+
+
+def _client(server: FakeOllamaServer, **kwargs) -> EmbeddingClient:
+    kwargs.setdefault("backoff_seconds", 0.001)
+    return EmbeddingClient("fake-embed", base_url=server.url, **kwargs)
+
+
+class TestRetries:
+    def test_transient_failures_are_retried(self):
+        with FakeOllamaServer(fail_first=2) as server, _client(server, max_retries=3) as client:
+            vectors = client.embed_documents(TEXTS)
+
+        assert server.failures == 2
+        assert vectors == [fake_embedding(text, server.dim) for text in TEXTS]
+
+    def test_gives_up_after_max_retries(self):
+        with FakeOllamaServer(fail_first=10) as server, _client(server, max_retries=2) as client:
+            with pytest.raises(EmbeddingError, match="after 3 attempts"):
+                client.embed_query("hello")
+
+        assert server.requests == 3
+
+    def test_backoff_doubles_between_attempts(self, monkeypatch):
+        delays = []
+        monkeypatch.setattr(embeddings, "time", SimpleNamespace(sleep=delays.append))
+        with FakeOllamaServer(fail_first=3) as server:
+            with _client(server, max_retries=3, backoff_seconds=1.0) as client:
+                client.embed_query("hello")
+
+        assert len(delays) == 3
+        for attempt, delay in enumerate(delays):
+            assert 2**attempt <= delay <= 2**attempt * 1.1
+
+
+class TestCheckpoint:
+    def test_resume_only_embeds_missing_texts(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        with FakeOllamaServer() as server, _client(server, batch_size=2) as client:
+            client.embed_documents(TEXTS[:4], checkpoint=EmbeddingCheckpoint(path, "fake-embed"))
+            server.embedded = 0
+
+            resumed = EmbeddingCheckpoint(path, "fake-embed")
+            vectors = client.embed_documents(TEXTS, checkpoint=resumed)
+
+        assert server.embedded == 2
+        assert len(resumed) == len(TEXTS)
+        assert vectors == [fake_embedding(text, server.dim) for text in TEXTS]
+
+    def test_failed_run_keeps_finished_batches(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        # One batch in flight at a time: the first succeeds, the second
+        # exhausts its retries and stops the run.
+        with _FailingAfter(ok=1) as server:
+            with _client(server, batch_size=3, max_in_flight=1, max_retries=1) as client:
+                with pytest.raises(EmbeddingError):
+                    client.embed_documents(TEXTS, checkpoint=EmbeddingCheckpoint(path, "fake-embed"))
+
+        assert len(EmbeddingCheckpoint(path, "fake-embed")) == 3
+
+    def test_torn_final_line_is_ignored(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        checkpoint = EmbeddingCheckpoint(path, "fake-embed")
+        checkpoint.add(["a", "b"], [[1.0], [2.0]])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"key": "torn", "vec')
+
+        reloaded = EmbeddingCheckpoint(path, "fake-embed")
+
+        assert len(reloaded) == 2
+        assert reloaded.get("b") == [2.0]
+
+    def test_entries_are_keyed_by_model(self, tmp_path):
+        path = tmp_path / "checkpoint.jsonl"
+        EmbeddingCheckpoint(path, "model-a").add(["text"], [[1.0]])
+
+        assert EmbeddingCheckpoint(path, "model-b").get("text") is None
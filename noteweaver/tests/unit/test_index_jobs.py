@@ -0,0 +1,127 @@
+"""Unit tests for background index jobs."""
+
+import threading
+
+import pytest
+
+from noteweaver.models import IndexJobState, IndexReport
+from noteweaver.server import index_jobs
+from noteweaver.server.index_jobs import IndexJobRunner, _Request
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Builds:
+    """Stands in for indexer.index_directory; each build waits for release()."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+        self.started = threading.Semaphore(0)
+        self._release = threading.Semaphore(0)
+        self.error: Exception | None = None
+
+    def __call__(self, base_dir, embedding_model, **kwargs) -> IndexReport:
+        self.calls.append(kwargs)
+        self.started.release()
+        self._release.acquire(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return IndexReport(added=len(self.calls))
+
+    def release(self) -> None:
+        self._release.release()
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    builds = _Builds()
+    monkeypatch.setattr(index_jobs.indexer, "index_directory", builds)
+    return builds
+
+
+class TestIndexJobRunner:
+    def test_build_runs_in_the_background(self, builds):
+        runner = IndexJobRunner()
+
+        status = runner.start("vault", "model")
+        assert status.state == IndexJobState.RUNNING
+        assert builds.started.acquire(timeout=5)
+        builds.release()
+
+        status = runner.wait(timeout=5)
+        assert status.state == IndexJobState.DONE
+        assert status.report.added == 1
+        assert status.job_id == 1
+
+    def test_requests_during_a_build_are_coalesced_into_one_rerun(self, builds):
+        runner = IndexJobRunner()
+        runner.start("vault", "model")
+        assert builds.started.acquire(timeout=5)
+
+        runner.start("vault", "model")
+        status = runner.start("vault", "model", compact=True)
+        assert status.rerun_pending
+
+        builds.release()
+        assert builds.started.acquire(timeout=5)
+        builds.release()
+        status = runner.wait(timeout=5)
+
+        assert status.state == IndexJobState.DONE
+        assert [call["compact"] for call in builds.calls] == [False, True]
+        assert status.job_id == 2
+        assert not status.rerun_pending
+
+    def test_failed_build_is_reported(self, builds):
+        builds.error = RuntimeError("ollama is down")
+        runner = IndexJobRunner()
+        runner.start("vault", "model")
+        builds.release()
+
+        status = runner.wait(timeout=5)
+
+        assert status.state == IndexJobState.FAILED
+        assert status.error == "ollama is down"
+        assert status.report is None
+
+
+class TestEta:
+    def test_scanning_eta_uses_the_whole_job_across_shards(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(index_jobs.time, "monotonic", clock)
+        runner = IndexJobRunner()
+        runner._begin(_Request())
+
+        # Shard one: 50 of 100 files scanned in 10s, then embedded for 40s.
+        runner._progress("scanning", 50, 100)
+        clock.now += 10
+        runner._progress("embedding", 0, 10)
+        clock.now += 40
+        runner._progress("writing", 0, 10)
+        # Shard two starts scanning again with cumulative file counts.
+        runner._progress("scanning", 60, 100)
+        clock.now += 0.1
+
+        eta = runner.status().eta_seconds
+
+        assert eta is not None
+        assert 30 < eta < 40
+
+    def test_embedding_eta_uses_the_current_phase(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(index_jobs.time, "monotonic", clock)
+        runner = IndexJobRunner()
+        runner._begin(_Request())
+        runner._progress("scanning", 10, 10)
+        clock.now += 100
+        runner._progress("embedding", 0, 100)
+        clock.now += 5
+        runner._progress("embedding", 50, 100)
+
+        assert runner.status().eta_seconds == 5.0
@@ -0,0 +1,59 @@
+"""Unit tests for memory-mapped index snapshots."""
+
+import numpy as np
+
+from noteweaver.server.index_store import IndexSnapshot, current_generation, write_snapshot
+
+CHUNKS = [
+    {"source": "a.md", "chunk_index": 0, "text": "first chunk"},
+    {"source": "a.md", "chunk_index": 1, "text": "second chunk, ünïcode"},
+    {"source": "b.md", "chunk_index": 0, "text": "third chunk"},
+]
+VECTORS = [[3.0, 0.0], [0.0, 2.0], [1.0, 1.0]]
+
+
+class TestIndexSnapshot:
+    def test_round_trip(self, tmp_path):
+        generation = write_snapshot(tmp_path, CHUNKS, VECTORS, "model")
+
+        snapshot = IndexSnapshot.open_current(tmp_path)
+
+        assert snapshot.generation == generation
+        assert snapshot.embedding_model == "model"
+        assert len(snapshot) == 3
+        assert [snapshot.source(i) for i in range(3)] == ["a.md", "a.md", "b.md"]
+        assert [snapshot.text(i) for i in range(3)] == [c["text"] for c in CHUNKS]
+
+    def test_vectors_are_memory_mapped_and_normalized(self, tmp_path):
+        write_snapshot(tmp_path, CHUNKS, VECTORS, "model")
+
+        snapshot = IndexSnapshot.open_current(tmp_path)
+
+        assert isinstance(snapshot.vectors, np.memmap)
+        np.testing.assert_allclose(np.linalg.norm(snapshot.vectors, axis=1), 1.0, rtol=1e-6)
+
+    def test_search_ranks_by_cosine_similarity(self, tmp_path):
+        write_snapshot(tmp_path, CHUNKS, VECTORS, "model")
+        snapshot = IndexSnapshot.open_current(tmp_path)
+
+        results = snapshot.search(np.array([1.0, 0.1]), top_k=2)
+
+        assert [i for i, _ in results] == [0, 2]
+        assert results[0][1] > results[1][1]
+
+    def test_new_generation_replaces_current_and_old_ones_are_pruned(self, tmp_path):
+        first = write_snapshot(tmp_path, CHUNKS, VECTORS, "model")
+        write_snapshot(tmp_path, CHUNKS, VECTORS, "model")
+        third = write_snapshot(tmp_path, CHUNKS[:1], VECTORS[:1], "model")
+
+        assert current_generation(tmp_path) == third
+        assert not (tmp_path / first).exists()
+        assert len(IndexSnapshot.open_current(tmp_path)) == 1
+
+    def test_empty_snapshot(self, tmp_path):
+        write_snapshot(tmp_path, [], np.zeros((0, 0)), "model")
+
+        snapshot = IndexSnapshot.open_current(tmp_path)
+
+        assert len(snapshot) == 0
+        assert snapshot.search(np.array([1.0, 0.0]), top_k=3) == []
@@ -0,0 +1,259 @@
+"""Unit tests for incremental indexing and search."""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from noteweaver.models import SearchMode
+from noteweaver.server import indexer
+from noteweaver.server.embeddings import EmbeddingClient
+from noteweaver.server.fake_ollama import FakeOllamaServer
+from noteweaver.server.metadata import MetadataFilter
+from noteweaver.server.quantize import PQ, VectorFormat
+
+MODEL = "fake-embed"
+
+
+@pytest.fixture
+def client():
+    with FakeOllamaServer() as server, EmbeddingClient(MODEL, base_url=server.url) as client:
+        client.server = server
+        yield client
+
+
+@pytest.fixture
+def vault(tmp_path):
+    for name, topic in (("alpha", "gardening tomatoes"), ("beta", "sourdough baking"),
+                        ("gamma", "rust lifetimes"), ("delta", "chess openings")):
+        (tmp_path / f"{name}.md").write_text(f"# {name}\n\nNotes about {topic}.\n")
+    return tmp_path
+
+
+def _index(vault, client, **kwargs):
+    return indexer.index_directory(str(vault), MODEL, client=client, **kwargs)
+
+
+class TestIncrementalIndex:
+    def test_first_build_adds_every_file(self, vault, client):
+        report = _index(vault, client)
+
+        assert (report.added, report.updated, report.removed) == (4, 0, 0)
+        assert report.indexed_chunks == report.embedded_chunks == 4
+
+    def test_reindex_reports_added_updated_and_removed(self, vault, client):
+        _index(vault, client)
+        (vault / "alpha.md").write_text("# alpha\n\nNotes about pruning apple trees.\n")
+        (vault / "beta.md").unlink()
+        (vault / "epsilon.md").write_text("# epsilon\n\nNotes about knitting.\n")
+
+        report = _index(vault, client)
+
+        assert (report.added, report.updated, report.removed) == (1, 1, 1)
+        assert report.embedded_chunks == 2
+        assert report.indexed_chunks == 4
+
+    def test_unchanged_vault_embeds_nothing(self, vault, client):
+        first = _index(vault, client)
+        client.server.embedded = 0
+
+        report = _index(vault, client)
+
+        assert (report.added, report.updated, report.removed) == (0, 0, 0)
+        assert client.server.embedded == 0
+        assert report.generation == first.generation
+
+    def test_replaced_chunks_are_tombstoned_until_compaction(self, vault, client, monkeypatch):
+        monkeypatch.setattr(indexer, "COMPACT_TOMBSTONE_RATIO", 1.0)
+        _index(vault, client)
+        (vault / "gamma.md").write_text("# gamma\n\nNotes about borrow checking.\n")
+
+        report = _index(vault, client)
+        assert report.tombstones == 1
+        assert not report.compacted
+
+        report = _index(vault, client, compact=True)
+        assert report.tombstones == 0
+        assert report.compacted
+        assert report.indexed_chunks == 4
+
+    def test_search_sees_the_latest_content(self, vault, client):
+        _index(vault, client)
+        (vault / "delta.md").write_text("# delta\n\nNotes about sourdough starters.\n")
+        _index(vault, client)
+
+        results = indexer.search(
+            "sourdough", str(vault), MODEL, top_k=4, client=client, mode=SearchMode.LEXICAL
+        )
+
+        assert {r.path for r in results} == {"beta.md", "delta.md"}
+
+
+class TestChunkDeduplication:
+    def test_identical_chunks_are_embedded_once(self, vault, client):
+        for name in ("footer-1", "footer-2"):
+            (vault / f"{name}.md").write_text("Shared footer that several notes carry.\n")
+
+        report = _index(vault, client)
+
+        assert report.indexed_chunks == 6
+        assert (report.embedded_chunks, report.deduplicated_chunks) == (5, 1)
+        assert client.server.embedded == 5
+
+    def test_moved_text_reuses_its_vector(self, vault, client):
+        _index(vault, client)
+        client.server.embedded = 0
+        (vault / "copy.md").write_text((vault / "gamma.md").read_text())
+
+        report = _index(vault, client)
+
+        assert report.added == 1
+        assert report.embedded_chunks == 0
+        assert client.server.embedded == 0
+
+
+class TestSearchCaches:
+    def test_repeated_search_is_served_from_the_cache(self, vault, client):
+        _index(vault, client)
+        first = indexer.search("sourdough", str(vault), MODEL, client=client)
+        hits = indexer.cache_stats().results.hits
+        embedded = client.server.embedded
+
+        again = indexer.search("  sourdough ", str(vault), MODEL, client=client)
+
+        assert again == first
+        assert indexer.cache_stats().results.hits == hits + 1
+        assert client.server.embedded == embedded
+
+    def test_reindex_invalidates_cached_results(self, vault, client):
+        def search():
+            return indexer.search("starters", str(vault), MODEL, client=client, mode=SearchMode.LEXICAL)
+
+        _index(vault, client)
+        assert search() == []
+
+        (vault / "delta.md").write_text("# delta\n\nNotes about sourdough starters.\n")
+        _index(vault, client)
+
+        assert [r.path for r in search()] == ["delta.md"]
+
+
+@pytest.fixture
+def sharded_vault(vault):
+    for folder, names in (("work", ("alpha", "beta")), ("home", ("gamma",))):
+        (vault / folder).mkdir()
+        for name in names:
+            (vault / f"{name}.md").rename(vault / folder / f"{name}.md")
+    return vault
+
+
+def _index_dir(vault):
+    return vault / indexer.INDEX_DIR_NAME
+
+
+class TestShards:
+    def test_sharded_build_indexes_each_top_level_directory(self, sharded_vault, client):
+        report = _index(sharded_vault, client, sharded=True)
+
+        assert set(report.shards) == {"_root", "home", "work"}
+        assert report.indexed_chunks == 4
+        assert {s.name: s.chunks for s in indexer.shard_info(str(sharded_vault))} == {
+            "_root": 1, "home": 1, "work": 2,
+        }
+        results = indexer.search(
+            "notes", str(sharded_vault), MODEL, top_k=4, client=client, mode=SearchMode.LEXICAL
+        )
+        assert {r.path for r in results} == {"delta.md", "home/gamma.md", "work/alpha.md", "work/beta.md"}
+
+    def test_rebuilding_one_shard_leaves_the_others_alone(self, sharded_vault, client):
+        first = _index(sharded_vault, client, sharded=True)
+        (sharded_vault / "work" / "alpha.md").write_text("# alpha\n\nNotes about compost.\n")
+        (sharded_vault / "home" / "gamma.md").write_text("# gamma\n\nNotes about compost too.\n")
+
+        report = _index(sharded_vault, client, sharded=True, shards=["work"])
+
+        assert set(report.shards) == {"work"}
+        assert report.updated == 1
+        loaded = indexer.get_shards(str(sharded_vault))
+        assert loaded["home"].generation == first.shards["home"]
+        assert loaded["work"].generation != first.shards["work"]
+        results = indexer.search(
+            "compost", str(sharded_vault), MODEL, client=client, mode=SearchMode.LEXICAL
+        )
+        assert [r.path for r in results] == ["work/alpha.md"]
+
+    def test_switching_to_shards_removes_the_flat_layout(self, sharded_vault, client):
+        _index(sharded_vault, client)
+        client.server.embedded = 0
+
+        report = _index(sharded_vault, client, sharded=True)
+
+        assert set(report.shards) == {"_root", "home", "work"}
+        assert client.server.embedded == 0
+        assert not (_index_dir(sharded_vault) / "CURRENT").exists()
+        assert not list(_index_dir(sharded_vault).glob("gen-*"))
+        assert set(indexer.get_shards(str(sharded_vault))) == {"_root", "home", "work"}
+
+    def test_switching_back_removes_the_shards(self, sharded_vault, client):
+        _index(sharded_vault, client, sharded=True)
+        client.server.embedded = 0
+
+        report = _index(sharded_vault, client)
+
+        assert report.generation is not None
+        assert report.indexed_chunks == 4
+        assert client.server.embedded == 0
+        assert not (_index_dir(sharded_vault) / indexer.SHARDS_DIR).exists()
+        assert set(indexer.load_index(str(sharded_vault))) == {indexer.UNSHARDED}
+
+    def test_metadata_filters_combine_across_shards(self, sharded_vault, client):
+        for path in ("work/alpha.md", "home/gamma.md"):
+            note = sharded_vault / path
+            note.write_text("---\ntags: [garden]\n---\n" + note.read_text())
+        _index(sharded_vault, client, sharded=True)
+
+        def search(mode=SearchMode.LEXICAL, **kwargs):
+            results = indexer.search(
+                "notes", str(sharded_vault), MODEL, top_k=4, client=client, mode=mode,
+                metadata_filter=MetadataFilter(**kwargs),
+            )
+            return sorted(r.path for r in results)
+
+        assert search(tags=["garden"]) == ["home/gamma.md", "work/alpha.md"]
+        for mode in SearchMode:
+            assert search(mode, path_prefix="work", tags=["Garden"]) == ["work/alpha.md"]
+        assert search(path_prefix="work/", tags=["garden"], modified_after=datetime.now(timezone.utc)) == []
+        assert search(path_prefix="delta.md") == ["delta.md"]
+
+    def test_fan_out_merges_shards_by_score(self):
+        # The snapshot slot carries the shard name for the fake ranker.
+        per_shard = {"a": [(0, 0.9), (1, 0.4)], "b": [(0, 0.7), (1, 0.4)], "c": [(0, 0.95)]}
+        shards = [(name, name, None) for name in per_shard]
+
+        hits = indexer._fan_out(shards, lambda name, rows: per_shard[name], 4)
+
+        assert hits == [(0.95, "c", 0), (0.9, "a", 0), (0.7, "b", 0), (0.4, "a", 1)]
+
+
+class TestQuantizedIndex:
+    def test_pq_reindex_without_floats_keeps_the_codebook_and_codes(self, vault, client):
+        fmt = VectorFormat(kind=PQ, pq_subvectors=4, keep_float=False)
+        _index(vault, client, vector_format=fmt)
+        before = indexer.get_shards(str(vault))[indexer.UNSHARDED]
+        codes = {before.source(i): before.codec.codes[i].copy() for i in range(before.count)}
+        centroids = [c.copy() for c in before.codec.centroids]
+
+        (vault / "delta.md").write_text("# delta\n\nNotes about endgame tablebases.\n")
+        (vault / "epsilon.md").write_text("# epsilon\n\nNotes about knitting.\n")
+        report = _index(vault, client, vector_format=fmt)
+
+        after = indexer.get_shards(str(vault))[indexer.UNSHARDED]
+        assert (report.updated, report.added) == (1, 1)
+        assert after.vectors is None
+        for old, new in zip(centroids, after.codec.centroids):
+            np.testing.assert_array_equal(old, new)
+        live = [i for i in range(after.count) if after.live[i]]
+        assert {after.source(i) for i in live} == {"alpha.md", "beta.md", "gamma.md", "delta.md", "epsilon.md"}
+        for i in live:
+            if after.source(i) in ("alpha.md", "beta.md", "gamma.md"):
+                np.testing.assert_array_equal(after.codec.codes[i], codes[after.source(i)])
@@ -0,0 +1,85 @@
+"""Unit tests for BM25 lexical search and rank fusion."""
+
+import math
+
+import numpy as np
+import pytest
+
+from noteweaver.server.lexical import BM25Index, reciprocal_rank_fusion, tokenize, write_postings
+
+TEXTS = ["apple banana", "apple apple cherry", "durian"]
+
+
+@pytest.fixture
+def bm25(tmp_path):
+    write_postings(tmp_path, TEXTS)
+    return BM25Index(tmp_path)
+
+
+class TestTokenize:
+    def test_identifier_is_kept_whole_and_split_into_parts(self):
+        assert tokenize("ERR_CONN-42") == ["err_conn-42", "err", "conn", "42"]
+
+    def test_plain_words_are_lowercased(self):
+        assert tokenize("Hello, World") == ["hello", "world"]
+
+
+class TestBM25Index:
+    def test_scores_match_a_hand_computed_example(self, bm25):
+        # n=3, df("apple")=2, doc lengths 2, 3, 1 (avgdl 2).
+        idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+        norm0 = 1.2 * (1 - 0.75 + 0.75 * 2 / 2)
+        norm1 = 1.2 * (1 - 0.75 + 0.75 * 3 / 2)
+
+        scores = bm25.scores("apple")
+
+        assert scores[0] == pytest.approx(idf * 1 * 2.2 / (1 + norm0))
+        assert scores[1] == pytest.approx(idf * 2 * 2.2 / (2 + norm1))
+        assert scores[2] == 0
+
+    def test_repeated_query_terms_count_once(self, bm25):
+        assert list(bm25.scores("apple apple")) == list(bm25.scores("apple"))
+
+    def test_unknown_terms_score_nothing(self, bm25):
+        assert not bm25.scores("zebra").any()
+
+    @pytest.mark.parametrize("rows", [[1], [0, 2], [0, 1, 2]])
+    def test_scores_of_rows_match_the_full_scores(self, bm25, rows):
+        rows = np.array(rows)
+
+        scores = bm25.scores("apple cherry", rows)
+
+        np.testing.assert_allclose(scores, bm25.scores("apple cherry")[rows])
+
+    def test_tombstones_do_not_count_towards_idf_or_average_length(self, tmp_path):
+        write_postings(tmp_path, TEXTS + ["apple apple apple apple apple"])
+        live = np.array([True, True, True, False])
+
+        scores = BM25Index(tmp_path, live).scores("apple")
+
+        (tmp_path / "live-only").mkdir()
+        write_postings(tmp_path / "live-only", TEXTS)
+        np.testing.assert_allclose(scores[:3], BM25Index(tmp_path / "live-only").scores("apple"))
+
+    def test_term_only_in_tombstones_scores_nothing(self, tmp_path):
+        write_postings(tmp_path, TEXTS + ["zebra"])
+
+        assert not BM25Index(tmp_path, np.array([True, True, True, False])).scores("zebra").any()
+
+
+class TestReciprocalRankFusion:
+    def test_documents_in_both_rankings_rank_first(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["c", "a"]])
+
+        assert [doc for doc, _ in fused] == ["a", "c", "b"]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+    def test_ties_keep_first_seen_order(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["b", "a"]])
+
+        assert [doc for doc, _ in fused] == ["a", "b"]
+        assert fused[0][1] == fused[1][1]
+
+    def test_empty_rankings(self):
+        assert reciprocal_rank_fusion([]) == []
+        assert reciprocal_rank_fusion([[], ["x"]]) == [("x", pytest.approx(1 / 61))]
@@ -0,0 +1,52 @@
+"""Unit tests for the LRU cache."""
+
+from noteweaver.server.lru import LRUCache
+
+
+class TestLRUCache:
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    def test_put_refreshes_an_existing_key(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("a", 10)
+        cache.put("c", 3)
+
+        assert cache.get("a") == 10
+        assert cache.get("b") is None
+
+    def test_counters(self):
+        cache = LRUCache(4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing", "default")
+
+        counters = cache.counters()
+
+        assert (counters.hits, counters.misses, counters.size, counters.maxsize) == (1, 1, 1, 4)
+
+    def test_resize_drops_the_oldest_entries(self):
+        cache = LRUCache(3)
+        for key in "abc":
+            cache.put(key, key)
+
+        cache.resize(1)
+
+        assert len(cache) == 1
+        assert cache.get("c") == "c"
+
+    def test_zero_size_stores_nothing(self):
+        cache = LRUCache(0)
+        cache.put("a", 1)
+
+        assert len(cache) == 0
+        assert cache.get("a") is None
@@ -0,0 +1,106 @@
+"""Unit tests for metadata filters."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from noteweaver.server.metadata import MetadataFilter, MetadataIndex, parse_tags
+
+BASE_NS = 1_700_000_000 * 10**9
+
+# path: (chunk ids, seconds after BASE_NS, tags)
+FILES = {
+    "a.md": ([0], 0, ["x"]),
+    "a/x.md": ([1, 2], 1, ["x", "y"]),
+    "a/y/z.md": ([7], 2, ["y"]),
+    "ab/y.md": ([3], 3, ["x", "y"]),
+    "b.md": ([4, 5], 4, []),
+    "c/d.md": ([6], 5, ["x"]),
+}
+
+
+def _at(seconds: int) -> datetime:
+    return datetime.fromtimestamp(BASE_NS // 10**9 + seconds, tz=timezone.utc)
+
+
+@pytest.fixture
+def index():
+    return MetadataIndex({
+        path: {"chunks": chunks, "mtime_ns": BASE_NS + offset * 10**9, "tags": tags}
+        for path, (chunks, offset, tags) in FILES.items()
+    })
+
+
+def _paths(index: MetadataIndex, **kwargs) -> list[str]:
+    selected = index.files(MetadataFilter(**kwargs))
+    numbers = range(len(index.paths))[selected] if isinstance(selected, slice) else selected
+    return [index.paths[n] for n in numbers]
+
+
+class TestMetadataFilter:
+    @pytest.mark.parametrize("prefix", ["", "/", ".", None])
+    def test_empty_prefix_filters_nothing(self, prefix):
+        assert not MetadataFilter(path_prefix=prefix)
+
+    def test_prefix_and_tags_are_normalized(self):
+        flt = MetadataFilter(path_prefix="\\a\\b/", tags=["#Y", " x ", "y", ""])
+
+        assert flt.path_prefix == "a/b"
+        assert flt.tags == ["x", "y"]
+
+
+class TestPrefix:
+    def test_directory_prefix_does_not_match_siblings(self, index):
+        assert _paths(index, path_prefix="a") == ["a/x.md", "a/y/z.md"]
+
+    def test_trailing_slash_is_ignored(self, index):
+        assert _paths(index, path_prefix="a/") == _paths(index, path_prefix="a")
+
+    def test_nested_directory(self, index):
+        assert _paths(index, path_prefix="a/y") == ["a/y/z.md"]
+
+    def test_prefix_naming_a_file(self, index):
+        assert _paths(index, path_prefix="a.md") == ["a.md"]
+        assert _paths(index, path_prefix="a/x") == []
+
+    def test_no_prefix_selects_every_file(self, index):
+        assert _paths(index) == sorted(FILES)
+
+
+class TestTagsAndTime:
+    def test_tags_are_intersected(self, index):
+        assert _paths(index, tags=["x", "y"]) == ["a/x.md", "ab/y.md"]
+        assert _paths(index, tags=["x", "missing"]) == []
+
+    def test_modified_after_is_exclusive(self, index):
+        assert _paths(index, modified_after=_at(3)) == ["b.md", "c/d.md"]
+        assert _paths(index, modified_after=_at(2)) == ["ab/y.md", "b.md", "c/d.md"]
+        assert _paths(index, modified_after=_at(5)) == []
+
+    def test_modified_after_before_every_note(self, index):
+        assert _paths(index, modified_after=_at(-1)) == sorted(FILES)
+
+    def test_filters_combine(self, index):
+        assert _paths(index, path_prefix="a", tags=["y"], modified_after=_at(1)) == ["a/y/z.md"]
+        assert _paths(index, tags=["y"], modified_after=_at(0)) == ["a/x.md", "a/y/z.md", "ab/y.md"]
+
+
+class TestRowsFor:
+    def test_rows_are_sorted_chunk_ids(self, index):
+        rows = index.rows_for(MetadataFilter(path_prefix="a"))
+
+        assert rows.tolist() == [1, 2, 7]
+
+    def test_rows_of_scattered_files(self, index):
+        rows = index.rows_for(MetadataFilter(tags=["x"]))
+
+        assert rows.tolist() == [0, 1, 2, 3, 6]
+
+    def test_no_match(self, index):
+        assert index.rows_for(MetadataFilter(tags=["missing"])).tolist() == []
+
+
+class TestParseTags:
+    def test_inline_and_block_lists(self):
+        assert parse_tags(["tags: [Alpha, '#beta']"]) == ["alpha", "beta"]
+        assert parse_tags(["title: x", "tags:", "  - one", "  - two", "other: y"]) == ["one", "two"]
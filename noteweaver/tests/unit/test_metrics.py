@@ -0,0 +1,104 @@
+"""Unit tests for the Prometheus metrics and their text rendering."""
+
+import pytest
+
+from noteweaver.server import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty registry, so test metrics stay out of the server's."""
+    monkeypatch.setattr(metrics, "_registry", [])
+
+
+class TestCounterAndGauge:
+    def test_counter_with_labels(self, registry):
+        counter = metrics.Counter("requests_total", "Requests.", ("method", "path"))
+        counter.inc(path="/b", method="GET")
+        counter.inc(2, path="/a", method="GET")
+        counter.inc(0.5, path="/a", method="GET")
+
+        assert counter.render().splitlines() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{method="GET",path="/a"} 2.5',
+            'requests_total{method="GET",path="/b"} 1',
+        ]
+
+    def test_label_values_are_escaped(self, registry):
+        counter = metrics.Counter("c", "C.", ("name",))
+        counter.inc(name='a"b\\c\nd')
+
+        assert list(counter.samples()) == ['c{name="a\\"b\\\\c\\nd"} 1']
+
+    def test_wrong_labels_are_rejected(self, registry):
+        counter = metrics.Counter("c", "C.", ("name",))
+
+        with pytest.raises(ValueError):
+            counter.inc()
+        with pytest.raises(ValueError):
+            counter.inc(name="x", other="y")
+
+    def test_gauge_replace_drops_missing_label_sets(self, registry):
+        gauge = metrics.Gauge("g", "G.", ("shard",))
+        gauge.set(3, shard="a")
+        gauge.set(4, shard="b")
+
+        gauge.replace({("b",): 5})
+
+        assert list(gauge.samples()) == ['g{shard="b"} 5']
+
+    def test_unlabelled_gauge(self, registry):
+        gauge = metrics.Gauge("g", "G.")
+        gauge.inc(2)
+        gauge.dec()
+
+        assert list(gauge.samples()) == ["g 1"]
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative_and_inclusive(self, registry):
+        histogram = metrics.Histogram("latency_seconds", "Latency.", (1, 0.5, 5), ("mode",))
+        for value in (0.1, 0.5, 0.7, 5, 9):
+            histogram.observe(value, mode="hybrid")
+
+        assert histogram.render().splitlines() == [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{mode="hybrid",le="0.5"} 2',
+            'latency_seconds_bucket{mode="hybrid",le="1"} 3',
+            'latency_seconds_bucket{mode="hybrid",le="5"} 4',
+            'latency_seconds_bucket{mode="hybrid",le="+Inf"} 5',
+            'latency_seconds_sum{mode="hybrid"} 15.3',
+            'latency_seconds_count{mode="hybrid"} 5',
+        ]
+
+    def test_label_sets_are_rendered_separately(self, registry):
+        histogram = metrics.Histogram("h", "H.", (1,), ("outcome",))
+        histogram.observe(2, outcome="failed")
+        histogram.observe(0.5, outcome="done")
+
+        assert list(histogram.samples()) == [
+            'h_bucket{outcome="done",le="1"} 1',
+            'h_bucket{outcome="done",le="+Inf"} 1',
+            'h_sum{outcome="done"} 0.5',
+            'h_count{outcome="done"} 1',
+            'h_bucket{outcome="failed",le="1"} 0',
+            'h_bucket{outcome="failed",le="+Inf"} 1',
+            'h_sum{outcome="failed"} 2',
+            'h_count{outcome="failed"} 1',
+        ]
+
+    def test_unobserved_histogram_has_no_samples(self, registry):
+        assert list(metrics.Histogram("h", "H.", (1,)).samples()) == []
+
+
+class TestRender:
+    def test_every_registered_metric_is_rendered(self, registry):
+        metrics.Counter("a_total", "A.").inc()
+        metrics.Gauge("b", "B.").set(2)
+
+        assert metrics.render() == (
+            "# HELP a_total A.\n# TYPE a_total counter\na_total 1\n"
+            "# HELP b B.\n# TYPE b gauge\nb 2\n"
+        )
@@ -0,0 +1,102 @@
+"""Unit tests for int8 and product-quantized vector storage."""
+
+import numpy as np
+import pytest
+
+from noteweaver.server.index_store import IndexSnapshot, write_snapshot
+from noteweaver.server.quantize import PQ, Int8Codec, ProductQuantizer, VectorFormat, normalize
+
+DIM = 32
+
+
+def _clustered(n: int, seed: int = 0, spread: float = 0.3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(99).normal(size=(20, DIM))
+    points = centers[rng.integers(0, len(centers), n)] + spread * rng.normal(size=(n, DIM))
+    return normalize(points).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return _clustered(2000)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return _clustered(50, seed=1, spread=1.0)
+
+
+def _recall_at_10(snapshot: IndexSnapshot, vectors: np.ndarray, queries: np.ndarray) -> float:
+    found = 0
+    for query in queries:
+        exact = set(np.argsort(-(vectors @ query))[:10].tolist())
+        found += len(exact & {i for i, _ in snapshot.search(query, 10)})
+    return found / (10 * len(queries))
+
+
+class TestInt8Codec:
+    def test_round_trip_error_is_within_half_a_step(self, vectors):
+        codec = Int8Codec.encode(vectors)
+
+        error = np.abs(codec.decode(slice(None)) - vectors)
+
+        assert (error <= codec.scales[:, None] / 2 + 1e-7).all()
+
+    def test_zero_rows_decode_to_zero(self):
+        codec = Int8Codec.encode(np.zeros((2, 4), dtype=np.float32))
+
+        assert not codec.decode(slice(None)).any()
+
+
+class TestProductQuantizer:
+    def test_round_trip_error_is_bounded(self, vectors):
+        pq = ProductQuantizer.train(vectors, 8)
+
+        decoded = pq.decode(slice(None))
+
+        assert pq.codes.shape == (len(vectors), 8)
+        assert np.linalg.norm(decoded - vectors) / np.linalg.norm(vectors) < 0.25
+
+    def test_encoding_decoded_vectors_returns_the_same_codes(self, vectors):
+        pq = ProductQuantizer.train(vectors, 8)
+
+        assert (pq.encode(pq.decode(slice(None))) == pq.codes).all()
+
+    def test_adc_scores_equal_the_decoded_inner_products(self, vectors, queries):
+        pq = ProductQuantizer.train(vectors, 8)
+        rows = np.arange(0, len(vectors), 7)
+
+        for query in queries[:5]:
+            decoded = pq.decode(slice(None)) @ query
+            np.testing.assert_allclose(pq.scores(query), decoded, rtol=1e-4, atol=1e-5)
+            np.testing.assert_allclose(pq.scores(query, rows), decoded[rows], rtol=1e-4, atol=1e-5)
+
+    def test_adc_candidates_contain_the_exact_best_match(self, vectors, queries):
+        pq = ProductQuantizer.train(vectors, 8)
+
+        best_in_candidates = [
+            np.argmax(vectors @ query) in np.argsort(-pq.scores(query))[:40] for query in queries
+        ]
+
+        assert np.mean(best_in_candidates) >= 0.9
+
+
+class TestQuantizedSearch:
+    def _snapshot(self, tmp_path, vectors, keep_float: bool) -> IndexSnapshot:
+        chunks = [{"source": f"{i}.md", "chunk_index": 0, "text": f"chunk {i}"} for i in range(len(vectors))]
+        fmt = VectorFormat(kind=PQ, pq_subvectors=8, keep_float=keep_float)
+        write_snapshot(tmp_path, chunks, vectors, "model", vector_format=fmt)
+        return IndexSnapshot.open_current(tmp_path)
+
+    def test_rerank_recovers_recall(self, tmp_path, vectors, queries):
+        snapshot = self._snapshot(tmp_path, vectors, keep_float=True)
+
+        assert _recall_at_10(snapshot, vectors, queries) >= 0.9
+
+    def test_codes_alone_have_lower_recall(self, tmp_path, vectors, queries):
+        snapshot = self._snapshot(tmp_path, vectors, keep_float=False)
+
+        recall = _recall_at_10(snapshot, vectors, queries)
+
+        assert snapshot.vectors is None
+        assert 0.3 <= recall < 0.9
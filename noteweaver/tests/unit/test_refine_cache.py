@@ -0,0 +1,111 @@
+"""Unit tests for the refine output cache."""
+
+import dataclasses
+import os
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+
+from noteweaver.refine import RefineNote
+from noteweaver.server.refine_cache import RefineCache
+
+
+@pytest.fixture
+def output(tmp_path):
+    def write(text: str):
+        path = tmp_path / "out.md"
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    return write
+
+
+def _age(cache: RefineCache, key: str, seconds_ago: int) -> None:
+    # A hit refreshes the mtime; set it explicitly so LRU order is exact.
+    mtime = os.stat(cache._output(key)).st_mtime - seconds_ago
+    os.utime(cache._output(key), (mtime, mtime))
+
+
+class TestCacheKey:
+    def test_same_content_same_key(self):
+        assert RefineNote.cache_key("note") == RefineNote.cache_key("note")
+
+    def test_key_changes_with_content(self):
+        assert RefineNote.cache_key("note") != RefineNote.cache_key("note ")
+
+    def test_key_changes_with_model(self, monkeypatch):
+        before = RefineNote.cache_key("note")
+        monkeypatch.setattr(RefineNote, "_config", dataclasses.replace(RefineNote._config, model="other-model"))
+
+        assert RefineNote.cache_key("note") != before
+
+    def test_key_changes_with_prompt(self, monkeypatch):
+        before = RefineNote.cache_key("note")
+        monkeypatch.setattr(RefineNote, "_refine_prompt", ChatPromptTemplate.from_template("Rewrite: {raw_note}"))
+
+        assert RefineNote.cache_key("note") != before
+
+
+class TestRefineCache:
+    def test_hit_copies_the_output_and_counts_saved_time(self, tmp_path, output):
+        cache = RefineCache(tmp_path / "cache", 1024)
+        cache.put("k", output("refined"), 2.5)
+        destination = tmp_path / "dest.md"
+
+        assert cache.copy_to("k", destination)
+        assert destination.read_text(encoding="utf-8") == "refined"
+        assert (cache.hits, cache.misses, cache.saved_seconds) == (1, 0, 2.5)
+
+    def test_miss_is_counted(self, tmp_path):
+        cache = RefineCache(tmp_path / "cache", 1024)
+
+        assert not cache.copy_to("missing", tmp_path / "dest.md")
+        assert not (tmp_path / "dest.md").exists()
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_least_recently_used_entry_is_evicted(self, tmp_path, output):
+        cache = RefineCache(tmp_path / "cache", 25)
+        cache.put("old", output("a" * 10), 1.0)
+        cache.put("used", output("b" * 10), 1.0)
+        _age(cache, "old", 20)
+        _age(cache, "used", 30)
+        assert cache.copy_to("used", tmp_path / "dest.md")
+
+        cache.put("new", output("c" * 10), 1.0)
+
+        stats = cache.stats()
+        assert (stats.entries, stats.bytes) == (2, 20)
+        assert not cache.copy_to("old", tmp_path / "dest.md")
+        assert cache.copy_to("used", tmp_path / "dest.md")
+        assert cache.copy_to("new", tmp_path / "dest.md")
+
+    def test_output_larger_than_the_budget_is_not_stored(self, tmp_path, output):
+        cache = RefineCache(tmp_path / "cache", 5)
+
+        cache.put("k", output("too long"), 1.0)
+
+        assert cache.stats().entries == 0
+
+    def test_disabled_cache_stores_nothing(self, tmp_path, output):
+        cache = RefineCache(tmp_path / "cache", 0)
+        cache.put("k", output("refined"), 1.0)
+
+        assert not cache.copy_to("k", tmp_path / "dest.md")
+        assert not (tmp_path / "cache").exists()
+
+    def test_entries_survive_a_restart(self, tmp_path, output):
+        RefineCache(tmp_path / "cache", 1024).put("k", output("refined"), 1.0)
+
+        cache = RefineCache(tmp_path / "cache", 1024)
+
+        assert cache.stats().entries == 1
+        assert cache.copy_to("k", tmp_path / "dest.md")
+
+    def test_unreadable_entry_is_dropped_as_a_miss(self, tmp_path, output):
+        cache = RefineCache(tmp_path / "cache", 1024)
+        cache.put("k", output("refined"), 1.0)
+        cache._meta("k").write_text("not json", encoding="utf-8")
+
+        assert not cache.copy_to("k", tmp_path / "dest.md")
+        assert (cache.misses, cache.stats().entries) == (1, 0)
+        assert not cache._output("k").exists()
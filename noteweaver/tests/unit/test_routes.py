@@ -0,0 +1,162 @@
+"""Unit tests for the task HTTP routes."""
+
+import asyncio
+import json
+from collections.abc import Callable
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from noteweaver.models import TaskStatus
+from noteweaver.server import db
+from noteweaver.server.config import ServerConfig
+from noteweaver.server.routes import _task_events, router
+
+
+@pytest.fixture
+def client(queue_db):
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        yield client
+
+
+def _events(client: TestClient, task_id: int) -> list[tuple[str, dict]]:
+    """Read the task's event stream to its end, as ``(event, data)`` pairs."""
+    events = []
+    with client.stream("GET", f"/tasks/{task_id}/events") as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        event, data = "message", []
+        for line in r.iter_lines():
+            if line.startswith("event:"):
+                event = line.removeprefix("event:").strip()
+            elif line.startswith("data:"):
+                data.append(line.removeprefix("data:").strip())
+            elif not line and data:
+                events.append((event, json.loads("\n".join(data))))
+                event, data = "message", []
+    return events
+
+
+def _follow(task_id: int, steps: list[Callable[[], object]]) -> list[tuple[str, dict]]:
+    """Collect the task's events, running the next step after each one."""
+
+    async def follow() -> list[tuple[str, dict]]:
+        events = []
+        pending = iter(steps)
+        async for message in _task_events(task_id):
+            if message.startswith(":"):
+                continue
+            event, data = message.strip().split("\n")
+            events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+            step = next(pending, None)
+            if step is not None:
+                await asyncio.to_thread(step)
+        return events
+
+    return asyncio.run(follow())
+
+
+class TestTaskRoutes:
+    def test_duplicate_post_is_coalesced(self, client):
+        first = client.post("/tasks", json={"path": "a.md"})
+        again = client.post("/tasks", json={"path": "a.md", "priority": 4})
+
+        assert first.status_code == 201
+        assert again.status_code == 200
+        assert again.json()["id"] == first.json()["id"]
+        assert again.json()["priority"] == 4
+
+    def test_batch(self, client):
+        r = client.post("/tasks/batch", json=[{"path": "a.md"}, {"path": "a.md"}, {"path": "b.md"}])
+
+        assert r.status_code == 201
+        assert r.json() == {"created": 2, "coalesced": 1}
+
+    @pytest.mark.parametrize("path", ["/etc/passwd", "../outside.md", "notes/../../outside.md"])
+    def test_batch_rejects_paths_outside_base_dir(self, client, queue_db, monkeypatch, path):
+        # Imported here: the app module sets up logging in the working directory.
+        from noteweaver.server import app as server_app
+
+        monkeypatch.setattr(server_app, "config", ServerConfig(base_dir=str(queue_db.parent), model="test"))
+
+        r = client.post("/tasks/batch", json=[{"path": "a.md"}, {"path": path}])
+
+        assert r.status_code == 400
+        assert db.list_tasks() == []
+
+    def test_patch_onto_a_queued_path_conflicts(self, client):
+        client.post("/tasks", json={"path": "a.md"})
+        other = client.post("/tasks", json={"path": "b.md"}).json()
+
+        r = client.patch(f"/tasks/{other['id']}", json={"path": "a.md"})
+
+        assert r.status_code == 409
+
+    def test_patch_status_of_a_claimed_task_conflicts(self, client):
+        task = client.post("/tasks", json={"path": "a.md"}).json()
+        db.claim_next_task("w")
+
+        r = client.patch(f"/tasks/{task['id']}", json={"status": "QUEUED"})
+
+        assert r.status_code == 409
+        assert db.get_task(task["id"]).claimed_by == "w"
+
+    def test_missing_task(self, client):
+        assert client.get("/tasks/99").status_code == 404
+        assert client.get("/tasks/99/events").status_code == 404
+
+
+class TestTaskEvents:
+    def test_finished_task_sends_one_event(self, client):
+        task = client.post("/tasks", json={"path": "a.md"}).json()
+        db.claim_next_task("w")
+        db.finish_task(task["id"], "w", TaskStatus.DONE)
+
+        events = _events(client, task["id"])
+
+        assert [(e, d["status"]) for e, d in events] == [("task", "DONE")]
+
+    def test_stream_follows_the_task_until_it_finishes(self, client):
+        task = client.post("/tasks", json={"path": "a.md"}).json()
+        # TestClient buffers whole responses, so the live stream is read
+        # from its generator; each change is made once the previous state
+        # has been sent.
+        steps = [
+            lambda: db.claim_next_task("w"),
+            lambda: db.set_progress(task["id"], "w", 1, 2),
+            lambda: db.finish_task(task["id"], "w", TaskStatus.DONE),
+        ]
+
+        events = _follow(task["id"], steps)
+
+        assert [(e, d["status"], d["progress_done"]) for e, d in events] == [
+            ("task", "QUEUED", None),
+            ("task", "IN_PROGRESS", None),
+            ("task", "IN_PROGRESS", 1),
+            ("task", "DONE", 1),
+        ]
+
+    def test_deleted_task_ends_the_stream(self, client):
+        task = client.post("/tasks", json={"path": "a.md"}).json()
+
+        events = _follow(task["id"], [lambda: db.delete_task(task["id"])])
+
+        assert [e for e, _ in events] == ["task", "deleted"]
+
+
+class TestMetricsRoute:
+    def test_prometheus_text_format(self, client):
+        client.post("/tasks", json={"path": "a.md"})
+
+        r = client.get("/metrics")
+
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        lines = r.text.splitlines()
+        assert "# TYPE noteweaver_tasks gauge" in lines
+        assert 'noteweaver_tasks{status="QUEUED"} 1' in lines
+        assert "# TYPE noteweaver_task_duration_seconds histogram" in lines
+        assert r.text.endswith("\n")
@@ -0,0 +1,199 @@
+"""Unit tests for the queue worker pool."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from noteweaver.models import TaskCreate, TaskStatus, TaskUpdate
+from noteweaver.server import db, worker
+from noteweaver.server.refine_cache import RefineCache
+
+ORIGINAL = "# note\n\noriginal text\n"
+
+
+def _wait_for_status(task_id: int, status: TaskStatus, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if db.get_task(task_id).status == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"task {task_id} is {db.get_task(task_id).status}, expected {status}")
+
+
+def _wait_until_running(pool: worker.WorkerPool, task_id: int, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while task_id not in pool._running:
+        if time.monotonic() > deadline:
+            raise AssertionError(f"task {task_id} never started")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def note(queue_db):
+    path = queue_db.parent / "note.md"
+    path.write_text(ORIGINAL)
+    return path
+
+
+@pytest.fixture
+def refine(monkeypatch):
+    """Replace the model call; ``refine.hang`` makes it wait until cancelled.
+
+    Also records how many refines of each note overlap.
+    """
+
+    class FakeRefine:
+        hang = False
+        delay = 0.0
+        active: dict[str, int] = {}
+        peak: dict[str, int] = {}
+        peak_total = 0
+
+        @staticmethod
+        async def astream(path, content=None, progress=None):
+            FakeRefine.active[path] = FakeRefine.active.get(path, 0) + 1
+            FakeRefine.peak[path] = max(FakeRefine.peak.get(path, 0), FakeRefine.active[path])
+            FakeRefine.peak_total = max(FakeRefine.peak_total, sum(FakeRefine.active.values()))
+            try:
+                if FakeRefine.hang:
+                    await asyncio.Event().wait()
+                await asyncio.sleep(FakeRefine.delay)
+                if progress is not None:
+                    await progress(1, 1)
+                yield "# note\n\n"
+                yield "refined text\n"
+            finally:
+                FakeRefine.active[path] -= 1
+
+    monkeypatch.setattr(worker.RefineNote, "astream", FakeRefine.astream)
+    return FakeRefine
+
+
+def _start(note, **kwargs) -> worker.WorkerPool:
+    return worker.start_workers(str(note.parent), **kwargs)
+
+
+class TestWorkerPool:
+    def test_refines_the_note_in_place(self, note, refine):
+        pool = _start(note)
+        try:
+            task = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_for_status(task.id, TaskStatus.DONE)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert note.read_text() == "# note\n\nrefined text\n"
+        assert db.get_task(task.id).progress_done == 1
+        backups = list((note.parent / ".noteweaver" / "backups").iterdir())
+        assert [b.read_text() for b in backups] == [ORIGINAL]
+
+    def test_file_io_runs_off_the_event_loop(self, note, refine, monkeypatch):
+        threads = {}
+        for name in ("backup_before_refine", "_swap_in"):
+            original = getattr(worker, name)
+
+            def record(*args, _name=name, _original=original):
+                threads[_name] = threading.current_thread()
+                return _original(*args)
+
+            monkeypatch.setattr(worker, name, record)
+        pool = _start(note)
+        try:
+            task = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_for_status(task.id, TaskStatus.DONE)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert set(threads) == {"backup_before_refine", "_swap_in"}
+        assert pool.thread not in threads.values()
+        assert note.read_text() == "# note\n\nrefined text\n"
+
+    def test_cache_hit_skips_the_model(self, note, refine, monkeypatch):
+        cache = RefineCache(note.parent / "cache", 1024 * 1024)
+        pool = _start(note, cache=cache)
+        try:
+            first = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_for_status(first.id, TaskStatus.DONE)
+
+            async def no_model(*args, **kwargs):
+                raise AssertionError("the model was called on a cache hit")
+                yield
+
+            monkeypatch.setattr(worker.RefineNote, "astream", no_model)
+            note.write_text(ORIGINAL)
+            second = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_for_status(second.id, TaskStatus.DONE)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert note.read_text() == "# note\n\nrefined text\n"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_one_note_is_never_refined_twice_at_once(self, note, refine):
+        refine.delay = 0.1
+        other = note.with_name("other.md")
+        other.write_text(ORIGINAL)
+        pool = _start(note, count=3)
+        try:
+            first = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_until_running(pool, first.id)
+            # Not coalesced: the first task for this note is no longer queued.
+            tasks = [first] + [db.create_task(TaskCreate(path=p.name)) for p in (note, other)]
+            worker.notify()
+            for task in tasks:
+                _wait_for_status(task.id, TaskStatus.DONE)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert refine.peak[str(note)] == 1
+        assert refine.peak_total >= 2
+
+    def test_timeout_fails_the_task_and_keeps_the_note(self, note, refine):
+        refine.hang = True
+        pool = _start(note, task_timeout=0.2)
+        try:
+            task = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_for_status(task.id, TaskStatus.FAILED)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert note.read_text() == ORIGINAL
+        assert not list(note.parent.glob(".note.md.refine-*"))
+
+    def test_cancel_stops_a_running_task(self, note, refine):
+        refine.hang = True
+        pool = _start(note)
+        try:
+            task = db.create_task(TaskCreate(path=note.name))
+            worker.notify()
+            _wait_until_running(pool, task.id)
+
+            db.update_task(task.id, TaskUpdate(status=TaskStatus.CANCELLED))
+            assert worker.cancel(task.id)
+
+            deadline = time.monotonic() + 5
+            while task.id in pool._running and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            assert pool.stop(timeout=5)
+
+        assert db.get_task(task.id).status == TaskStatus.CANCELLED
+        assert note.read_text() == ORIGINAL
+        assert not worker.cancel(task.id)
+
+    def test_stop_leaves_queued_tasks_for_the_next_pool(self, note, refine):
+        pool = _start(note)
+        assert pool.stop(timeout=5)
+
+        task = db.create_task(TaskCreate(path=note.name))
+        worker.notify()
+
+        assert db.get_task(task.id).status == TaskStatus.QUEUED